@@ -0,0 +1,349 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+# The suite always runs headless, so it works on a plain Linux box without a
+# display and the numbers don't depend on a window manager.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+BASELINE_PATH = "benchmarks/baseline.json"
+RESULTS_PATH = "benchmarks/results.json"
+BENCH_SLOT = "bench"
+BENCH_CLUB = "31"
+DEFAULT_THRESHOLD = 0.25
+# Differences smaller than this are timer noise whatever the percentage.
+NOISE_FLOOR_MS = 0.05
+# Frame timings and sub-millisecond queries are short and jittery, so they
+# get more slack before they count as a regression.
+THRESHOLDS = {"render": 0.5, "redraw": 0.5, "search": 0.5}
+
+
+def measure(func, repeat, setup=None, number=1):
+    # Each run times `number` calls and reports the time per call, so very
+    # fast operations are measured in batches rather than one timer tick.
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - start) / number)
+    return {
+        "median_ms": statistics.median(times) * 1000,
+        "min_ms": min(times) * 1000,
+        "max_ms": max(times) * 1000,
+        "runs": repeat,
+    }
+
+
+def threshold_for(name):
+    return THRESHOLDS.get(name.split(".")[0], DEFAULT_THRESHOLD)
+
+
+class BenchmarkSuite:
+    def __init__(self, size, repeat, frames):
+        self.size = size
+        self.repeat = repeat
+        self.frames = frames
+        self.results = {}
+
+    def record(self, name, result):
+        self.results[name] = result
+        print(f"{name:<40} {result['median_ms']:>10.2f} ms  (min {result['min_ms']:.2f}, max {result['max_ms']:.2f})")
+
+    def setup(self):
+        pygame.init()
+        # Importing main opens its window and builds the scene manager; the
+        # suite swaps in a fixed-size surface so runs are comparable.
+        import main
+        from data.scripts.save_db import reset_save
+        from data.scripts.player_store import new_save_players
+        from data.scripts.save_service import saves, save_path, CONFIG_PATH
+
+        self.main = main
+        # set_mode() keeps an existing fullscreen mode's size, so the
+        # display is reopened for the requested size to take effect.
+        pygame.display.quit()
+        pygame.display.init()
+        self.screen = pygame.display.set_mode(self.size)
+        main.screen = self.screen
+        main.scenes.screen = self.screen
+
+        # Everything runs against a throwaway save slot; the player's config
+        # is put back afterwards.
+        self.config = saves.read(CONFIG_PATH)
+        with open(CONFIG_PATH, "rb") as f:
+            self.config_bytes = f.read()
+        reset_save(BENCH_SLOT)
+        new_save_players(BENCH_SLOT)
+        saves.update(save_path(BENCH_SLOT), season="", date="")
+        self.select_bench_save()
+
+    def select_bench_save(self):
+        # The menu clears the current save and club selection picks a club,
+        # so both are put back before every scene is built.
+        from data.scripts.save_service import saves, save_path, CONFIG_PATH
+
+        saves.update(save_path(BENCH_SLOT), club_id=BENCH_CLUB)
+        saves.update(CONFIG_PATH, current_save=BENCH_SLOT)
+
+    def teardown(self):
+        from data.scripts.save_db import open_save_db, _open_dbs
+        from data.scripts.save_service import saves, save_path, CONFIG_PATH
+
+        saves.write(CONFIG_PATH, self.config)
+        saves.flush()
+        with open(CONFIG_PATH, "wb") as f:
+            f.write(self.config_bytes)
+        db = open_save_db(BENCH_SLOT)
+        db.close()
+        _open_dbs.pop(db.path, None)
+        saves.documents.pop(save_path(BENCH_SLOT), None)
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db.path + suffix):
+                os.remove(db.path + suffix)
+        pygame.quit()
+
+    def bench_scenes(self):
+        from data.scripts.assets import images
+        from data.scripts.assets import text
+
+        scenes = self.main.scenes
+        # Same order the player walks through, so every page finds the state
+        # the previous one leaves behind.
+        for name in ("menu", "save_selector", "club_selection", "dashboard", "match_simulation"):
+            def cold_start(name=name):
+                scenes.scenes.pop(name, None)
+                self.select_bench_save()
+                images.clear()
+                text.clear()
+
+            self.record(f"construct.{name}", measure(lambda: self.main.get_page(name), self.repeat, cold_start))
+
+            self.select_bench_save()
+            page = self.main.get_page(name)
+            page.render()
+
+            def frame(page=page):
+                page.handle_events([])
+                page.update()
+                page.render()
+
+            self.record(f"render.{name}", measure(frame, self.frames))
+
+            def redraw(page=page):
+                page.invalidate()
+                page.render()
+
+            self.record(f"redraw.{name}", measure(redraw, self.frames))
+
+    def bench_squad(self):
+        from data.scripts.player_store import open_save_players, _open_saves
+
+        def load():
+            _open_saves.pop(BENCH_SLOT, None)
+            open_save_players(BENCH_SLOT).squad(BENCH_CLUB)
+
+        self.record("squad.load", measure(load, self.repeat, number=20))
+
+    def bench_schedule(self):
+        from data.scripts.save_db import schedule
+
+        self.record("schedule.generate", measure(lambda: schedule(BENCH_SLOT), self.repeat))
+
+    def bench_match(self):
+        from data.scripts.clubs import club_registry
+        from data.scripts.gen_schedule import generate_league_schedules
+        from data.scripts.player_store import open_save_players
+        from simulate import simulate_fixtures
+
+        league_clubs = club_registry().league_club_ids()
+        code = sorted(league_clubs)[0]
+        fixtures = generate_league_schedules(league_clubs={code: league_clubs[code]}).fixtures
+        players = open_save_players(BENCH_SLOT)
+        result = measure(lambda: simulate_fixtures(fixtures, {}, 1, 0, players), self.repeat)
+        result["matches"] = len(fixtures)
+        result["matches_per_s"] = len(fixtures) / (result["median_ms"] / 1000)
+        self.record("match.season", result)
+
+    def bench_search(self):
+        from data.scripts.player_search import open_player_search
+
+        search = open_player_search(BENCH_SLOT)
+        # Index columns are built on first use; time the queries, not that.
+        search.query()
+        queries = {
+            "top": {},
+            "filtered": {"position": "Attack", "age": (None, 25), "OVR": (70, None)},
+            "sparse": {"foot": "left", "country_of_birth": "Brazil", "market_value_in_eur": (None, 5000000)},
+        }
+        # Queries take a fraction of a millisecond, so they get more, shorter
+        # runs: the fastest of them is what's compared.
+        for name, filters in queries.items():
+            self.record(f"search.{name}", measure(lambda: search.query(filters, sort="market_value_in_eur"),
+                                                  self.repeat * 4, number=25))
+
+    def bench_transfers(self):
+        from datetime import date
+        from data.scripts.gen_schedule import SEASON_START
+        from data.scripts.player_store import open_save_players
+        from data.scripts.save_db import open_save_db
+        from data.scripts.transfers import plan_transfers
+
+        # Planning only, so every run sees the same untouched save.
+        players = open_save_players(BENCH_SLOT)
+        balances = open_save_db(BENCH_SLOT).balances()
+        day = date.fromisoformat(SEASON_START)
+        self.record("transfers.round", measure(lambda: plan_transfers(players, balances, day, BENCH_CLUB),
+                                               self.repeat))
+
+    def bench_saves(self):
+        from data.scripts.save_db import read_meta
+        from data.scripts.save_service import saves, save_path
+
+        path = save_path(BENCH_SLOT)
+        cycle = iter(range(1 << 30))
+        self.record("save.read", measure(lambda: read_meta(path), self.repeat, number=200))
+        self.record("save.cycle", measure(lambda: (saves.update(path, season=str(next(cycle))), saves.flush()),
+                                          self.repeat, number=50))
+
+    def bench_startup(self):
+        from data.scripts.startup import TRACE_PATH, STARTUP_BUDGET_MS
+        from data.scripts.save_service import saves, CONFIG_PATH
+
+        saves.flush()
+        # Cold start runs in fresh interpreters; the menu clears the current
+        # save on entry, so config.json is put back byte for byte afterwards.
+        with open(CONFIG_PATH, "rb") as f:
+            config = f.read()
+        times = []
+        try:
+            for _ in range(self.repeat):
+                subprocess.run([sys.executable, "main.py", "--startup-trace", "--exit-after-first-frame"],
+                               check=True, stdout=subprocess.DEVNULL, env=os.environ.copy())
+                with open(TRACE_PATH, "r") as f:
+                    times.append(json.load(f)["time_to_first_frame_ms"])
+        finally:
+            with open(CONFIG_PATH, "wb") as f:
+                f.write(config)
+
+        result = {"median_ms": statistics.median(times), "min_ms": min(times), "max_ms": max(times),
+                  "runs": len(times), "budget_ms": STARTUP_BUDGET_MS}
+        self.record("startup.first_frame", result)
+
+    def run(self, only=None):
+        groups = {
+            "startup": self.bench_startup,
+            "scenes": self.bench_scenes,
+            "squad": self.bench_squad,
+            "schedule": self.bench_schedule,
+            "match": self.bench_match,
+            "search": self.bench_search,
+            "transfers": self.bench_transfers,
+            "save": self.bench_saves,
+        }
+        self.setup()
+        try:
+            for name, bench in groups.items():
+                if not only or name in only:
+                    bench()
+        finally:
+            self.teardown()
+        return self.results
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def compare(results, baseline):
+    # A benchmark only regresses when even its fastest run is slower than
+    # the baseline's typical run, so one busy moment on the machine doesn't
+    # fail the suite.
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        after = result["min_ms"]
+        if after > result.get("budget_ms", float("inf")):
+            print(f"{name:<40} {after:>10.3f} ms  over the {result['budget_ms']} ms budget")
+            regressions.append(name)
+            continue
+        if previous is None:
+            continue
+        before = previous["median_ms"]
+        limit = max(before * (1 + threshold_for(name)), before + NOISE_FLOOR_MS)
+        change = after / before - 1 if before else 0.0
+        status = "REGRESSION" if after > limit else "ok"
+        print(f"{name:<40} {before:>10.3f} -> {after:>10.3f} ms  {change:>+7.1%}  {status}")
+        if status != "ok":
+            regressions.append(name)
+    return regressions
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="UTF-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Time the game's hot paths headlessly and compare against a baseline.")
+    parser.add_argument("--only", action="append",
+                        choices=["startup", "scenes", "squad", "schedule", "match", "search", "transfers", "save"],
+                        help="benchmark group to run (repeatable, default: all)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark")
+    parser.add_argument("--frames", type=int, default=60, help="frames timed per scene for render benchmarks")
+    parser.add_argument("--size", default="1920x1080", help="screen size as WIDTHxHEIGHT")
+    parser.add_argument("--output", "-o", default=RESULTS_PATH, help="where to write the results JSON")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the new baseline")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    size = tuple(int(value) for value in args.size.lower().split("x"))
+
+    results = BenchmarkSuite(size, args.repeat, args.frames).run(args.only)
+    report = {"environment": environment(), "size": list(size), "benchmarks": results}
+    write_json(args.output, report)
+    print(f"Results written to {args.output}")
+
+    baseline = {"benchmarks": {}}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="UTF-8") as f:
+            baseline = json.load(f)
+    elif not args.update_baseline:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one")
+
+    if args.update_baseline:
+        # With --only, the other groups keep their recorded entries.
+        if args.only:
+            report["benchmarks"] = {**baseline["benchmarks"], **results}
+        write_json(args.baseline, report)
+        print(f"Baseline updated at {args.baseline}")
+        return 0
+    regressions = compare(results, baseline["benchmarks"])
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,74 @@
+import time
 import pygame
+from ..scripts.assets import images, text
+from ..scripts.profiler import profiler
+from ..scripts.save_service import saves
+
+class Panel:
+    def __init__(self, rect, draw):
+        self.rect = pygame.Rect(rect)
+        self.draw = draw
+        self.surface = None
+        self.dirty = True
+
+    def compose(self):
+        self.surface = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        self.draw(self.surface)
+        self.dirty = False
 
 class BasePage:
+    next_pages = ()
+
+    @classmethod
+    def preload_tasks(cls, screen):
+        return []
+
     def __init__(self, screen):
         self.screen = screen
+        self.backdrop = None
+        self.panels = {}
+        self.full_redraw = True
+
+    def load_font(self, size, name=None):
+        return text.font(size, name)
+
+    def render_text(self, font, string, color, antialias=True):
+        return text.render(font, str(string), color, antialias)
+
+    def set_backdrop(self, background, overlay_alpha):
+        self.backdrop = background.copy()
+        overlay = pygame.Surface(self.backdrop.get_size())
+        overlay.fill((0, 0, 0))
+        overlay.set_alpha(overlay_alpha)
+        self.backdrop.blit(overlay, (0, 0))
+        self.full_redraw = True
+
+    def add_panel(self, name, rect, draw):
+        self.panels[name] = Panel(rect, draw)
+        self.full_redraw = True
+
+    def invalidate(self, *names):
+        for name in names or self.panels:
+            self.panels[name].dirty = True
+
+    def on_enter(self):
+        self.full_redraw = True
+
+    def on_exit(self):
+        pass
+
+    def memory_usage(self):
+        surfaces = [self.backdrop] + [panel.surface for panel in self.panels.values()]
+        return sum(surface.get_width() * surface.get_height() * surface.get_bytesize()
+                   for surface in surfaces if surface is not None)
+
+    def quit(self):
+        if profiler.tracing:
+            profiler.dump_trace()
+        saves.flush()
+        images.flush()
+        pygame.quit()
+        exit()
 
     def handle_events(self, events):
         pass
@@ -11,4 +77,27 @@ class BasePage:
         pass
 
     def render(self):
-        pass
\ No newline at end of file
+        if self.full_redraw:
+            dirty_rects = [self.screen.get_rect()]
+            self.full_redraw = False
+        else:
+            dirty_rects = [panel.rect for panel in self.panels.values() if panel.dirty]
+
+        for panel in self.panels.values():
+            if panel.dirty:
+                start = time.perf_counter()
+                panel.compose()
+                profiler.panel(panel.draw.__name__, start, time.perf_counter() - start)
+
+        # Panels may overlap, so every dirty area is rebuilt bottom-up from the
+        # backdrop with the clip set to that area.
+        for rect in dirty_rects:
+            self.screen.set_clip(rect)
+            if self.backdrop is not None:
+                self.screen.blit(self.backdrop, (0, 0))
+            for panel in self.panels.values():
+                if panel.rect.colliderect(rect):
+                    self.screen.blit(panel.surface, panel.rect)
+        self.screen.set_clip(None)
+
+        return dirty_rects
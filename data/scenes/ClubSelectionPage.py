@@ -1,92 +1,83 @@
 import pygame
-import os
-import csv
-import json
 from .BasePage import BasePage
+from ..scripts.player_store import new_save_players
+from ..scripts.save_db import reset_save
+from ..scripts.assets import images
+from ..scripts.save_service import saves, save_path, CONFIG_PATH
+from ..scripts.clubs import club_registry
 
 
 class ClubSelectionPage(BasePage):
+    next_pages = ("dashboard",)
+
+    @classmethod
+    def preload_tasks(cls, screen):
+        return [
+            lambda: images.prefetch("data/assets/images/stadium_4.jpg", screen.get_size(), alpha=False),
+            cls.preload_first_league_logos,
+        ]
+
+    @classmethod
+    def preload_first_league_logos(cls):
+        registry = club_registry()
+        for club in registry.league_clubs(registry.league_list()[0].league_code):
+            logo_path = registry.logo_path(club.club_id)
+            if logo_path:
+                images.prefetch(logo_path, (200, 200))
+
     def __init__(self, screen):
         super().__init__(screen)
-        self.font = pygame.font.Font(pygame.font.get_default_font(), 36)
-        self.small_font = pygame.font.Font(pygame.font.get_default_font(), 28)
+        self.font = self.load_font(36)
+        self.small_font = self.load_font(28)
 
-        self.background = pygame.image.load("data/assets/images/stadium_4.jpg")
-        self.background = pygame.transform.scale(self.background, (screen.get_width(), screen.get_height()))
+        self.background = images.get("data/assets/images/stadium_4.jpg", screen.get_size(), alpha=False)
 
-        self.leagues = self.load_leagues("data/assets/leagues.csv")
-        self.clubs = self.load_clubs("data/assets/clubs.csv")
+        self.registry = club_registry()
+        self.leagues = self.registry.league_list()
 
         self.current_league_index = 0
         self.current_club_index = 0
 
-        self.config_path = "data/assets/config.json"
-        self.save_path = None
-        self.load_current_save()
-
-        self.update_filtered_clubs()
-
         self.league_left_arrow = pygame.Rect(200, 100, 50, 50)
         self.league_right_arrow = pygame.Rect(self.screen.get_width() - 250, 100, 50, 50)
         self.club_left_arrow = pygame.Rect(200, self.screen.get_height() // 2 - 25, 50, 50)
         self.club_right_arrow = pygame.Rect(self.screen.get_width() - 250, self.screen.get_height() // 2 - 25, 50, 50)
+        self.start_button = pygame.Rect(self.screen.get_width() // 2 - 150, self.screen.get_height() - 100, 300, 50)
+
+        self.set_backdrop(self.background, 200)
+        self.add_panel("league", (0, 100, self.screen.get_width(), 50), self.draw_league)
+        self.add_panel("club", (0, self.screen.get_height() // 2 - 150, self.screen.get_width(), 330), self.draw_club)
+        self.add_panel("start", self.start_button, self.draw_start_button)
+
+        self.save_path = None
+
+    def on_enter(self):
+        super().on_enter()
+        self.load_current_save()
+        self.update_filtered_clubs()
 
     def load_current_save(self):
-        with open(self.config_path, 'r', encoding='utf-8') as config_file:
-            config_data = json.load(config_file)
-            save_num = config_data.get("current_save", 1)
-            self.save_path = f"data/assets/save{save_num}.json"
-
-    def load_leagues(self, filepath):
-        leagues = []
-        with open(filepath, mode="r", encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                leagues.append(row)
-        return leagues
-
-    def load_clubs(self, filepath):
-        clubs = []
-        with open(filepath, mode="r", encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                clubs.append(row)
-        return clubs
+        self.save_num = saves.read(CONFIG_PATH).get("current_save", 1)
+        self.save_path = save_path(self.save_num)
 
     def update_filtered_clubs(self):
-        league_code = self.leagues[self.current_league_index]["league_code"]
-        self.filtered_clubs = [club for club in self.clubs if club["league_code"] == league_code]
+        self.filtered_clubs = self.registry.league_clubs(self.leagues[self.current_league_index].league_code)
         self.current_club_index = min(self.current_club_index, len(self.filtered_clubs) - 1)
+        self.invalidate("league", "club")
         self.update_save_file()
 
     def update_save_file(self):
-        if not self.save_path or not os.path.exists(self.save_path):
+        if not self.save_path:
             return
 
         current_club = self.filtered_clubs[self.current_club_index]
-
-        with open("data/assets/clubs.csv", 'r+', encoding='utf-8') as inp:
-            reader = csv.reader(inp)
-
-            for row in reader:
-                if row[0] == current_club["club_id"]:
-                    money = int(row[5])
-                    break
-
-        updated_data = {"club_id": current_club["club_id"], "money": current_club.get("initial_money", money)}
-
-        with open(self.save_path, 'r+', encoding='utf-8') as save_file:
-            save_data = json.load(save_file)
-            save_data.update(updated_data)
-            save_file.seek(0)
-            json.dump(save_data, save_file, indent=4)
-            save_file.truncate()
+        # Starting a career reseeds every club's balance from its budget.
+        saves.update(self.save_path, club_id=current_club.club_id)
 
     def handle_events(self, events):
         for event in events:
             if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
+                self.quit()
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 mouse_pos = pygame.mouse.get_pos()
                 if self.league_left_arrow.collidepoint(mouse_pos):
@@ -97,90 +88,77 @@ class ClubSelectionPage(BasePage):
                     self.update_filtered_clubs()
                 elif self.club_left_arrow.collidepoint(mouse_pos):
                     self.current_club_index = (self.current_club_index - 1) % len(self.filtered_clubs)
+                    self.invalidate("club")
                     self.update_save_file()
                 elif self.club_right_arrow.collidepoint(mouse_pos):
                     self.current_club_index = (self.current_club_index + 1) % len(self.filtered_clubs)
+                    self.invalidate("club")
                     self.update_save_file()
                 elif self.start_button.collidepoint(mouse_pos):
+                    reset_save(self.save_num)
+                    new_save_players(self.save_num)
+                    saves.update(self.save_path, season="", date="")
                     return "dashboard"
 
-    def render_arrows(self):
-        pygame.draw.polygon(self.screen, (255, 255, 255), [
-            (self.league_left_arrow.x + 10, self.league_left_arrow.y + 25),
-            (self.league_left_arrow.x + 40, self.league_left_arrow.y + 10),
-            (self.league_left_arrow.x + 40, self.league_left_arrow.y + 40)
-        ])
-
-        pygame.draw.polygon(self.screen, (255, 255, 255), [
-            (self.league_right_arrow.x + 40, self.league_right_arrow.y + 25),
-            (self.league_right_arrow.x + 10, self.league_right_arrow.y + 10),
-            (self.league_right_arrow.x + 10, self.league_right_arrow.y + 40)
-        ])
-
-        pygame.draw.polygon(self.screen, (255, 255, 255), [
-            (self.club_left_arrow.x + 10, self.club_left_arrow.y + 25),
-            (self.club_left_arrow.x + 40, self.club_left_arrow.y + 10),
-            (self.club_left_arrow.x + 40, self.club_left_arrow.y + 40)
-        ])
-
-        pygame.draw.polygon(self.screen, (255, 255, 255), [
-            (self.club_right_arrow.x + 40, self.club_right_arrow.y + 25),
-            (self.club_right_arrow.x + 10, self.club_right_arrow.y + 10),
-            (self.club_right_arrow.x + 10, self.club_right_arrow.y + 40)
-        ])
+    def draw_arrow(self, surface, rect, left):
+        if left:
+            points = [(rect.x + 10, rect.y + 25), (rect.x + 40, rect.y + 10), (rect.x + 40, rect.y + 40)]
+        else:
+            points = [(rect.x + 40, rect.y + 25), (rect.x + 10, rect.y + 10), (rect.x + 10, rect.y + 40)]
+        pygame.draw.polygon(surface, (255, 255, 255), points)
 
     def get_club_logo(self, club_id):
-        logo_path = f"data/assets/images/clubs/logos/logo_{club_id}.png"
-        if os.path.exists(logo_path):
+        logo_path = self.registry.logo_path(club_id)
+        if logo_path:
             try:
-                return pygame.image.load(logo_path)
+                return images.get(logo_path, (200, 200))
             except pygame.error as e:
                 return self.get_default_logo()
         else:
             return self.get_default_logo()
 
     def get_default_logo(self):
-        placeholder_path = "data/assets/images/clubs/logos/logo_11.png"
-        if os.path.exists(placeholder_path):
+        placeholder_path = self.registry.logo_path("11")
+        if placeholder_path:
             try:
-                return pygame.image.load(placeholder_path)
+                return images.get(placeholder_path, (200, 200))
             except pygame.error as e:
                 pass
         return pygame.Surface((200, 200))
 
-    def render(self):
-        self.screen.blit(self.background, (0, 0))
-        overlay = pygame.Surface(self.screen.get_size())
-        overlay.fill((0, 0, 0))
-        overlay.set_alpha(200)
-        self.screen.blit(overlay, (0, 0))
+    def draw_league(self, surface):
+        origin = self.panels["league"].rect.topleft
+        self.draw_arrow(surface, self.league_left_arrow.move(-origin[0], -origin[1]), True)
+        self.draw_arrow(surface, self.league_right_arrow.move(-origin[0], -origin[1]), False)
 
         league = self.leagues[self.current_league_index]
-        league_text = self.font.render(f"{league['league_name']} ({league['country_name']})", True, (255, 255, 255))
-        text_y = self.league_left_arrow.y + (self.league_left_arrow.height // 2) - (league_text.get_height() // 2)
-        self.screen.blit(league_text, (self.screen.get_width() // 2 - league_text.get_width() // 2, text_y))
+        league_text = self.render_text(self.font, f"{league.league_name} ({league.country_name})", (255, 255, 255))
+        text_y = self.league_left_arrow.height // 2 - league_text.get_height() // 2
+        surface.blit(league_text, (surface.get_width() // 2 - league_text.get_width() // 2, text_y))
+
+    def draw_club(self, surface):
+        origin = self.panels["club"].rect.topleft
+        self.draw_arrow(surface, self.club_left_arrow.move(-origin[0], -origin[1]), True)
+        self.draw_arrow(surface, self.club_right_arrow.move(-origin[0], -origin[1]), False)
 
         current_club = self.filtered_clubs[self.current_club_index]
-        club_logo = self.get_club_logo(current_club["club_id"])
+        club_logo = self.get_club_logo(current_club.club_id)
         if club_logo:
-            club_logo = pygame.transform.scale(club_logo, (200, 200))
-            self.screen.blit(club_logo, (self.screen.get_width() // 2 - 100, self.screen.get_height() // 2 - 150))
+            surface.blit(club_logo, (surface.get_width() // 2 - 100, 0))
 
-        club_text = self.font.render(current_club["club_name"], True, (255, 255, 255))
-        stadium_text = self.small_font.render(
-            f"Stadium: {current_club['stadium_name']} ({current_club['stadium_capacity']})", True, (255, 255, 255)
+        club_text = self.render_text(self.font, current_club.club_name, (255, 255, 255))
+        stadium_text = self.render_text(
+            self.small_font, f"Stadium: {current_club.stadium_name} ({current_club.stadium_capacity})", (255, 255, 255)
         )
-        budget_text = self.small_font.render(
-            f"Starting Budget: {int(current_club['budget']) / 1000000}m", True, (255, 255, 255)
+        budget_text = self.render_text(
+            self.small_font, f"Starting Budget: {current_club.budget / 1000000}m", (255, 255, 255)
         )
 
-        self.screen.blit(club_text, (self.screen.get_width() // 2 - club_text.get_width() // 2, self.screen.get_height() // 2 + 70))
-        self.screen.blit(stadium_text, (self.screen.get_width() // 2 - stadium_text.get_width() // 2, self.screen.get_height() // 2 + 110))
-        self.screen.blit(budget_text, (self.screen.get_width() // 2 - budget_text.get_width() // 2, self.screen.get_height() // 2 + 150))
+        surface.blit(club_text, (surface.get_width() // 2 - club_text.get_width() // 2, 220))
+        surface.blit(stadium_text, (surface.get_width() // 2 - stadium_text.get_width() // 2, 260))
+        surface.blit(budget_text, (surface.get_width() // 2 - budget_text.get_width() // 2, 300))
 
-        self.render_arrows()
-
-        self.start_button = pygame.Rect(self.screen.get_width() // 2 - 150, self.screen.get_height() - 100, 300, 50)
-        pygame.draw.rect(self.screen, (50, 50, 50), self.start_button, border_radius=10)
-        button_text = self.small_font.render("Start Game", True, (255, 255, 255))
-        self.screen.blit(button_text, button_text.get_rect(center=self.start_button.center))
\ No newline at end of file
+    def draw_start_button(self, surface):
+        pygame.draw.rect(surface, (50, 50, 50), surface.get_rect(), border_radius=10)
+        button_text = self.render_text(self.small_font, "Start Game", (255, 255, 255))
+        surface.blit(button_text, button_text.get_rect(center=surface.get_rect().center))
@@ -1,64 +1,152 @@
 import pygame
 from datetime import datetime
-import csv
 from .BasePage import BasePage
-from ..scripts.gen_schedule import schedule
-import json
-from colorthief import ColorThief
+from ..scripts.save_db import load_calendar, schedule
+from ..scripts.player_store import open_save_players
+from ..scripts.assets import images
+from ..scripts.palette import dominant_color
+from ..scripts.save_service import saves, save_path, CONFIG_PATH
+from ..scripts.clubs import club_registry
 import random
-from ..scripts.match import MatchSimulationPage
+
+DEFAULT_BACKGROUND = "data/assets/images/stadium_4.jpg"
+# Stand-in for clubs without a logo, as on the club selection page.
+PLACEHOLDER_LOGO_CLUB = "11"
+
+
+def club_logo_path(club_id):
+    registry = club_registry()
+    return registry.logo_path(club_id) or registry.logo_path(PLACEHOLDER_LOGO_CLUB)
+
+
+def club_logo(club_id, size):
+    logo_path = club_logo_path(club_id)
+    if logo_path:
+        try:
+            return images.get(logo_path, size)
+        except pygame.error:
+            pass
+    return pygame.Surface(size)
+
+
+def prefetch_logo(club_id, size):
+    logo_path = club_logo_path(club_id)
+    if logo_path:
+        images.prefetch(logo_path, size)
+
 
 class DashboardPage(BasePage):
+    next_pages = ("match_simulation", "transfer")
+
+    @classmethod
+    def preload_tasks(cls, screen):
+        current_save = saves.read(CONFIG_PATH)["current_save"]
+
+        tasks = [
+            lambda: images.prefetch("data/assets/icons/training_icon.png", (50, 50)),
+            lambda: images.prefetch("data/assets/icons/players_icon.png", (50, 50)),
+            lambda: images.prefetch("data/assets/icons/settings_icon.png", (50, 50)),
+        ]
+        save_nums = [current_save] if current_save else ["1", "2", "3"]
+        for save_num in save_nums:
+            save_data = saves.read(save_path(save_num))
+            if save_data.get("club_id", ""):
+                tasks.append(lambda save_num=save_num, save_data=save_data: cls.preload_save(screen, save_num, save_data))
+        return tasks
+
+    @classmethod
+    def preload_save(cls, screen, save_num, save_data):
+        club_id = save_data["club_id"]
+        background_path = club_registry().background_path(club_id) or DEFAULT_BACKGROUND
+        images.prefetch(background_path, screen.get_size(), alpha=False)
+        prefetch_logo(club_id, (50, 50))
+        dominant_color(club_id)
+        open_save_players(save_num).squad(club_id)
+
+        for match in load_calendar(save_num).upcoming(club_id, save_data.get("date", ""), limit=11):
+            prefetch_logo(match["home"], (40, 40))
+            prefetch_logo(match["away"], (40, 40))
+
     def __init__(self, screen):
         super().__init__(screen)
 
-        self.font = pygame.font.Font(pygame.font.get_default_font(), 24)
-        self.small_font = pygame.font.Font(pygame.font.get_default_font(), 16)
+        self.font = self.load_font(24)
+        self.small_font = self.load_font(16)
 
         self.squad = []
         self.schedule = []
 
+        self.save_num = None
         self.save_file = ""
         self.money = 0
         self.club_id = 0
         self.season = ""
         self.date = ""
 
-        with open("data/assets/config.json", "r") as f:
-            data = json.load(f)
-            self.save_file = f"data/assets/save{data['current_save']}.json"
-            self.save_num = data["current_save"]
+        self.opponent_logo = club_logo(PLACEHOLDER_LOGO_CLUB, (50, 50))
 
+        self.icons = {
+            "training": images.get("data/assets/icons/training_icon.png", (50, 50)),
+            "players": images.get("data/assets/icons/players_icon.png", (50, 50)),
+            "settings": images.get("data/assets/icons/settings_icon.png", (50, 50))
+        }
+
+        self.buttons = self.setup_navigation_buttons()
+
+        # Define the "Advance to Next Match" button
+        self.advance_match_button = pygame.Rect(50, 150, 400, 200)
+
+    def on_enter(self):
+        super().on_enter()
+        save_num = saves.read(CONFIG_PATH)["current_save"]
+
+        club_id = self.club_id
+        if not self.save_file or save_num != self.save_num:
+            self.load_save(save_num)
+            return
+
+        money, date = self.money, self.date
         self.get_save_data()
-        self.get_club_data()
+        if self.club_id != club_id:
+            self.load_save(save_num)
+            return
+        if (money, date) != (self.money, self.date):
+            self.invalidate("info")
+
+        schedule = self.schedule
         self.get_schedule()
+        if schedule != self.schedule:
+            self.invalidate("fixtures", "preview")
+
+        squad = self.squad
+        numbers = {player["player_id"]: player["number"] for player in squad}
+        self.load_squad()
+        for player in self.squad:
+            if player["player_id"] in numbers:
+                player["number"] = numbers[player["player_id"]]
+        self.generate_numbers()
+        if squad != self.squad:
+            self.invalidate("squad")
 
-        self.background = pygame.image.load(f"data/assets/images/clubs/backgrounds/background_{self.club_id}.png")
-        self.background = pygame.transform.scale(
-            self.background, (screen.get_width(), screen.get_height())
-        )
+    def load_save(self, save_num):
+        self.save_num = save_num
+        self.save_file = save_path(save_num)
 
-        self.color_thief = ColorThief(f"data/assets/images/clubs/logos/logo_{self.club_id}.png")
-        self.dominant_color = self.color_thief.get_color(quality=1)
+        self.get_save_data()
+        self.get_club_data()
+        self.get_schedule()
 
-        self.club_logo = pygame.image.load(f"data/assets/images/clubs/logos/logo_{self.club_id}.png")
-        self.club_logo = pygame.transform.scale(self.club_logo, (50, 50))
+        # Not every club has a background of its own.
+        background_path = club_registry().background_path(self.club_id) or DEFAULT_BACKGROUND
+        self.background = images.get(background_path, self.screen.get_size(), alpha=False)
 
-        self.opponent_logo = pygame.image.load("data/assets/images/clubs/logos/logo_11.png")
-        self.opponent_logo = pygame.transform.scale(self.opponent_logo, (50, 50))
+        self.dominant_color = dominant_color(self.club_id)
 
-        self.icons = {
-            "training": pygame.image.load("data/assets/icons/training_icon.png"),
-            "players": pygame.image.load("data/assets/icons/players_icon.png"),
-            "settings": pygame.image.load("data/assets/icons/settings_icon.png")
-        }
+        self.club_logo = club_logo(self.club_id, (50, 50))
 
-        self.buttons = self.setup_navigation_buttons()
-        self.load_squad_from_csv(f"data/assets/save{self.save_num}_players.csv")
+        self.load_squad()
         self.generate_numbers()
-
-        # Define the "Advance to Next Match" button
-        self.advance_match_button = pygame.Rect(50, 150, 400, 200)
+        self.setup_panels()
 
     def generate_numbers(self):
         numbers = list(range(1, 100))
@@ -77,55 +165,37 @@ class DashboardPage(BasePage):
                 player["number"] = available_numbers.pop(0)
 
     def get_save_data(self):
-        with open(self.save_file, "r") as f:
-            data = json.load(f)
-            self.money = data["money"]
-            self.club_id = data["club_id"]
-
-            if data.get("season", "") == "":
-                self.season = "24/25"
-                data["season"] = self.season
-                with open(self.save_file, "w") as f:
-                    json.dump(data, f, indent=4)
-            else:
-                self.season = data["season"]
-
-            if data.get("date", "") == "":
-                self.date = datetime.strptime("2024-08-17", "%Y-%m-%d")
-                data["date"] = self.date.strftime("%Y-%m-%d")
-                with open(self.save_file, "w") as f:
-                    json.dump(data, f, indent=4)
-            else:
-                self.date = data["date"]
+        data = saves.read(self.save_file)
+        self.money = data["money"]
+        self.club_id = data["club_id"]
+        defaults = {}
+
+        if data.get("season", "") == "":
+            self.season = "24/25"
+            defaults["season"] = self.season
+        else:
+            self.season = data["season"]
+
+        if data.get("date", "") == "":
+            self.date = datetime.strptime("2024-08-17", "%Y-%m-%d")
+            defaults["date"] = self.date.strftime("%Y-%m-%d")
+        else:
+            self.date = data["date"]
+
+        if defaults:
+            saves.update(self.save_file, **defaults)
 
     def get_schedule(self):
-        try:
-            with open(f"data/assets/save{self.save_num}_schedule.json", "r") as f:
-                self.schedule = json.load(f)
-        except FileNotFoundError:
-            schedule(self.club_id, self.club_data["league_code"], self.save_num)
-            self.get_schedule()
-
-    def load_squad_from_csv(self, file_path):
-        with open(file_path, "r", encoding="UTF-8") as csvfile:
-            reader = csv.DictReader(csvfile)
-            self.squad = []
-            for row in reader:
-                if self.club_id == row["current_club_id"]:
-                    self.squad.append({
-                        "id": row["player_id"],
-                        "name": row["name"],
-                        "position": row["position"],
-                        "overall": row["overall"],
-                        "OVR": row["OVR"]
-                    })
+        self.calendar = load_calendar(self.save_num)
+        if not len(self.calendar):
+            self.calendar = schedule(self.save_num)
+        self.schedule = self.calendar.upcoming(self.club_id, self.date)
+
+    def load_squad(self):
+        self.squad = open_save_players(self.save_num).squad(self.club_id)
 
     def get_club_data(self):
-        with open("data/assets/clubs.csv", "r", encoding="UTF-8") as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                if row["club_id"] == self.club_id:
-                    self.club_data = row
+        self.club_data = club_registry().club(self.club_id)
 
     def format_money(self, money):
         if money >= 1000000:
@@ -144,38 +214,49 @@ class DashboardPage(BasePage):
         }
         return buttons
 
-    def render_match_preview(self):
-        preview_surface = pygame.Surface((400, 200), pygame.SRCALPHA)
+    def setup_panels(self):
+        squad_height = 11 * 40 + 70
+        nav_rect = self.buttons["dashboard"].unionall(list(self.buttons.values()))
+
+        self.set_backdrop(self.background, 128)
+        self.add_panel("preview", (50, 150, 400, 200), self.render_match_preview)
+        self.add_panel("squad", (500, 150, 400, squad_height), self.render_squad_section)
+        self.add_panel("fixtures", (950, 150, 300, 600), self.render_upcoming_matches)
+        self.add_panel("shortcuts", (50, 360, 400, 100), self.render_training_and_players)
+        self.add_panel("navigation", nav_rect, self.render_navigation)
+        self.add_panel("info", (20, 20, 200, 80), self.render_club_info)
+
+    def render_match_preview(self, preview_surface):
         pygame.draw.rect(preview_surface, (40, 40, 40, 255), (0, 0, 400, 200), border_radius=10)
 
-        title = self.font.render("Advance to Next Match", True, (255, 255, 255))
+        if not self.schedule:
+            title = self.render_text(self.font, "Season Finished", (255, 255, 255))
+            preview_surface.blit(title, (20, 20))
+            return
+
+        title = self.render_text(self.font, "Advance to Next Match", (255, 255, 255))
         preview_surface.blit(title, (20, 20))
 
         preview_surface.blit(self.club_logo, (50, 75))
         preview_surface.blit(self.opponent_logo, (300, 75))
 
-        vs_text = self.font.render("vs.", True, (255, 255, 255))
+        vs_text = self.render_text(self.font, "vs.", (255, 255, 255))
         preview_surface.blit(vs_text, (180, 90))
 
-        self.screen.blit(preview_surface, (50, 150))
-
-    def render_squad_section(self):
+    def render_squad_section(self, squad_surface):
         player_height = 40
-        padding = 0
         title_height = 70
-        total_height = 11 * player_height + padding + title_height
 
-        squad_surface = pygame.Surface((400, total_height), pygame.SRCALPHA)
-        pygame.draw.rect(squad_surface, (40, 40, 40, 255), (0, 0, 400, total_height), border_radius=10)
+        pygame.draw.rect(squad_surface, (40, 40, 40, 255), squad_surface.get_rect(), border_radius=10)
 
-        title = self.font.render("Squad", True, (255, 255, 255))
+        title = self.render_text(self.font, "Squad", (255, 255, 255))
         squad_surface.blit(title, (20, 20))
 
         y_pos = title_height
         for player in self.squad:
             jersey = pygame.Surface((30, 30))
             jersey.fill((self.dominant_color[0], self.dominant_color[1], self.dominant_color[2]))
-            number = self.small_font.render(str(player["number"]), True, (255, 255, 255))
+            number = self.render_text(self.small_font, str(player["number"]), (255, 255, 255))
             jersey.blit(number, (8, 8))
 
             player_ovr = player["OVR"]
@@ -183,34 +264,31 @@ class DashboardPage(BasePage):
             if player["position"] == "GK":
                 jersey.fill((0, 0, 0))
 
-            if player["OVR"] == "":
+            if player["OVR"] is None:
                 player_ovr = player["overall"]
 
 
             squad_surface.blit(jersey, (20, y_pos))
-            name = self.small_font.render(f"{player['name']} (OVR {player_ovr})", True, (255, 255, 255))
+            name = self.render_text(self.small_font, f"{player['name']} (OVR {player_ovr})", (255, 255, 255))
             squad_surface.blit(name, (60, y_pos + 5))
 
             y_pos += player_height
 
-        self.screen.blit(squad_surface, (500, 150))
-
-
-    def render_upcoming_matches(self):
-        matches_surface = pygame.Surface((300, 600), pygame.SRCALPHA)
+    def render_upcoming_matches(self, matches_surface):
         pygame.draw.rect(matches_surface, (40, 40, 40, 255), (0, 0, 300, 600), border_radius=10)
 
-        title = self.font.render("Upcoming Matches", True, (255, 255, 255))
+        title = self.render_text(self.font, "Upcoming Matches", (255, 255, 255))
         matches_surface.blit(title, (20, 20))
 
         y_pos = 70
         for match in self.schedule:
-            home_logo = pygame.image.load(f"data/assets/images/clubs/logos/logo_{match['home']}.png")
-            away_logo = pygame.image.load(f"data/assets/images/clubs/logos/logo_{match['away']}.png")
-            home_logo = pygame.transform.scale(home_logo, (40, 40))
-            away_logo = pygame.transform.scale(away_logo, (40, 40))
+            if y_pos >= matches_surface.get_height():
+                break
+
+            home_logo = club_logo(match["home"], (40, 40))
+            away_logo = club_logo(match["away"], (40, 40))
 
-            vs_text = self.font.render("vs.", True, (255, 255, 255))
+            vs_text = self.render_text(self.font, "vs.", (255, 255, 255))
 
             matches_surface.blit(home_logo, (20, y_pos))
             matches_surface.blit(vs_text, (135, y_pos + 10))
@@ -218,62 +296,43 @@ class DashboardPage(BasePage):
 
             y_pos += 50
 
-        self.screen.blit(matches_surface, (950, 150))
-
-    def render_training_and_players(self):
-        buttons_surface = pygame.Surface((400, 100), pygame.SRCALPHA)
-
+    def render_training_and_players(self, buttons_surface):
         training_button = pygame.Rect(20, 10, 180, 80)
         players_button = pygame.Rect(210, 10, 180, 80)
 
         pygame.draw.rect(buttons_surface, (40, 40, 40, 255), training_button, border_radius=10)
         pygame.draw.rect(buttons_surface, (40, 40, 40, 255), players_button, border_radius=10)
 
-        training_icon = pygame.transform.scale(self.icons["training"], (50, 50))
-        players_icon = pygame.transform.scale(self.icons["players"], (50, 50))
-
-        buttons_surface.blit(training_icon, (50, 25))
-        buttons_surface.blit(players_icon, (240, 25))
-
-        self.screen.blit(buttons_surface, (50, 360))
-
-    def render(self):
-        self.screen.blit(self.background, (0, 0))
-
-        overlay = pygame.Surface(self.screen.get_size())
-        overlay.fill((0, 0, 0))
-        overlay.set_alpha(128)
-        self.screen.blit(overlay, (0, 0))
-
-        self.render_match_preview()
-        self.render_squad_section()
-        self.render_upcoming_matches()
-        self.render_training_and_players()
+        buttons_surface.blit(self.icons["training"], (50, 25))
+        buttons_surface.blit(self.icons["players"], (240, 25))
 
+    def render_navigation(self, surface):
+        origin = self.panels["navigation"].rect.topleft
         for name, rect in self.buttons.items():
-            pygame.draw.rect(self.screen, (60, 60, 60), rect, border_radius=10)
-            text = self.small_font.render(name.title(), True, (255, 255, 255))
-            self.screen.blit(text, (rect.x + 10, rect.y + 10))
+            rect = rect.move(-origin[0], -origin[1])
+            pygame.draw.rect(surface, (60, 60, 60), rect, border_radius=10)
+            text = self.render_text(self.small_font, name.title(), (255, 255, 255))
+            surface.blit(text, (rect.x + 10, rect.y + 10))
 
-        info_background = pygame.Surface((200, 80), pygame.SRCALPHA)
-        pygame.draw.rect(info_background, (40, 40, 40, 255), (0, 0, 200, 80), border_radius=10)
-        self.screen.blit(info_background, (20, 20))
+    def render_club_info(self, surface):
+        pygame.draw.rect(surface, (40, 40, 40, 255), (0, 0, 200, 80), border_radius=10)
 
-        self.screen.blit(self.club_logo, (30, 30))
+        surface.blit(self.club_logo, (10, 10))
 
         date = str(self.date).split(" ")[0]
         yy, mm, dd = str(date).split("-")
-        date_text = self.font.render(f"{dd}.{mm}. {yy}", True, (255, 255, 255))
-        self.screen.blit(date_text, (90, 30))
+        date_text = self.render_text(self.font, f"{dd}.{mm}. {yy}", (255, 255, 255))
+        surface.blit(date_text, (70, 10))
 
-        money_text = self.font.render(f"€{self.format_money(self.money)}", True, (0, 255, 0))
-        self.screen.blit(money_text, (90, 60))
+        money_text = self.render_text(self.font, f"€{self.format_money(self.money)}", (0, 255, 0))
+        surface.blit(money_text, (70, 40))
 
     def handle_events(self, events):
         for event in events:
             if event.type == pygame.MOUSEBUTTONDOWN:
                 mouse_pos = event.pos
-                if self.advance_match_button.collidepoint(mouse_pos):
+                # There is no next match once the season is over.
+                if self.advance_match_button.collidepoint(mouse_pos) and self.schedule:
                     return "match_simulation"
                 for name, rect in self.buttons.items():
                     if rect.collidepoint(mouse_pos):
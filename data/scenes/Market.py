@@ -1,232 +1,292 @@
-owYzKJs
-oMX3A8GcJJ
-3Ma
-EncodingWarningbdbwxR
-aPQcCRKDM
-8hNT4
-SY6jenc
-OrxPHYOOA
-N8UmPKmnS7
-XsEdN
-12oNt9
-IqamCCwOA
-p2Wn5qJ8G
-04FjbaPuYi
-wOCMk9Y
-WindowsErrorLynV
-6b9LM
-DeGTXWpdlY
-9qS2NE
-pVQXb
-dU2JOr
-CBS
-4M6Hxhrd
-hxZlNW
-eiO25dcqK
-A1cdTk
-FluMEy5hxT
-x0RxZLDG
-t6T8E9L
-NptPm
-Qd4lu89otr
-4E0uvp
-rzsUTq9H
-LK7IQ1xx
-7qciur9
-LKxyKwl
-Gb7KUVJC
-wtNG
-85p0G
-t3j2
-uan51o
-7Agf
-BaseExceptionHYh
-uz1w1Y7
-jsyRr
-pu0M
-inQbzq
-LookupErrorwHiSRB
-2q0GZSkQmq
-JFBtAxDZrO
-xDfQtM1w
-wF1l3t9Y
-1Zdwipne
-j30
-BsqD6
-LClXL
-kTfcmoQ
-8OtCDaStbo
-HpWlQjsG
-vJnICU4GJD
-vA0V0saAIB
-Q3imKJCF
-7ZOKmFET
-l4N9Y
-j9TT4hO
-ZeroDivisionErrorYxXFGL71
-i6DvGOOz6U
-jiw7kZtI
-gTXrxGdA
-okR12af
-vD7
-O5fLT
-ZullAUE
-ugw3DAkpi
-kWPriwQ
-JtZN6cSst
-eZXVrL4M
-apXixM
-thIm
-86Zw3tr
-UHkN2llu0
-QyuCLR0Rs
-d8o
-7eoEr
-scP
-0ZL9
-7ng7qP
-dpcxOfR9
-wlLb
-hvBeG
-haMwp
-253Ok
-vsBm5I3
-JOs7G1P
-Hfy8RPUloP
-C9ikGd
-oy4A6L8Dd
-looq81huzFcJ
-wLtcfI4
-Ijif1NVoKB
-8aSyzv3mn
-PKac6m
-xm0iHBaLA
-rSa4SsovU
-8YjK6U6
-SClthmYS
-FD0k8tOIf
-defccUR5U
-r0SORC
-GeneratorExitBDdaFQt
-tN6ElsqjYh
-Nmlyvpy
-Ucipeh4Y
-7UrXoc20
-P7LaavAg
-0kMe3o
-uSdxi
-YyW6L
-0XRO1eSms
-oE4
-tv4L
-974rOGkJDD
-oESk2s
-vIDfxRjE
-TvRxnekL
-AEj
-EBEQYO1H
-dAUNtJ3
-LJMqXNtRg5
-9IwZ
-trsb
-ct6kCu
-3ov
-ri6h
-ConnectionAbortedErrorB8b
-L12O
-ysGEtrq
-kdbQd
-6Sw2Tde
-skfn4artO
-8xYtEGEB3
-RT9hhR
-cXbE0
-dc9i70j
-bLpJwi4M
-pbUxoVaZ
-445fP3K9
-ZE8AVtXM17
-NpdcS69U
-LFoD8
-DqyXZ
-fhiLK9
-nas80xByN
-BedNF4
-JjXig
-YbC
-jMR9FJg
-h2gyU41
-9ZW
-PpDQ
-mHMQi
-qoJ
-0lmliK4
-7XbpIj
-yYmHpvDH
-PUII
-84EyY
-xKFaVyers
-4yoMlm5m
-qpu
-nextcLoET04d
-jaAR
-zhpK7DeEW
-yhEeKrRzU
-P6rMipJDw
-DbY9st
-v903lEEc3q
-rZO9Ch7
-JLAgAEscY3
-gRZd
-PQp
-CqRAu
-zOT0KE1J
-BDIW4NnIFG
-DuGAtjvD
-EKXq
-KxNvgSY
-gv0rK
-ue3Bik
-JR2ZYp6
-DE3v
-iA9M
-eSwUoORM
-R40NRHoRC
-QswOUuz5CE
-1fkY
-d24Sl4
-JlT
-CSDIF6
-Lw4hVUVN
-ecjMjl0OUM
-Mro01d06jv
-1Sa
-rLBLz6
-Nanacym
-Jkjczz
-thkP
-bRFNc
-0x5P
-U0GQkvR2F
-1DgJJkQ
-nHl6W1HG
-ESI2a
-h0PKxE
-i0NVvKTI
-QtiYh0By6
-ConnectionRefusedError9rom3s
-JHtpHlj
-pJxnTxKLSI
-HVgZX
-MazsHUs
-qglU0P
-f1b4QeMj0i
-o9iaA
-9Lkub
-jh2m
-6Y52w64Z
-nextRqU8
-OSOMx
-J1IFix9ee
-2fOXw0ymCF
-0Yg8r
+import pygame
+from datetime import date
+from .BasePage import BasePage
+from ..scripts.assets import images
+from ..scripts.clubs import club_registry
+from ..scripts.gen_schedule import SEASON_START
+from ..scripts.player_search import open_player_search, player_index
+from ..scripts.player_store import open_base_store, open_save_players
+from ..scripts.save_db import open_save_db
+from ..scripts.save_service import saves, save_path, CONFIG_PATH
+
+BACKGROUND = "data/assets/images/stadium_3.jpg"
+ROW_HEIGHT = 30
+
+# Each filter button cycles through its choices: (label, filter value).
+POSITIONS = [("Any", None), ("Goalkeeper", "Goalkeeper"), ("Defender", "Defender"),
+             ("Midfield", "Midfield"), ("Attack", "Attack")]
+AGES = [("Any", None), ("21 and under", (None, 21)), ("22-25", (22, 25)), ("26-29", (26, 29)), ("30+", (30, None))]
+RATINGS = [("Any", None), ("60+", (60, None)), ("70+", (70, None)), ("75+", (75, None)),
+           ("80+", (80, None)), ("85+", (85, None))]
+VALUES = [("Any", None), ("Up to 1m", (None, 1000000)), ("Up to 5m", (None, 5000000)),
+          ("Up to 20m", (None, 20000000)), ("Up to 50m", (None, 50000000))]
+FEET = [("Any", None), ("Left", "left"), ("Right", "right"), ("Both", "both")]
+# (label, column, descending)
+SORTS = [("OVR", "OVR", True), ("Value", "market_value_in_eur", True), ("Youngest", "age", False),
+         ("Pace", "PAC", True), ("Shooting", "SHO", True), ("Passing", "PAS", True), ("Dribbling", "DRI", True),
+         ("Defending", "DEF", True), ("Physical", "PHY", True), ("Contract", "contract_expiration_date", False)]
+# Table columns and their relative widths; sorting by a face stat adds its
+# column after OVR.
+TABLE_COLUMNS = [("Name", 3), ("Position", 2), ("Age", 0.7), ("OVR", 0.7), ("Value", 1), ("Club", 2.5), ("Contract", 1)]
+STAT_COLUMNS = {"PAC", "SHO", "PAS", "DRI", "DEF", "PHY"}
+INDEXED_COLUMNS = ["position", "date_of_birth", "OVR", "market_value_in_eur", "foot", "country_of_birth",
+                   "current_club_id"]
+
+
+def format_money(money):
+    if money >= 1000000:
+        return f"{money / 1000000:g}m"
+    if money >= 1000:
+        return f"{money // 1000}k"
+    return str(money)
+
+
+class MarketPage(BasePage):
+    next_pages = ("dashboard",)
+
+    @classmethod
+    def preload_tasks(cls, screen):
+        return [
+            lambda: images.prefetch(BACKGROUND, screen.get_size(), alpha=False),
+            cls.preload_indexes,
+        ]
+
+    @classmethod
+    def preload_indexes(cls):
+        index = player_index(open_base_store())
+        for name in INDEXED_COLUMNS:
+            index.column(name)
+
+    def __init__(self, screen):
+        super().__init__(screen)
+        self.font = self.load_font(24)
+        self.small_font = self.load_font(16)
+        self.background = images.get(BACKGROUND, screen.get_size(), alpha=False)
+        self.registry = club_registry()
+
+        width, height = screen.get_size()
+        button_width = (width - 100 - 3 * 10) // 4
+        self.filter_buttons = {}
+        for i, name in enumerate(["position", "age", "rating", "value", "foot", "nationality", "sort"]):
+            row, column = divmod(i, 4)
+            self.filter_buttons[name] = pygame.Rect(50 + column * (button_width + 10), 80 + row * 50, button_width, 40)
+        self.table_rect = pygame.Rect(50, 190, width - 100, height - 190 - 80)
+        self.page_size = max(5, (self.table_rect.height - 50) // ROW_HEIGHT)
+        self.prev_button = pygame.Rect(50, height - 65, 120, 40)
+        self.next_button = pygame.Rect(180, height - 65, 120, 40)
+        self.buy_button = pygame.Rect(width - 310, height - 65, 120, 40)
+        self.back_button = pygame.Rect(width - 180, height - 65, 130, 40)
+
+        self.choices = {
+            "position": POSITIONS, "age": AGES, "rating": RATINGS, "value": VALUES, "foot": FEET,
+            "nationality": [("Any", None)],
+            "sort": [(label, (column, descending)) for label, column, descending in SORTS],
+        }
+        self.selection = {name: 0 for name in self.choices}
+
+        self.save_num = None
+        self.save_file = ""
+        self.club_id = None
+        self.money = 0
+        self.date = date.fromisoformat(SEASON_START)
+        self.search = None
+        self.page = None
+        self.offset = 0
+        self.selected = None
+        self.status = ""
+
+        self.set_backdrop(self.background, 160)
+        self.add_panel("header", (50, 20, width - 100, 50), self.draw_header)
+        self.add_panel("filters", self.filter_buttons["position"].unionall(list(self.filter_buttons.values())),
+                       self.draw_filters)
+        self.add_panel("table", self.table_rect, self.draw_table)
+        self.add_panel("footer", (50, height - 65, width - 100, 40), self.draw_footer)
+
+    def on_enter(self):
+        super().on_enter()
+        self.save_num = saves.read(CONFIG_PATH)["current_save"]
+        self.save_file = save_path(self.save_num)
+        data = saves.read(self.save_file)
+        self.club_id = data["club_id"]
+        self.money = data.get("money", 0)
+        if data.get("date"):
+            self.date = date.fromisoformat(str(data["date"])[:10])
+
+        self.search = open_player_search(self.save_num)
+        countries = sorted(self.search.values("country_of_birth"))
+        self.choices["nationality"] = [("Any", None)] + [(country, country) for country in countries]
+        self.selected = None
+        self.status = ""
+        self.run_query()
+        self.invalidate()
+
+    def filters(self):
+        return {
+            "position": self.choice("position"),
+            "age": self.choice("age"),
+            "OVR": self.choice("rating"),
+            "market_value_in_eur": self.choice("value"),
+            "foot": self.choice("foot"),
+            "country_of_birth": self.choice("nationality"),
+        }
+
+    def choice(self, name):
+        return self.choices[name][self.selection[name]][1]
+
+    def run_query(self):
+        sort, descending = self.choice("sort")
+        self.page = self.search.query(self.filters(), sort=sort, descending=descending, offset=self.offset,
+                                      limit=self.page_size, today=self.date, exclude_club=self.club_id)
+        self.invalidate("table", "footer")
+
+    def cycle(self, name, step):
+        self.selection[name] = (self.selection[name] + step) % len(self.choices[name])
+        self.offset = 0
+        self.selected = None
+        self.invalidate("filters")
+        self.run_query()
+
+    def turn_page(self, step):
+        offset = self.offset + step * self.page_size
+        if 0 <= offset < self.page.total:
+            self.offset = offset
+            self.selected = None
+            self.run_query()
+
+    def buy(self):
+        if self.selected is None:
+            return
+        player = self.selected
+        fee = player["market_value_in_eur"] or 0
+        if fee > self.money:
+            self.status = f"Not enough money for {player['name']}"
+            self.invalidate("footer")
+            return
+
+        seller = player["current_club_id"]
+        players = open_save_players(self.save_num)
+        db = open_save_db(self.save_num)
+        with db.transaction():
+            players.transfer(player["player_id"], self.club_id)
+            db.adjust_balance(self.club_id, -fee, self.date, f"Signed {player['name']}")
+            if seller is not None:
+                db.adjust_balance(seller, fee, self.date, f"Sold {player['name']}")
+        self.money -= fee
+
+        self.status = f"Signed {player['name']} for €{format_money(fee)}"
+        self.selected = None
+        self.invalidate("header")
+        self.run_query()
+
+    def handle_events(self, events):
+        for event in events:
+            if event.type == pygame.QUIT:
+                self.quit()
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button in (1, 3):
+                step = 1 if event.button == 1 else -1
+                for name, rect in self.filter_buttons.items():
+                    if rect.collidepoint(event.pos):
+                        self.cycle(name, step)
+                if self.prev_button.collidepoint(event.pos):
+                    self.turn_page(-1)
+                elif self.next_button.collidepoint(event.pos):
+                    self.turn_page(1)
+                elif self.buy_button.collidepoint(event.pos):
+                    self.buy()
+                elif self.back_button.collidepoint(event.pos):
+                    return "dashboard"
+                elif self.table_rect.collidepoint(event.pos):
+                    row = (event.pos[1] - self.table_rect.y - 50) // ROW_HEIGHT
+                    if event.pos[1] >= self.table_rect.y + 50 and row < len(self.page.players):
+                        self.selected = self.page.players[row]
+                        self.status = ""
+                        self.invalidate("table", "footer")
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                return "dashboard"
+        return None
+
+    def draw_button(self, surface, rect, label):
+        pygame.draw.rect(surface, (60, 60, 60), rect, border_radius=10)
+        text = self.render_text(self.small_font, label, (255, 255, 255))
+        surface.blit(text, text.get_rect(center=rect.center))
+
+    def draw_header(self, surface):
+        title = self.render_text(self.font, "Transfer Market", (255, 255, 255))
+        surface.blit(title, (0, 10))
+        money = self.render_text(self.font, f"€{format_money(self.money)}", (0, 255, 0))
+        surface.blit(money, (surface.get_width() - money.get_width(), 10))
+
+    def draw_filters(self, surface):
+        origin = self.panels["filters"].rect.topleft
+        for name, rect in self.filter_buttons.items():
+            label = self.choices[name][self.selection[name]][0]
+            self.draw_button(surface, rect.move(-origin[0], -origin[1]), f"{name.title()}: {label}")
+
+    def columns(self, width):
+        columns = list(TABLE_COLUMNS)
+        sort = self.choice("sort")[0]
+        if sort in STAT_COLUMNS:
+            columns.insert(4, (sort, 0.7))
+        scale = width / sum(weight for _, weight in columns)
+        positions = []
+        x = 0
+        for label, weight in columns:
+            positions.append((label, x))
+            x += weight * scale
+        return positions
+
+    def cell(self, player, label):
+        if label == "Name":
+            return player["name"]
+        if label == "Position":
+            return player["sub_position"] or player["position"]
+        if label == "Age":
+            return player["age"]
+        if label == "OVR":
+            return player["OVR"] if player["OVR"] is not None else player["overall"]
+        if label == "Value":
+            return f"€{format_money(player['market_value_in_eur'] or 0)}"
+        if label == "Club":
+            club_id = player["current_club_id"]
+            return "-" if club_id is None else self.registry.name(club_id)
+        if label == "Contract":
+            expires = player["contract_expiration_date"]
+            return "-" if expires is None else expires.year
+        return player.get(label)
+
+    def draw_table(self, surface):
+        pygame.draw.rect(surface, (40, 40, 40, 230), surface.get_rect(), border_radius=10)
+        columns = self.columns(surface.get_width() - 40)
+        for label, x in columns:
+            text = self.render_text(self.small_font, label, (180, 180, 180))
+            surface.blit(text, (20 + x, 15))
+
+        for i, player in enumerate(self.page.players):
+            y = 50 + i * ROW_HEIGHT
+            if self.selected is not None and player["player_id"] == self.selected["player_id"]:
+                pygame.draw.rect(surface, (70, 90, 70), (10, y - 3, surface.get_width() - 20, ROW_HEIGHT - 2),
+                                 border_radius=5)
+            for label, x in columns:
+                value = self.cell(player, label)
+                text = self.render_text(self.small_font, "-" if value is None else value, (255, 255, 255))
+                surface.blit(text, (20 + x, y))
+
+        if not self.page.players:
+            text = self.render_text(self.font, "No players match these filters", (200, 200, 200))
+            surface.blit(text, text.get_rect(center=surface.get_rect().center))
+
+    def draw_footer(self, surface):
+        origin = self.panels["footer"].rect.topleft
+        self.draw_button(surface, self.prev_button.move(-origin[0], -origin[1]), "< Prev")
+        self.draw_button(surface, self.next_button.move(-origin[0], -origin[1]), "Next >")
+        self.draw_button(surface, self.buy_button.move(-origin[0], -origin[1]), "Buy")
+        self.draw_button(surface, self.back_button.move(-origin[0], -origin[1]), "Dashboard")
+
+        pages = max(1, -(-self.page.total // self.page_size))
+        info = f"Page {self.offset // self.page_size + 1} of {pages}  ({self.page.total} players)"
+        if self.status:
+            info = self.status
+        elif self.selected is not None:
+            info = f"{self.selected['name']}: €{format_money(self.selected['market_value_in_eur'] or 0)}"
+        text = self.render_text(self.small_font, info, (255, 255, 255))
+        surface.blit(text, (self.next_button.right - origin[0] + 20, 10))
@@ -1,17 +1,21 @@
 import pygame
 from .BasePage import BasePage
-import json
+from ..scripts.assets import images
+from ..scripts.save_service import saves, CONFIG_PATH
 
 class MenuPage(BasePage):
+    next_pages = ("save_selector",)
+
+    @classmethod
+    def preload_tasks(cls, screen):
+        return [lambda: images.prefetch("data/assets/images/launch_bg.png", screen.get_size(), alpha=False)]
+
     def __init__(self, screen):
         super().__init__(screen)
-        self.font = pygame.font.Font(pygame.font.get_default_font(), 28)
-        self.background = pygame.image.load("data/assets/images/launch_bg.png")
-        self.background = pygame.transform.scale(
-            self.background, (screen.get_width(), screen.get_height())
-        )
+        self.font = self.load_font(28)
+        self.background = images.get("data/assets/images/launch_bg.png", screen.get_size(), alpha=False)
         self.button_text = "Press any Button to Continue"
-        text_surface = self.font.render(self.button_text, True, (255, 255, 255))
+        text_surface = self.render_text(self.font, self.button_text, (255, 255, 255))
         self.button_padding = 30
         self.button_width = text_surface.get_width() + self.button_padding * 2
         self.button_height = text_surface.get_height() + self.button_padding
@@ -20,42 +24,23 @@ class MenuPage(BasePage):
         self.screen_width = screen.get_width()
         self.screen_height = screen.get_height()
 
-        with open("data/assets/config.json", "r+") as f:
-            data = json.load(f)
-            data["current_save"] = None
-            f.seek(0)
-            json.dump(data, f, indent=4)
-            f.truncate()
+        self.set_backdrop(self.background, 175)
+        self.add_panel("button", (self.button_x, self.button_y, self.button_width, self.button_height), self.draw_button)
 
-    def create_button_surface(self, width, height, border_radius):
-        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+    def on_enter(self):
+        super().on_enter()
+        saves.update(CONFIG_PATH, current_save=None)
 
-        pygame.draw.rect(surface, (50, 50, 50), (0, 0, width, height), border_radius=border_radius)
+    def draw_button(self, surface):
+        width, height = surface.get_size()
+        pygame.draw.rect(surface, (50, 50, 50), (0, 0, width, height), border_radius=20)
 
-        return surface
+        text = self.render_text(self.font, self.button_text, (255, 255, 255))
+        surface.blit(text, text.get_rect(center=(width // 2, height // 2)))
 
     def handle_events(self, events):
         for event in events:
             if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
+                self.quit()
             elif event.type == pygame.KEYDOWN or event.type == pygame.MOUSEBUTTONDOWN:
                 return "save_selector"
-
-    def render(self):
-        self.screen.blit(self.background, (0, 0))
-        overlay = pygame.Surface(self.screen.get_size())
-        overlay.fill((0, 0, 0))
-        overlay.set_alpha(175)
-        self.screen.blit(overlay, (0, 0))
-
-        button_rect = pygame.Rect(self.button_x, self.button_y,
-                                self.button_width, self.button_height)
-        button_surface = self.create_button_surface(self.button_width, self.button_height, 20)
-        self.screen.blit(button_surface, (self.button_x, self.button_y))
-
-        text = self.font.render(self.button_text, True, (255, 255, 255))
-        text_rect = text.get_rect(center=button_rect.center)
-        self.screen.blit(text, text_rect)
-
-        pygame.display.flip()
\ No newline at end of file
@@ -0,0 +1,322 @@
+import hashlib
+import json
+import os
+import struct
+import threading
+from collections import OrderedDict
+import pygame
+
+DEFAULT_BUDGET = 128 * 1024 * 1024
+DEFAULT_TEXT_ENTRIES = 1024
+BUILD_DIR = "data/assets/build"
+MANIFEST_PATH = "data/assets/build/manifest.json"
+MANIFEST_VERSION = 1
+SCALED_CACHE_DIR = "data/assets/cache/scaled"
+SCALED_FORMAT_VERSION = 1
+# magic, version, width, height, source size, source mtime, source sha1
+SCALED_HEADER = struct.Struct("<4sHHHQQ20s")
+
+
+def source_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).digest()
+
+
+class AssetManifest:
+    # Maps source images to the right-sized copies written by build_assets.
+    # A source whose contents no longer match its entry was edited since the
+    # last build and is loaded directly instead.
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = path
+        self.images = None
+        self.checked = {}
+        self.dirty = False
+        # Scenes and the prefetch thread resolve paths at the same time.
+        self.lock = threading.Lock()
+
+    def load(self):
+        if self.images is None:
+            self.images = {}
+            if os.path.exists(self.path):
+                with open(self.path, "r") as f:
+                    data = json.load(f)
+                if data.get("version") == MANIFEST_VERSION:
+                    self.images = data["images"]
+        return self.images
+
+    def resolve(self, path):
+        # Returns the file to load and whether it can have transparency.
+        with self.lock:
+            resolved = self.checked.get(path)
+            if resolved is None:
+                entry = self.load().get(path)
+                resolved = (path, True)
+                if entry is not None and os.path.exists(entry["build"]) and self.current(path, entry):
+                    resolved = (entry["build"], entry["alpha"])
+                self.checked[path] = resolved
+            return resolved
+
+    def current(self, path, entry):
+        # An unchanged size and mtime means the source is the one built;
+        # otherwise the hash decides, and a source that was only touched
+        # gets its new mtime recorded (written by flush()) so the next start
+        # skips the hash.
+        try:
+            stat = os.stat(path)
+        except OSError:
+            # A packaged install may ship the build without its sources.
+            return True
+        if (stat.st_size, stat.st_mtime_ns) == (entry["source_bytes"], entry.get("source_mtime")):
+            return True
+        if stat.st_size != entry["source_bytes"] or source_hash(path).hex() != entry["hash"]:
+            return False
+        entry["source_mtime"] = stat.st_mtime_ns
+        self.dirty = True
+        return True
+
+    def flush(self):
+        from .build_assets import save_manifest
+
+        with self.lock:
+            if not self.dirty:
+                return
+            self.dirty = False
+            try:
+                save_manifest(self.images, self.path)
+            except OSError:
+                pass
+
+
+class ScaledImageCache:
+    # Opaque backgrounds scaled to the display size, stored as raw RGB so a
+    # hit is one read and no decode or resample.
+    def __init__(self, directory=SCALED_CACHE_DIR):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    def cache_path(self, path, size):
+        name = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:16]
+        return os.path.join(self.directory, f"{name}_{size[0]}x{size[1]}.rgb")
+
+    def load(self, path, size):
+        cache_path = self.cache_path(path, size)
+        try:
+            with open(cache_path, "rb") as f:
+                data = f.read()
+            magic, version, width, height, source_size, source_mtime, digest = SCALED_HEADER.unpack_from(data)
+        except (OSError, struct.error):
+            return None
+        if magic != b"FMSC" or version != SCALED_FORMAT_VERSION or (width, height) != tuple(size):
+            return None
+        if len(data) != SCALED_HEADER.size + width * height * 3:
+            return None
+
+        # An unchanged size and mtime means the source is the one hashed;
+        # otherwise the hash decides, so a touched file doesn't force a rebuild.
+        stat = os.stat(path)
+        if (stat.st_size, stat.st_mtime_ns) != (source_size, source_mtime):
+            if source_hash(path) != digest:
+                return None
+            # Same contents under a new mtime (a checkout or touch): record
+            # it so later loads skip the hash again.
+            self.restamp(cache_path, width, height, stat, digest)
+        self.hits += 1
+        return pygame.image.frombuffer(memoryview(data)[SCALED_HEADER.size:], (width, height), "RGB")
+
+    def restamp(self, cache_path, width, height, stat, digest):
+        header = SCALED_HEADER.pack(b"FMSC", SCALED_FORMAT_VERSION, width, height, stat.st_size,
+                                    stat.st_mtime_ns, digest)
+        try:
+            with open(cache_path, "r+b") as f:
+                f.write(header)
+        except OSError:
+            pass
+
+    def store(self, path, size, surface):
+        stat = os.stat(path)
+        header = SCALED_HEADER.pack(b"FMSC", SCALED_FORMAT_VERSION, size[0], size[1], stat.st_size,
+                                    stat.st_mtime_ns, source_hash(path))
+        cache_path = self.cache_path(path, size)
+        # Prefetch threads may build the same entry at once, so each writes
+        # its own temp file before the rename.
+        temp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temp_path, "wb") as f:
+                f.write(header)
+                f.write(pygame.image.tobytes(surface, "RGB"))
+            os.replace(temp_path, cache_path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def decode(self, path, size):
+        surface = self.load(path, size)
+        if surface is None:
+            self.misses += 1
+            surface = pygame.image.load(path)
+            if surface.get_size() != tuple(size):
+                surface = pygame.transform.scale(surface, size)
+            self.store(path, size, surface)
+        return surface
+
+    def clear(self):
+        if os.path.isdir(self.directory):
+            for filename in os.listdir(self.directory):
+                os.remove(os.path.join(self.directory, filename))
+
+
+class ImageCache:
+    def __init__(self, budget=DEFAULT_BUDGET):
+        self.budget = budget
+        self.surfaces = OrderedDict()
+        self.sizes = {}
+        self.prefetched = OrderedDict()
+        self.lock = threading.Lock()
+        self.scaled = ScaledImageCache()
+        self.manifest = AssetManifest()
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path, size=None, alpha=True):
+        key = (path, tuple(size) if size else None, alpha)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        with self.lock:
+            surface = self.prefetched.pop(key, None)
+        if surface is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            surface = self.decode(path, size, alpha)
+        surface = self.finish(surface, alpha and self.manifest.resolve(path)[1])
+        self.store(key, surface)
+        return surface
+
+    def prefetch(self, path, size=None, alpha=True):
+        # Safe to call from a worker thread: only decodes and scales, the
+        # display-dependent convert happens in get() on the main thread.
+        key = (path, tuple(size) if size else None, alpha)
+        with self.lock:
+            if key in self.surfaces or key in self.prefetched:
+                return
+        surface = self.decode(path, size, alpha)
+        with self.lock:
+            self.prefetched[key] = surface
+            while sum(map(self.byte_size, self.prefetched.values())) > self.budget // 2:
+                self.prefetched.popitem(last=False)
+
+    def decode(self, path, size, alpha=True):
+        path = self.manifest.resolve(path)[0]
+        if size and not alpha:
+            return self.scaled.decode(path, size)
+        surface = pygame.image.load(path)
+        if size and surface.get_size() != tuple(size):
+            surface = pygame.transform.scale(surface, size)
+        return surface
+
+    def finish(self, surface, alpha):
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha() if alpha else surface.convert()
+        return surface
+
+    def byte_size(self, surface):
+        return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+    def store(self, key, surface):
+        size = self.byte_size(surface)
+        while self.surfaces and self.used + size > self.budget:
+            old_key, _ = self.surfaces.popitem(last=False)
+            self.used -= self.sizes.pop(old_key)
+            self.evictions += 1
+        self.surfaces[key] = surface
+        self.sizes[key] = size
+        self.used += size
+
+    def set_budget(self, budget):
+        self.budget = budget
+        while self.surfaces and self.used > self.budget:
+            old_key, _ = self.surfaces.popitem(last=False)
+            self.used -= self.sizes.pop(old_key)
+            self.evictions += 1
+
+    def flush(self):
+        self.manifest.flush()
+
+    def clear(self):
+        self.surfaces.clear()
+        self.sizes.clear()
+        with self.lock:
+            self.prefetched.clear()
+        self.used = 0
+
+    def stats(self):
+        return {
+            "entries": len(self.surfaces),
+            "bytes": self.used,
+            "budget": self.budget,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "scaled_hits": self.scaled.hits,
+            "scaled_misses": self.scaled.misses,
+        }
+
+
+class TextCache:
+    def __init__(self, max_entries=DEFAULT_TEXT_ENTRIES):
+        self.max_entries = max_entries
+        self.fonts = {}
+        self.font_keys = {}
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def font(self, size, name=None):
+        key = (name or pygame.font.get_default_font(), size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = pygame.font.Font(key[0], size)
+            self.fonts[key] = font
+            self.font_keys[font] = key
+        return font
+
+    def render(self, font, text, color, antialias=True):
+        key = (self.font_keys.get(font, font), text, tuple(color), antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+    def stats(self):
+        return {
+            "entries": len(self.surfaces),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+images = ImageCache()
+text = TextCache()
@@ -0,0 +1,168 @@
+import fnmatch
+import hashlib
+import json
+import os
+import shutil
+import sys
+import pygame
+from .assets import BUILD_DIR, MANIFEST_PATH, MANIFEST_VERSION
+from .palette import PALETTE_PATH, build_palette
+
+ASSET_ROOT = "data/assets"
+SOURCE_DIRS = ["data/assets/images", "data/assets/icons"]
+SOURCE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+JPEG_QUALITY = 88
+
+# The largest display the backgrounds are built for; the game still scales
+# them to the actual screen at load time.
+MAX_DISPLAY = (2560, 1440)
+
+# Largest size each kind of image is ever drawn at, first match wins.
+DRAW_SIZES = [
+    ("data/assets/images/clubs/logos/*", (200, 200)),
+    ("data/assets/icons/*", (50, 50)),
+    ("data/assets/images/clubs/backgrounds/*", MAX_DISPLAY),
+    ("data/assets/images/*", MAX_DISPLAY),
+]
+
+
+def draw_size(path):
+    for pattern, size in DRAW_SIZES:
+        if fnmatch.fnmatch(path, pattern):
+            return size
+    return None
+
+
+def file_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def source_paths():
+    paths = []
+    for directory in SOURCE_DIRS:
+        for root, _, filenames in os.walk(directory):
+            for filename in filenames:
+                if filename.lower().endswith(SOURCE_EXTENSIONS):
+                    paths.append(os.path.join(root, filename).replace(os.sep, "/"))
+    return sorted(paths)
+
+
+def fit(size, limit):
+    # Downsample only, keeping the aspect ratio.
+    scale = min(limit[0] / size[0], limit[1] / size[1], 1)
+    return max(1, round(size[0] * scale)), max(1, round(size[1] * scale))
+
+
+def has_alpha(surface):
+    if not surface.get_flags() & pygame.SRCALPHA:
+        return False
+    return int(pygame.surfarray.pixels_alpha(surface).min()) < 255
+
+
+def save_image(surface, path, alpha):
+    # Pillow compresses far better than pygame's encoder. Like colorthief for
+    # the palette, it is only needed here, never by the game.
+    from PIL import Image
+
+    mode = "RGBA" if alpha else "RGB"
+    image = Image.frombytes(mode, surface.get_size(), pygame.image.tobytes(surface, mode))
+    if alpha:
+        image.save(path, optimize=True)
+    else:
+        image.save(path, quality=JPEG_QUALITY, optimize=True)
+
+
+def build_path(path, alpha):
+    # Opaque images become JPEGs and images with transparency stay PNGs,
+    # so photos shrink and logos keep their edges.
+    stem = os.path.splitext(os.path.relpath(path, ASSET_ROOT))[0]
+    return os.path.join(BUILD_DIR, stem + (".png" if alpha else ".jpg")).replace(os.sep, "/")
+
+
+def build_image(path):
+    # convert_alpha() turns colour keys and palette transparency into real
+    # alpha, so has_alpha() sees every kind of transparency.
+    source = pygame.image.load(path).convert_alpha()
+    alpha = has_alpha(source)
+    if not alpha:
+        source = source.convert()
+
+    limit = draw_size(path)
+    size = fit(source.get_size(), limit) if limit else source.get_size()
+    surface = pygame.transform.smoothscale(source, size) if size != source.get_size() else source
+
+    output = build_path(path, alpha)
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    save_image(surface, output, alpha)
+    # Small palette PNGs (most logos) can beat the re-encode even at a
+    # larger size; the source is then shipped as is and scaled at load.
+    if os.path.splitext(path)[1] == os.path.splitext(output)[1] and os.path.getsize(path) < os.path.getsize(output):
+        shutil.copyfile(path, output)
+        size = source.get_size()
+    return {
+        "build": output,
+        "size": list(size),
+        "alpha": alpha,
+        "hash": file_hash(path),
+        "source_bytes": os.path.getsize(path),
+        "source_mtime": os.stat(path).st_mtime_ns,
+    }
+
+
+def load_manifest(path=MANIFEST_PATH):
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            data = json.load(f)
+        if data.get("version") == MANIFEST_VERSION:
+            return data["images"]
+    return {}
+
+
+def save_manifest(images, path=MANIFEST_PATH):
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as f:
+        # One line per image, so two builds' manifests can be diffed.
+        rows = [f"{json.dumps(source)}: {json.dumps(images[source], sort_keys=True)}" for source in sorted(images)]
+        f.write(f'{{"version": {MANIFEST_VERSION}, "images": {{\n' + ",\n".join(rows) + "\n}}\n")
+    os.replace(temp_path, path)
+
+
+def build_assets(force=False):
+    # Only sources whose hash changed are rebuilt; outputs whose source is
+    # gone are removed along with their manifest entries.
+    images = load_manifest()
+    sources = source_paths()
+    built = 0
+    for path in sources:
+        entry = images.get(path)
+        if force or entry is None or entry["hash"] != file_hash(path) or not os.path.exists(entry["build"]):
+            if entry is not None and os.path.exists(entry["build"]):
+                os.remove(entry["build"])
+            images[path] = build_image(path)
+            built += 1
+        else:
+            entry["source_mtime"] = os.stat(path).st_mtime_ns
+    for path in set(images) - set(sources):
+        if os.path.exists(images[path]["build"]):
+            os.remove(images[path]["build"])
+        del images[path]
+    save_manifest(images)
+    return built, images
+
+
+if __name__ == "__main__":
+    # Converting to the display format needs a (hidden) display.
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    force = "--force" in sys.argv[1:]
+    built, images = build_assets(force=force)
+    # The game only reads the palette table; new or changed logos get their
+    # colours here.
+    colors = build_palette(force=force)
+    source_bytes = sum(entry["source_bytes"] for entry in images.values())
+    build_bytes = sum(os.path.getsize(entry["build"]) for entry in images.values())
+    print(f"{built} of {len(images)} images rebuilt into {BUILD_DIR}: "
+          f"{source_bytes / 1e6:.1f} MB of sources -> {build_bytes / 1e6:.1f} MB")
+    print(f"{colors} palette entries updated in {PALETTE_PATH}")
@@ -0,0 +1,117 @@
+import csv
+import os
+import threading
+from typing import NamedTuple
+
+CLUBS_PATH = "data/assets/clubs.csv"
+LEAGUES_PATH = "data/assets/leagues.csv"
+LOGO_DIR = "data/assets/images/clubs/logos"
+BACKGROUND_DIR = "data/assets/images/clubs/backgrounds"
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+class Club(NamedTuple):
+    club_id: str
+    club_name: str
+    league_code: str
+    stadium_name: str
+    stadium_capacity: int
+    budget: int
+
+
+class League(NamedTuple):
+    league_code: str
+    league_name: str
+    country_name: str
+    country_code: str
+
+
+def to_int(value):
+    return int(value) if value else 0
+
+
+def image_ids(directory, prefix):
+    # One directory listing up front, so "does this club have a logo" is a
+    # set lookup rather than a stat per frame.
+    ids = {}
+    if os.path.isdir(directory):
+        for filename in os.listdir(directory):
+            stem = os.path.splitext(filename)[0]
+            if stem.startswith(prefix):
+                ids.setdefault(stem[len(prefix):], os.path.join(directory, filename))
+    return ids
+
+
+class ClubRegistry:
+    def __init__(self, clubs, leagues, logos=None, backgrounds=None):
+        self.clubs = {club.club_id: club for club in clubs}
+        self.leagues = {league.league_code: league for league in leagues}
+        self.logos = logos or {}
+        self.backgrounds = backgrounds or {}
+
+        self.league_index = {code: [] for code in self.leagues}
+        for club in clubs:
+            self.league_index.setdefault(club.league_code, []).append(club)
+        # Clubs only know their league, so the country comes from the join.
+        self.country_index = {}
+        for club in clubs:
+            league = self.leagues.get(club.league_code)
+            if league is not None:
+                self.country_index.setdefault(league.country_code, []).append(club)
+
+    @classmethod
+    def load(cls, clubs_path=CLUBS_PATH, leagues_path=LEAGUES_PATH):
+        with open(clubs_path, "r", encoding="UTF-8") as f:
+            clubs = [Club(row["club_id"], row["club_name"], row["league_code"], row["stadium_name"],
+                          to_int(row["stadium_capacity"]), to_int(row["budget"]))
+                     for row in csv.DictReader(f)]
+        with open(leagues_path, "r", encoding="UTF-8") as f:
+            leagues = [League(row["league_code"], row["league_name"], row["country_name"], row["country_code"].strip())
+                       for row in csv.DictReader(f)]
+        return cls(clubs, leagues, image_ids(LOGO_DIR, "logo_"), image_ids(BACKGROUND_DIR, "background_"))
+
+    def club(self, club_id):
+        return self.clubs.get(str(club_id))
+
+    def name(self, club_id, default=None):
+        club = self.clubs.get(str(club_id))
+        if club is None:
+            return str(club_id) if default is None else default
+        return club.club_name
+
+    def league(self, league_code):
+        return self.leagues.get(league_code)
+
+    def league_list(self):
+        return list(self.leagues.values())
+
+    def league_clubs(self, league_code):
+        return self.league_index.get(league_code, [])
+
+    def country_clubs(self, country_code):
+        return self.country_index.get(country_code, [])
+
+    def league_club_ids(self):
+        # Only leagues listed in leagues.csv are played.
+        return {code: [club.club_id for club in self.league_index[code]] for code in self.leagues}
+
+    def budgets(self):
+        return {club_id: club.budget for club_id, club in self.clubs.items()}
+
+    def logo_path(self, club_id):
+        return self.logos.get(str(club_id))
+
+    def background_path(self, club_id):
+        return self.backgrounds.get(str(club_id))
+
+
+def club_registry():
+    global _registry
+    if _registry is None:
+        # Scenes, the prefetch thread and the save writer can all ask first.
+        with _registry_lock:
+            if _registry is None:
+                _registry = ClubRegistry.load()
+    return _registry
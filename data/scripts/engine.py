@@ -0,0 +1,188 @@
+import json
+import random
+from bisect import bisect_right
+from functools import lru_cache
+import numpy as np
+from .ratings import ATTACK, MIDFIELD, DEFENCE, KEEPER, DEFAULT_RATINGS
+
+MATCH_MINUTES = 90
+EVENT_TYPES = ["attack", "shot", "shot_on_target", "goal"]
+EVENT_WEIGHTS = [0.4, 0.3, 0.2, 0.1]
+EVENTS_PER_MATCH = (20, 30)
+HOME_ADVANTAGE = 2.0
+RATING_SCALE = 15.0
+
+
+@lru_cache(maxsize=None)
+def load_commentary_data(path="data/assets/commentary.json"):
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+@lru_cache(maxsize=None)
+def commentary_counts():
+    # Commentary lines are picked when the timeline is drawn, so the RNG
+    # stream is the same whether or not the caller shows commentary.
+    return {event_type: {team: len(lines) for team, lines in teams.items()}
+            for event_type, teams in load_commentary_data().items()}
+
+
+def home_share(home, away):
+    # Share of events that belong to the home side, decided in midfield.
+    return 1 / (1 + np.exp(-(home[..., MIDFIELD] - away[..., MIDFIELD] + HOME_ADVANTAGE) / RATING_SCALE))
+
+
+def event_weights(attacking, defending):
+    # EVENT_WEIGHTS for evenly matched sides; attack beating defence makes
+    # shots more likely and attack beating the keeper makes them goals.
+    edge = (attacking[..., ATTACK] - defending[..., DEFENCE]) / RATING_SCALE
+    finishing = (attacking[..., ATTACK] - defending[..., KEEPER]) / RATING_SCALE
+    scale = np.stack([np.ones_like(edge), np.exp(edge / 2), np.exp(edge), np.exp(edge + finishing / 2)], axis=-1)
+    weights = np.array(EVENT_WEIGHTS) * scale
+    return weights / weights.sum(axis=-1, keepdims=True)
+
+
+@lru_cache(maxsize=4096)
+def match_odds(home_ratings, away_ratings):
+    # Cached per pair of rating tuples so bulk simulation pays for the numpy
+    # maths once per fixture pairing, not once per match.
+    home, away = np.array(home_ratings), np.array(away_ratings)
+    share = float(home_share(home, away))
+    home_weights = np.cumsum(event_weights(home, away)).tolist()
+    away_weights = np.cumsum(event_weights(away, home)).tolist()
+    return share, {"home": home_weights, "away": away_weights}
+
+
+class MatchEngine:
+    def __init__(self, home_team="", away_team="", commentary_data=None, seed=None, max_commentary_lines=14,
+                 home_ratings=None, away_ratings=None, events_timeline=None):
+        # Every match owns its RNG stream, so the same seed always plays out
+        # the same match no matter what else has been simulated.
+        self.seed = random.getrandbits(63) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        self.home_team = home_team
+        self.away_team = away_team
+        self.home_ratings = DEFAULT_RATINGS if home_ratings is None else np.asarray(home_ratings)
+        self.away_ratings = DEFAULT_RATINGS if away_ratings is None else np.asarray(away_ratings)
+
+        self.home_score = 0
+        self.away_score = 0
+        self.home_possession = 50
+        self.home_shots = 0
+        self.away_shots = 0
+        self.home_shots_on_target = 0
+        self.away_shots_on_target = 0
+        self.home_xg = 0
+        self.away_xg = 0
+
+        self.commentary_data = commentary_data
+        self.commentary_lines = []
+        self.max_commentary_lines = max_commentary_lines
+
+        self.current_minute = 0
+        self.is_match_running = True
+
+        if events_timeline is None:
+            self.events_per_match = self.rng.randint(*EVENTS_PER_MATCH)
+            events_timeline = self.generate_events_timeline()
+        self.events_per_match = len(events_timeline)
+        self.events_timeline = events_timeline
+        self.current_event_index = 0
+
+    def generate_events_timeline(self):
+        # All of the match's randomness is drawn here; processing an event
+        # only applies it, which is what lets a recorded log be replayed.
+        share, cum_weights = match_odds(tuple(self.home_ratings.tolist()), tuple(self.away_ratings.tolist()))
+        counts = commentary_counts()
+        random_float, randint = self.rng.random, self.rng.randint
+        events = []
+        for _ in range(self.events_per_match):
+            minute = randint(1, MATCH_MINUTES)
+            team = "home" if random_float() < share else "away"
+            weights = cum_weights[team]
+            event_type = EVENT_TYPES[bisect_right(weights, random_float() * weights[-1], 0, len(weights) - 1)]
+
+            possession = round(random_float() * 4 - 2, 1) if team == "home" else 0.0
+            xg = 0.0
+            if event_type != "attack":
+                xg = 0.1 + random_float() * 0.2
+                if event_type == "goal":
+                    xg += 0.3 + random_float() * 0.2
+                xg = round(xg, 3)
+            commentary = int(random_float() * counts[event_type][team])
+            events.append({"minute": minute, "team": team, "type": event_type,
+                           "possession": possession, "xg": xg, "commentary": commentary})
+        return sorted(events, key=lambda x: x["minute"])
+
+    def process_event(self, event):
+        team = event["team"]
+        event_type = event["type"]
+
+        if team == "home":
+            self.home_possession += event["possession"]
+            if event_type in ["shot", "shot_on_target", "goal"]:
+                self.home_shots += 1
+                self.home_xg += event["xg"]
+                if event_type in ["shot_on_target", "goal"]:
+                    self.home_shots_on_target += 1
+                    if event_type == "goal":
+                        self.home_score += 1
+        else:
+            if event_type in ["shot", "shot_on_target", "goal"]:
+                self.away_shots += 1
+                self.away_xg += event["xg"]
+                if event_type in ["shot_on_target", "goal"]:
+                    self.away_shots_on_target += 1
+                    if event_type == "goal":
+                        self.away_score += 1
+
+        if self.commentary_data:
+            lines = self.commentary_data[event_type][team]
+            commentary_text = lines[event["commentary"] % len(lines)]
+            self.commentary_lines.append(f"{event['minute']}' - {commentary_text}")
+            if len(self.commentary_lines) > self.max_commentary_lines:
+                self.commentary_lines.pop(0)
+
+    def advance_to(self, minute):
+        if not self.is_match_running:
+            return []
+
+        minute = min(minute, MATCH_MINUTES)
+        processed = []
+        while (self.current_event_index < len(self.events_timeline) and
+               self.events_timeline[self.current_event_index]["minute"] <= minute):
+            event = self.events_timeline[self.current_event_index]
+            self.process_event(event)
+            processed.append(event)
+            self.current_event_index += 1
+
+        self.current_minute = max(self.current_minute, minute)
+        if self.current_minute >= MATCH_MINUTES:
+            self.is_match_running = False
+        return processed
+
+    def next_event_minute(self, event_types=("goal",)):
+        for event in self.events_timeline[self.current_event_index:]:
+            if event["type"] in event_types:
+                return event["minute"]
+        return None
+
+    def simulate(self):
+        self.advance_to(MATCH_MINUTES)
+        return self.result()
+
+    def result(self):
+        return {
+            "seed": self.seed,
+            "home_team": self.home_team,
+            "away_team": self.away_team,
+            "home_score": self.home_score,
+            "away_score": self.away_score,
+            "home_possession": round(self.home_possession, 1),
+            "home_shots": self.home_shots,
+            "away_shots": self.away_shots,
+            "home_shots_on_target": self.home_shots_on_target,
+            "away_shots_on_target": self.away_shots_on_target,
+            "home_xg": round(self.home_xg, 2),
+            "away_xg": round(self.away_xg, 2),
+        }
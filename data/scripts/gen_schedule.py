@@ -1,45 +1,105 @@
-import csv
 import json
-import random
+from bisect import bisect_right
 from datetime import datetime, timedelta
+from .clubs import club_registry
 
-def schedule(club_id, league_code, save_num):
-    opponents = []
-    with open("data/assets/clubs.csv", mode='r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            if row['league_code'] == league_code and row['club_id'] != club_id:
-                opponents.append(row['club_id'])
-
-    schedule = []
-    start_date = datetime.strptime("2024-09-17", "%Y-%m-%d")
-
-    match_count = len(opponents) * 2
-    match_dates = [start_date + timedelta(days=i * 7) for i in range(match_count)]
-
-    for i, opponent in enumerate(opponents):
-        schedule.append({
-            "home": club_id,
-            "away": opponent,
-            "home_score": "",
-            "away_score": "",
-            "date": match_dates[i].strftime('%Y-%m-%d')
-        })
-        schedule.append({
-            "home": opponent,
-            "away": club_id,
-            "home_score": "",
-            "away_score": "",
-            "date": match_dates[len(opponents) + i].strftime('%Y-%m-%d')
-        })
-
-    dates = [match["date"] for match in schedule]
-    random.shuffle(schedule)
-    for i, match in enumerate(schedule):
-        match["date"] = dates[i]
-
-    schedule.sort(key=lambda x: datetime.strptime(x["date"], "%Y-%m-%d"))
-
-    output_file = f"save{save_num}_schedule.json"
-    with open(f"data/assets/{output_file}", 'w') as f_out:
-        json.dump(schedule, f_out, indent=4)
\ No newline at end of file
+SEASON_START = "2024-09-17"
+DAYS_BETWEEN_ROUNDS = 7
+
+
+def round_robin(club_ids):
+    clubs = list(club_ids)
+    if len(clubs) % 2:
+        clubs.append(None)
+
+    # Circle method: the last club stays fixed while the others rotate, and
+    # home/away alternates by pair so nobody gets long runs at home or away.
+    rotating = len(clubs) - 1
+    rounds = []
+    for r in range(rotating):
+        home, away = clubs[r], clubs[rotating]
+        pairs = [(away, home) if r % 2 else (home, away)]
+        for i in range(1, len(clubs) // 2):
+            home, away = clubs[(r + i) % rotating], clubs[(r - i) % rotating]
+            pairs.append((away, home) if i % 2 == 0 else (home, away))
+        rounds.append([(home, away) for home, away in pairs if home is not None and away is not None])
+
+    second_half = [[(away, home) for home, away in pairs] for pairs in rounds]
+    return rounds + second_half
+
+
+def generate_league_schedules(start_date=SEASON_START, league_clubs=None):
+    if league_clubs is None:
+        league_clubs = club_registry().league_club_ids()
+
+    start = datetime.strptime(start_date, "%Y-%m-%d")
+    fixtures = []
+    for league_code, club_ids in league_clubs.items():
+        for round_num, pairs in enumerate(round_robin(club_ids)):
+            date = (start + timedelta(days=round_num * DAYS_BETWEEN_ROUNDS)).strftime("%Y-%m-%d")
+            for home, away in pairs:
+                fixtures.append({
+                    "home": home,
+                    "away": away,
+                    "home_score": "",
+                    "away_score": "",
+                    "date": date,
+                    "league_code": league_code,
+                })
+    return FixtureCalendar(fixtures)
+
+
+class FixtureCalendar:
+    def __init__(self, fixtures):
+        self.fixtures = sorted(fixtures, key=lambda x: x["date"])
+        self.by_date = {}
+        self.by_club = {}
+        self.club_dates = {}
+
+        for index, fixture in enumerate(self.fixtures):
+            self.by_date.setdefault(fixture["date"], []).append(index)
+            for club_id in (fixture["home"], fixture["away"]):
+                self.by_club.setdefault(club_id, []).append(index)
+                self.club_dates.setdefault(club_id, []).append(fixture["date"])
+
+        self.dates = sorted(self.by_date)
+
+    def fixtures_on(self, date):
+        return [self.fixtures[i] for i in self.by_date.get(date, [])]
+
+    def club_fixtures(self, club_id):
+        return [self.fixtures[i] for i in self.by_club.get(club_id, [])]
+
+    def upcoming(self, club_id, after_date=""):
+        start = bisect_right(self.club_dates.get(club_id, []), str(after_date)[:10])
+        return [self.fixtures[i] for i in self.by_club.get(club_id, [])[start:]]
+
+    def next_fixture(self, club_id, after_date=""):
+        dates = self.club_dates.get(club_id, [])
+        start = bisect_right(dates, str(after_date)[:10])
+        if start < len(dates):
+            return self.fixtures[self.by_club[club_id][start]]
+        return None
+
+    def next_date(self, after_date=""):
+        start = bisect_right(self.dates, str(after_date)[:10])
+        if start < len(self.dates):
+            return self.dates[start]
+        return None
+
+    def to_json(self):
+        return {date: self.fixtures_on(date) for date in self.dates}
+
+    def save(self, path):
+        with open(path, "w") as f_out:
+            json.dump(self.to_json(), f_out)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r") as f:
+            data = json.load(f)
+
+        # Older saves stored only the manager's fixtures as a flat list.
+        if isinstance(data, list):
+            return cls(data)
+        return cls([fixture for fixtures in data.values() for fixture in fixtures])
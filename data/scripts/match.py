@@ -1,162 +1,116 @@
 import pygame
-import json
-import csv
-import random
 from ..scenes.BasePage import BasePage
-from datetime import datetime, timedelta
+from .assets import images
+from .engine import MatchEngine, MATCH_MINUTES, load_commentary_data
+from .match_log import encode_log, replay_engine
+from .sim_clock import SimulationClock
+from .save_db import load_calendar, open_save_db
+from .palette import club_colors
+from .player_store import open_save_players
+from .clubs import club_registry
+from .ratings import team_ratings
+from .save_service import saves, save_path, CONFIG_PATH
+from .transfers import advance_transfers
+
+ICONS = {
+    "pause": "data/assets/icons/pause.png",
+    "play": "data/assets/icons/play.png",
+    "slow": "data/assets/icons/slow.png",
+    "normal": "data/assets/icons/normal.png",
+    "fast": "data/assets/icons/fast.png",
+    "skip": "data/assets/icons/skip.png",
+    "advance": "data/assets/icons/skip.png"
+}
 
 class MatchSimulationPage(BasePage):
-    def __init__(self, screen):
-        super().__init__(screen)
-        self.font = pygame.font.Font(pygame.font.get_default_font(), 28)
-        self.small_font = pygame.font.Font(pygame.font.get_default_font(), 20)
-
-        self.background = pygame.image.load("data/assets/images/stadium_2.jpg")
-        self.background = pygame.transform.scale(
-            self.background, (screen.get_width(), screen.get_height())
-        )
-
-        self.is_paused = False
-        self.speed_multiplier = 1.0
-        self.skip_to_end = False
-
-        self.icons = {
-            "pause": pygame.image.load("data/assets/icons/pause.png"),
-            "play": pygame.image.load("data/assets/icons/play.png"),
-            "slow": pygame.image.load("data/assets/icons/slow.png"),
-            "normal": pygame.image.load("data/assets/icons/normal.png"),
-            "fast": pygame.image.load("data/assets/icons/fast.png"),
-            "skip": pygame.image.load("data/assets/icons/skip.png"),
-            "advance": pygame.image.load("data/assets/icons/skip.png")
-        }
-
-        for key in self.icons:
-            self.icons[key] = pygame.transform.scale(self.icons[key], (24, 24))
+    next_pages = ("dashboard",)
 
-        self.home_score = 0
-        self.away_score = 0
-        self.home_possession = 50
-        self.home_shots = 0
-        self.away_shots = 0
-        self.home_shots_on_target = 0
-        self.away_shots_on_target = 0
-        self.home_xg = 0
-        self.away_xg = 0
+    @classmethod
+    def preload_tasks(cls, screen):
+        tasks = [
+            lambda: images.prefetch("data/assets/images/stadium_2.jpg", screen.get_size(), alpha=False),
+            load_commentary_data,
+        ]
+        tasks += [lambda path=path: images.prefetch(path, (24, 24)) for path in set(ICONS.values())]
+        return tasks
 
-        self.commentary_lines = []
-        self.max_commentary_lines = 14
-        self.commentary_data = self.load_commentary_data()
+    def __init__(self, screen):
+        super().__init__(screen)
+        self.font = self.load_font(28)
+        self.small_font = self.load_font(20)
 
-        self.match_start_time = datetime.now()
-        self.current_minute = 0
-        self.is_match_running = True
+        self.background = images.get("data/assets/images/stadium_2.jpg", screen.get_size(), alpha=False)
 
-        self.events_per_match = random.randint(20, 30)
-        self.events_timeline = self.generate_events_timeline()
-        self.current_event_index = 0
+        self.icons = {key: images.get(path, (24, 24)) for key, path in ICONS.items()}
 
         self.screen_width = screen.get_width()
         self.screen_height = screen.get_height()
 
         self.setup_control_buttons()
+        self.setup_panels()
+
+    def on_enter(self):
+        super().on_enter()
+        self.clock = SimulationClock()
         self.load_match_data()
+        if self.match_data is None:
+            return
+
+        players = open_save_players(self.save_num)
+        self.engine = MatchEngine(self.home_team, self.away_team, load_commentary_data(),
+                                  seed=open_save_db(self.save_num).match_seed(self.match_data["fixture_id"]),
+                                  home_ratings=team_ratings(players, self.match_data["home"]),
+                                  away_ratings=team_ratings(players, self.match_data["away"]))
+        self.clock.start()
+        self.result_recorded = False
+        self.replaying = False
+        self.invalidate()
+
+    def start_replay(self, fixture_id=None):
+        # Plays a recorded match back from its event log; nothing is
+        # simulated and nothing is written back to the save.
+        fixture_id = self.match_data["fixture_id"] if fixture_id is None else fixture_id
+        log = open_save_db(self.save_num).match_log(fixture_id)
+        if log is None:
+            return False
+        self.engine = replay_engine(log, self.home_team, self.away_team, load_commentary_data())
+        self.clock.start()
+        self.result_recorded = True
+        self.replaying = True
+        self.invalidate()
+        return True
 
     def load_match_data(self):
-        with open('data/assets/config.json', 'r') as file:
-            config = json.load(file)
-            self.save_num = config['current_save']
-
-        with open(f"data/assets/save{self.save_num}_schedule.json", 'r+') as file:
-            self.match_data = json.load(file)
-            data = self.match_data
-            if data:
-                data.pop(0)
-            file.seek(0)
-            json.dump(data, file, indent=4)
-            file.truncate()
-            self.match_data = self.match_data[0]
-
-        with open(f"data/assets/save{self.save_num}.json", 'r+') as file:
-            data = json.load(file)
-            data["date"] = self.match_data["date"]
-            file.seek(0)
-            json.dump(data, file, indent=4)
-            file.truncate()
-
-        with open("data/assets/clubs.csv", "r", encoding="UTF-8") as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                if self.match_data["home"] == row["club_id"]:
-                    self.home_team = row["club_name"]
-                if self.match_data["away"] == row["club_id"]:
-                    self.away_team = row["club_name"]
-
-    def load_commentary_data(self):
-        with open('data/assets/commentary.json', 'r') as file:
-            return json.load(file)
-            
-    def generate_events_timeline(self):
-        events = []
-        for _ in range(self.events_per_match):
-            minute = random.randint(1, 90)
-            team = "home" if random.random() < 0.5 else "away"
-            event_type = random.choices(
-                ["attack", "shot", "shot_on_target", "goal"],
-                weights=[0.4, 0.3, 0.2, 0.1]
-            )[0]
-            events.append({"minute": minute, "team": team, "type": event_type})
-        return sorted(events, key=lambda x: x["minute"])
-
-    def create_stats_surface(self, width, height):
-        surface = pygame.Surface((width, height), pygame.SRCALPHA)
-        pygame.draw.rect(surface, (50, 50, 50, 200), (0, 0, width, height), border_radius=10)
-        return surface
-        
-    def update_match_state(self):
-        if not self.is_match_running:
-            return
+        self.save_num = saves.read(CONFIG_PATH)['current_save']
 
-        self.current_minute = int((datetime.now() - self.match_start_time).total_seconds() / 2)
+        calendar = load_calendar(self.save_num)
 
-        if self.current_minute >= 90:
-            self.current_minute = 90
-            self.is_match_running = False
+        data = saves.read(save_path(self.save_num))
+        self.club_id = data["club_id"]
+        self.match_data = calendar.next_fixture(data["club_id"], data["date"])
+        if self.match_data is None:
+            # The club's season is over; handle_events sends the player back.
             return
+        saves.update(save_path(self.save_num), date=self.match_data["date"])
 
-        while (self.current_event_index < len(self.events_timeline) and 
-               self.events_timeline[self.current_event_index]["minute"] <= self.current_minute):
-            event = self.events_timeline[self.current_event_index]
-            self.process_event(event)
-            self.current_event_index += 1
+        registry = club_registry()
+        self.home_team = registry.name(self.match_data["home"])
+        self.away_team = registry.name(self.match_data["away"])
 
-    def process_event(self, event):
-        team = event["team"]
-        event_type = event["type"]
-        
-        if team == "home":
-            self.home_possession += random.uniform(-2, 2)
-            if event_type in ["shot", "shot_on_target", "goal"]:
-                self.home_shots += 1
-                self.home_xg += random.uniform(0.1, 0.3)
-                if event_type in ["shot_on_target", "goal"]:
-                    self.home_shots_on_target += 1
-                    if event_type == "goal":
-                        self.home_score += 1
-                        self.home_xg += random.uniform(0.3, 0.5)
-        else:
-            if event_type in ["shot", "shot_on_target", "goal"]:
-                self.away_shots += 1
-                self.away_xg += random.uniform(0.1, 0.3)
-                if event_type in ["shot_on_target", "goal"]:
-                    self.away_shots_on_target += 1
-                    if event_type == "goal":
-                        self.away_score += 1
-                        self.away_xg += random.uniform(0.3, 0.5)
-
-        commentary_text = random.choice(self.commentary_data[event_type][team])
-        self.commentary_lines.append(f"{self.current_minute}' - {commentary_text}")
-        if len(self.commentary_lines) > self.max_commentary_lines:
-            self.commentary_lines.pop(0)
+        self.home_colors = club_colors(self.match_data["home"])
+        self.away_colors = club_colors(self.match_data["away"])
+
+    def setup_panels(self):
+        self.set_backdrop(self.background, 128)
+        self.add_panel("score", (self.screen_width // 2 - 350, 20, 700, 100), self.render_score)
+        self.add_panel("progress", (self.screen_width // 2 - 350, 126, 700, 6), self.render_progress)
+        self.add_panel("stats", (20, 20, 300, 250), self.render_stats)
+        self.add_panel("commentary", (self.screen_width // 2 - 300, self.screen_height - 600, 600, 450), self.render_commentary)
+        rects = [button_data["rect"] for button_data in self.buttons.values()]
+        self.add_panel("controls", rects[0].unionall(rects), self.render_controls)
+
+    def draw_stats_background(self, surface):
+        pygame.draw.rect(surface, (50, 50, 50, 200), surface.get_rect(), border_radius=10)
 
     def setup_control_buttons(self):
         button_size = 50
@@ -193,130 +147,159 @@ class MatchSimulationPage(BasePage):
             }
         }
 
-    def create_button_surface(self, size, border_radius=10, is_active=False):
-        surface = pygame.Surface((size, size), pygame.SRCALPHA)
-        color = (50, 50, 50, 255) if is_active else (70, 70, 70, 255)
-
-        pygame.draw.rect(surface, color, (0, 0, size, size), border_radius=border_radius)
-
-        return surface
-
     def handle_events(self, events):
+        if self.match_data is None:
+            return "dashboard"
         for event in events:
             if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
+                self.quit()
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     return "dashboard"
+                elif event.key == pygame.K_RIGHT:
+                    self.jump_to(self.engine.next_event_minute() or MATCH_MINUTES)
+                elif event.key == pygame.K_r and self.result_recorded:
+                    self.start_replay()
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 mouse_pos = pygame.mouse.get_pos()
-                self.handle_button_clicks(mouse_pos)
+                next_page = self.handle_button_clicks(mouse_pos)
+                if next_page:
+                    return next_page
 
     def handle_button_clicks(self, mouse_pos):
         for button_key, button_data in self.buttons.items():
             if button_data["rect"].collidepoint(mouse_pos):
                 if button_key == "pause":
-                    self.is_paused = not self.is_paused
+                    self.clock.toggle_pause()
                 elif button_key == "slow":
-                    self.speed_multiplier = 0.5
+                    self.clock.set_speed(0.5)
                 elif button_key == "normal":
-                    self.speed_multiplier = 1.0
+                    self.clock.set_speed(1.0)
                 elif button_key == "fast":
-                    self.speed_multiplier = 2.0
+                    self.clock.set_speed(2.0)
                 elif button_key == "skip":
-                    self.speed_multiplier = 75.0
+                    self.jump_to(MATCH_MINUTES)
                 elif button_key == "advance":
                     return "dashboard"
+                self.invalidate("controls")
 
     def update_match_state(self):
-        if self.current_minute >= 90:
-            self.is_paused = True
-            self.is_match_running = False
-        if self.is_paused and not self.skip_to_end:
+        if not self.engine.is_match_running:
             return
 
-        if self.skip_to_end:
-            self.match_start_time = datetime.now() - timedelta(seconds=180)
-            while self.current_minute < 90:
-                self.current_minute += 1
-                while (self.current_event_index < len(self.events_timeline) and
-                    self.events_timeline[self.current_event_index]["minute"] <= self.current_minute):
-                    self.process_event(self.events_timeline[self.current_event_index])
-                    self.current_event_index += 1
-                self.render()
-            self.is_match_running = False
-            self.skip_to_end = False
+        # Each tick is one match minute, so the events processed depend only
+        # on how many ticks have elapsed, never on the frame rate.
+        ticks = self.clock.update()
+        processed = []
+        for _ in range(ticks):
+            processed += self.engine.advance_to(self.engine.current_minute + 1)
+            if not self.engine.is_match_running:
+                break
+
+        if processed:
+            self.invalidate("score", "stats", "commentary")
+        elif ticks:
+            self.invalidate("stats")
+        if not self.clock.paused:
+            self.invalidate("progress")
+
+        if not self.engine.is_match_running and not self.result_recorded:
+            self.record_matchday()
+
+    def record_matchday(self):
+        db = open_save_db(self.save_num)
+        players = open_save_players(self.save_num)
+        results = [(self.match_data["fixture_id"], self.engine.result(), encode_log(self.engine))]
+        # Every fixture still unplayed up to today is recorded with this
+        # match, including rounds the club sat out with a bye.
+        for fixture in db.unplayed_fixtures(self.match_data["date"]):
+            if fixture["fixture_id"] != self.match_data["fixture_id"]:
+                engine = MatchEngine(seed=db.match_seed(fixture["fixture_id"]),
+                                     home_ratings=team_ratings(players, fixture["home"]),
+                                     away_ratings=team_ratings(players, fixture["away"]))
+                results.append((fixture["fixture_id"], engine.simulate(), encode_log(engine)))
+        db.record_results(results)
+        # The other clubs trade on the window's matchdays up to this one.
+        advance_transfers(self.save_num, self.match_data["date"], exclude_club=self.club_id)
+        self.result_recorded = True
+
+    def jump_to(self, minute):
+        # Resolves everything up to the minute in one engine call; the panels
+        # are recomposed once on the next render.
+        if not self.engine.is_match_running:
             return
+        self.engine.advance_to(minute)
+        self.clock.start()
+        self.invalidate()
+        if not self.engine.is_match_running and not self.result_recorded:
+            self.record_matchday()
 
-        time_delta = (datetime.now() - self.match_start_time).total_seconds()
-        self.current_minute = int(time_delta * self.speed_multiplier / 2)
-
-        if self.current_minute >= 90:
-            self.is_match_running = False
-            return
-
-        while (self.current_event_index < len(self.events_timeline) and 
-               self.events_timeline[self.current_event_index]["minute"] <= self.current_minute):
-            self.process_event(self.events_timeline[self.current_event_index])
-            self.current_event_index += 1
+    def update(self):
+        if self.match_data is not None:
+            self.update_match_state()
 
     def render(self):
-        self.screen.blit(self.background, (0, 0))
-        overlay = pygame.Surface(self.screen.get_size())
-        overlay.fill((0, 0, 0))
-        overlay.set_alpha(128)
-        self.screen.blit(overlay, (0, 0))
-
-        self.update_match_state()
-
-        score_surface = self.create_stats_surface(700, 100)
-        score_text = self.font.render(f"{self.home_team} {self.home_score} - {self.away_score} {self.away_team}", True, (255, 255, 255))
-        score_rect = score_text.get_rect(center=(350, 50))
-        score_surface.blit(score_text, score_rect)
-        self.screen.blit(score_surface, (self.screen_width // 2 - 350, 20))
-
-        stats_surface = self.create_stats_surface(300, 250)
+        # Nothing to show after the last fixture; the dashboard stays on
+        # screen until handle_events switches back to it.
+        if self.match_data is None:
+            return []
+        return super().render()
+
+    def render_score(self, surface):
+        self.draw_stats_background(surface)
+        engine = self.engine
+        score_text = self.render_text(self.font, f"{self.home_team} {engine.home_score} - {engine.away_score} {self.away_team}", (255, 255, 255))
+        surface.blit(score_text, score_text.get_rect(center=(350, 50)))
+
+        for x, colors in ((20, self.home_colors), (660, self.away_colors)):
+            pygame.draw.rect(surface, colors[0], (x, 25, 20, 25))
+            pygame.draw.rect(surface, colors[1], (x, 50, 20, 25))
+
+    def render_progress(self, surface):
+        # Interpolated between ticks so the bar moves smoothly at any speed.
+        minute = self.engine.current_minute
+        if self.engine.is_match_running:
+            minute += self.clock.alpha
+        width = surface.get_width() * min(minute / MATCH_MINUTES, 1)
+        pygame.draw.rect(surface, (50, 50, 50, 200), surface.get_rect(), border_radius=3)
+        pygame.draw.rect(surface, (255, 255, 255, 255), (0, 0, width, surface.get_height()), border_radius=3)
+
+    def render_stats(self, surface):
+        self.draw_stats_background(surface)
+        engine = self.engine
         stats_texts = [
-            f"Possession: {int(self.home_possession)}% - {100 - int(self.home_possession)}%",
-            f"Shots: {self.home_shots} - {self.away_shots}",
-            f"On Target: {self.home_shots_on_target} - {self.away_shots_on_target}",
-            f"xG: {self.home_xg:.2f} - {self.away_xg:.2f}",
-            f"Time: {self.current_minute}'"
+            f"Possession: {int(engine.home_possession)}% - {100 - int(engine.home_possession)}%",
+            f"Shots: {engine.home_shots} - {engine.away_shots}",
+            f"On Target: {engine.home_shots_on_target} - {engine.away_shots_on_target}",
+            f"xG: {engine.home_xg:.2f} - {engine.away_xg:.2f}",
+            f"Time: {engine.current_minute}'" + (" (replay)" if self.replaying else "")
         ]
-        
-        for i, text in enumerate(stats_texts):
-            stat_text = self.small_font.render(text, True, (255, 255, 255))
-            stats_surface.blit(stat_text, (20, 20 + i * 40))
-        self.screen.blit(stats_surface, (20, 20))
 
-        commentary_surface = self.create_stats_surface(600, 450)
-        for i, line in enumerate(self.commentary_lines):
-            comment_text = self.small_font.render(line, True, (255, 255, 255))
-            commentary_surface.blit(comment_text, (20, 20 + i * 30))
-        self.screen.blit(commentary_surface, (self.screen_width // 2 - 300, self.screen_height - 600))
+        for i, text in enumerate(stats_texts):
+            stat_text = self.render_text(self.small_font, text, (255, 255, 255))
+            surface.blit(stat_text, (20, 20 + i * 40))
 
-        mouse_pos = pygame.mouse.get_pos()
+    def render_commentary(self, surface):
+        self.draw_stats_background(surface)
+        for i, line in enumerate(self.engine.commentary_lines):
+            comment_text = self.render_text(self.small_font, line, (255, 255, 255))
+            surface.blit(comment_text, (20, 20 + i * 30))
 
+    def render_controls(self, surface):
+        origin = self.panels["controls"].rect.topleft
         for button_key, button_data in self.buttons.items():
             is_active = (
-                (button_key == "pause" and self.is_paused) or
-                (button_key == "slow" and self.speed_multiplier == 0.5) or
-                (button_key == "normal" and self.speed_multiplier == 1.0) or
-                (button_key == "fast" and self.speed_multiplier == 2.0) or
-                (button_key == "skip" and self.speed_multiplier == 75.0)
+                (button_key == "pause" and self.clock.paused) or
+                (button_key == "slow" and self.clock.speed == 0.5) or
+                (button_key == "normal" and self.clock.speed == 1.0) or
+                (button_key == "fast" and self.clock.speed == 2.0) or
+                (button_key == "skip" and not self.engine.is_match_running)
             )
 
-            button_surface = self.create_button_surface(
-                button_data["rect"].width,
-                is_active=is_active
-            )
-            self.screen.blit(button_surface, button_data["rect"])
+            rect = button_data["rect"].move(-origin[0], -origin[1])
+            color = (50, 50, 50, 255) if is_active else (70, 70, 70, 255)
+            pygame.draw.rect(surface, color, rect, border_radius=10)
 
-            icon_key = button_data["alt_icon"] if button_key == "pause" and self.is_paused else button_data["icon"]
+            icon_key = button_data["alt_icon"] if button_key == "pause" and self.clock.paused else button_data["icon"]
             icon = self.icons[icon_key]
-            icon_x = button_data["rect"].centerx - icon.get_width() // 2
-            icon_y = button_data["rect"].centery - icon.get_height() // 2
-            self.screen.blit(icon, (icon_x, icon_y))
-
-        pygame.display.flip()
+            surface.blit(icon, (rect.centerx - icon.get_width() // 2, rect.centery - icon.get_height() // 2))
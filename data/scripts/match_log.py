@@ -0,0 +1,36 @@
+import struct
+from .engine import EVENT_TYPES, MatchEngine
+
+FORMAT_VERSION = 1
+TEAMS = ["home", "away"]
+
+# version, seed, event count
+HEADER = struct.Struct("<BQH")
+# minute, team, event type, possession change (tenths), xG (thousandths),
+# commentary line
+EVENT = struct.Struct("<BBBbHB")
+
+
+def encode_log(engine):
+    parts = [HEADER.pack(FORMAT_VERSION, engine.seed, len(engine.events_timeline))]
+    for event in engine.events_timeline:
+        parts.append(EVENT.pack(event["minute"], TEAMS.index(event["team"]), EVENT_TYPES.index(event["type"]),
+                                round(event["possession"] * 10), round(event["xg"] * 1000), event["commentary"]))
+    return b"".join(parts)
+
+
+def decode_log(data):
+    version, seed, count = HEADER.unpack_from(data)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported match log version: {version}")
+    events = []
+    for minute, team, event_type, possession, xg, commentary in EVENT.iter_unpack(data[HEADER.size:HEADER.size + count * EVENT.size]):
+        events.append({"minute": minute, "team": TEAMS[team], "type": EVENT_TYPES[event_type],
+                       "possession": possession / 10, "xg": xg / 1000, "commentary": commentary})
+    return seed, events
+
+
+def replay_engine(data, home_team="", away_team="", commentary_data=None):
+    # The engine only applies the recorded events; nothing is re-simulated.
+    seed, events = decode_log(data)
+    return MatchEngine(home_team, away_team, commentary_data, seed=seed, events_timeline=events)
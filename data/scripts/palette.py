@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+
+LOGO_DIR = "data/assets/images/clubs/logos"
+PALETTE_PATH = "data/assets/palette.json"
+FORMAT_VERSION = 1
+DEFAULT_COLORS = {"dominant": (60, 60, 60), "secondary": (255, 255, 255)}
+
+_table = None
+_verified = set()
+# Scenes and the prefetch worker both look colours up.
+_lock = threading.Lock()
+
+
+def logo_path(club_id):
+    return os.path.join(LOGO_DIR, f"logo_{club_id}.png")
+
+
+def file_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def extract_colors(path):
+    # Imported here so the game itself never needs colorthief once the table
+    # has been built.
+    from colorthief import ColorThief
+
+    # get_color() is get_palette(5)[0], so the dominant colour is unchanged
+    # from what the dashboard used to compute at runtime.
+    palette = ColorThief(path).get_palette(color_count=5, quality=1)
+    secondary = palette[1] if len(palette) > 1 else palette[0]
+    return {"dominant": list(palette[0]), "secondary": list(secondary)}
+
+
+def club_ids_with_logos():
+    club_ids = []
+    for filename in os.listdir(LOGO_DIR):
+        stem, ext = os.path.splitext(filename)
+        if ext == ".png" and stem.startswith("logo_"):
+            club_ids.append(stem[len("logo_"):])
+    return sorted(club_ids, key=lambda club_id: (len(club_id), club_id))
+
+
+def load_table(path=PALETTE_PATH):
+    global _table
+    with _lock:
+        if _table is None:
+            table = {}
+            if os.path.exists(path):
+                with open(path, "r") as f:
+                    data = json.load(f)
+                if data.get("version") == FORMAT_VERSION:
+                    table = data["clubs"]
+            _table = table
+    return _table
+
+
+def save_table(table, path=PALETTE_PATH):
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as f:
+        # One line per club keeps the committed table small and diffable.
+        rows = [f"{json.dumps(club_id)}: {json.dumps(table[club_id], sort_keys=True)}" for club_id in sorted(table)]
+        f.write(f'{{"version": {FORMAT_VERSION}, "clubs": {{\n' + ",\n".join(rows) + "\n}}\n")
+    os.replace(temp_path, path)
+
+
+def build_palette(path=PALETTE_PATH, force=False):
+    table = load_table(path)
+    changed = 0
+    for club_id in club_ids_with_logos():
+        digest = file_hash(logo_path(club_id))
+        entry = table.get(club_id)
+        if force or entry is None or entry["hash"] != digest:
+            table[club_id] = {"hash": digest, **extract_colors(logo_path(club_id))}
+            changed += 1
+        _verified.add(club_id)
+    if changed:
+        save_table(table, path)
+    return changed
+
+
+def club_colors(club_id):
+    club_id = str(club_id)
+    table = load_table()
+    if club_id in _verified:
+        entry = table[club_id]
+        return tuple(entry["dominant"]), tuple(entry["secondary"])
+
+    path = logo_path(club_id)
+    if not os.path.exists(path):
+        return DEFAULT_COLORS["dominant"], DEFAULT_COLORS["secondary"]
+
+    # Each entry is checked against the logo's hash once per run; only a
+    # missing or stale entry falls back to extracting the colours.
+    # Fresh colours are only kept for this run: the tracked table is
+    # rewritten by build_assets, never by the game.
+    digest = file_hash(path)
+    with _lock:
+        entry = table.get(club_id)
+    if entry is None or entry["hash"] != digest:
+        entry = {"hash": digest, **extract_colors(path)}
+    with _lock:
+        table[club_id] = entry
+        _verified.add(club_id)
+    return tuple(entry["dominant"]), tuple(entry["secondary"])
+
+
+def dominant_color(club_id):
+    return club_colors(club_id)[0]
+
+
+def secondary_color(club_id):
+    return club_colors(club_id)[1]
+
+
+if __name__ == "__main__":
+    changed = build_palette(force="--force" in sys.argv[1:])
+    print(f"{changed} palette entries updated in {PALETTE_PATH}")
@@ -0,0 +1,467 @@
+import json
+import os
+import shutil
+import threading
+from datetime import date, timedelta
+from typing import NamedTuple
+import numpy as np
+from .player_store import MISSING, column_filename, to_python, open_base_store, open_save_players
+
+INDEX_VERSION = 1
+PAGE_SIZE = 20
+# When the most selective filter leaves fewer rows than this share of the
+# table, its rows are fetched and the other filters checked on them only;
+# otherwise every filter becomes a full-table bitmap.
+SPARSE_FRACTION = 1 / 16
+SCAN_CHUNK = 4096
+RESULT_FIELDS = [
+    "player_id", "name", "position", "sub_position", "OVR", "overall", "date_of_birth", "country_of_birth",
+    "foot", "current_club_id", "market_value_in_eur", "contract_expiration_date",
+]
+
+_indexes = {}
+_searches = {}
+
+
+class SearchPage(NamedTuple):
+    total: int
+    offset: int
+    players: list
+
+
+def missing_mask(values):
+    kind = values.dtype.kind
+    if kind == "M":
+        return np.isnat(values)
+    if kind == "f":
+        return np.isnan(values)
+    if kind == "S":
+        return values == b""
+    return values == MISSING
+
+
+def code_dtype(count):
+    if count < 2 ** 8:
+        return np.uint8
+    if count < 2 ** 16:
+        return np.uint16
+    return np.uint32
+
+
+def convert(value, kind):
+    # Python values (filters, save overrides) in the base column's terms.
+    if kind == "S":
+        return b"" if value is None else value if isinstance(value, bytes) else str(value).encode("UTF-8")
+    if kind == "M":
+        return np.datetime64("NaT", "D") if value is None else np.datetime64(str(value)[:10], "D")
+    if kind == "f":
+        return np.nan if value is None else float(value)
+    return MISSING if value is None else int(value)
+
+
+def python_values(values):
+    # to_python() for a whole column slice at once.
+    kind = values.dtype.kind
+    if kind == "S":
+        return [value.decode("UTF-8") for value in values.tolist()]
+    if kind == "M":
+        return values.astype(object).tolist()
+    if kind == "f":
+        return [None if value != value else value for value in values.tolist()]
+    return [None if value == MISSING else value for value in values.tolist()]
+
+
+def years_before(day, years):
+    try:
+        return day.replace(year=day.year - years)
+    except ValueError:
+        return day.replace(year=day.year - years, day=28)
+
+
+class ColumnIndex:
+    # Rows grouped by value: keys are the column's distinct values in order,
+    # codes the position of each row's value in keys (missing values get the
+    # last code) and order the rows sorted by code, so any value range is a
+    # single slice of order and a cheap compare on the small codes array.
+    def __init__(self, keys, codes, order, starts):
+        self.keys = keys
+        self.codes = codes
+        self.order = order
+        self.starts = starts
+        self.missing = len(keys)
+        self.kind = keys.dtype.kind
+
+    @classmethod
+    def build(cls, values):
+        present = ~missing_mask(values)
+        keys, inverse = np.unique(values[present], return_inverse=True)
+        codes = np.full(len(values), len(keys), dtype=code_dtype(len(keys) + 1))
+        codes[present] = inverse
+        order = np.argsort(codes, kind="stable")
+        starts = np.searchsorted(codes[order], np.arange(len(keys) + 2))
+        return cls(keys, codes, order, starts)
+
+    def key(self, value):
+        # Searching with a wider type than the keys would copy them all.
+        if self.kind in "iu":
+            info = np.iinfo(self.keys.dtype)
+            return self.keys.dtype.type(min(max(int(value), info.min), info.max))
+        return value
+
+    def code_range(self, low, high):
+        lo = 0 if low is None else int(np.searchsorted(self.keys, self.key(low), "left"))
+        hi = self.missing if high is None else int(np.searchsorted(self.keys, self.key(high), "right"))
+        return lo, max(lo, hi)
+
+    def value_codes(self, values):
+        codes = np.searchsorted(self.keys, values)
+        found = codes < self.missing
+        found[found] = self.keys[codes[found]] == np.asarray(values)[found]
+        return codes[found]
+
+    def sort_keys(self, values):
+        # Where values not in keys (from save changes) would sit, as
+        # fractional codes that order correctly against the base rows.
+        values = np.asarray(values)
+        codes = np.searchsorted(self.keys, values).astype(np.float64)
+        inside = codes < self.missing
+        exact = np.zeros(len(values), dtype=bool)
+        exact[inside] = self.keys[codes[inside].astype(np.intp)] == values[inside]
+        keys = np.where(exact, codes, codes - 0.5)
+        keys[missing_mask(values)] = self.missing
+        return keys
+
+    def flip(self, keys):
+        # Descending order, with missing values still last.
+        return np.where(keys >= self.missing, self.missing, self.missing - 1 - keys)
+
+    def sorted_rows(self, descending):
+        valid = self.starts[self.missing]
+        if descending:
+            return [self.order[:valid][::-1], self.order[valid:]]
+        return [self.order]
+
+
+class RangeFilter:
+    def __init__(self, name, index, low, high):
+        self.name = name
+        self.index = index
+        self.low = low
+        self.high = high
+        self.lo, self.hi = index.code_range(low, high)
+        self.count = int(index.starts[self.hi] - index.starts[self.lo])
+        self.negate = False
+
+    def rows(self):
+        return self.index.order[self.index.starts[self.lo]:self.index.starts[self.hi]]
+
+    def test(self, rows):
+        codes = self.index.codes[rows]
+        return (codes >= self.lo) & (codes < self.hi)
+
+    def apply(self, mask, scratch):
+        # Bounds in the codes' own dtype; a wider scalar would make every
+        # comparison upcast the whole column.
+        codes = self.index.codes
+        code = codes.dtype.type
+        if self.lo > 0:
+            np.greater_equal(codes, code(self.lo), out=scratch)
+            mask &= scratch
+        np.less(codes, code(self.hi), out=scratch)
+        mask &= scratch
+
+    def match(self, values):
+        matched = ~missing_mask(values)
+        if self.low is not None:
+            matched &= values >= self.low
+        if self.high is not None:
+            matched &= values <= self.high
+        return matched
+
+
+class ValueFilter:
+    def __init__(self, name, index, values, negate=False):
+        self.name = name
+        self.index = index
+        self.values = values
+        self.codes = index.value_codes(values).astype(index.codes.dtype)
+        count = int(sum(index.starts[code + 1] - index.starts[code] for code in self.codes))
+        self.count = len(index.codes) - count if negate else count
+        self.negate = negate
+        # Whether each code passes, so several values cost one lookup.
+        self.table = np.full(index.missing + 1, negate)
+        self.table[self.codes] = not negate
+
+    def rows(self):
+        starts = self.index.starts
+        return np.concatenate([self.index.order[starts[code]:starts[code + 1]] for code in self.codes]
+                              or [np.empty(0, dtype=np.intp)])
+
+    def test(self, rows):
+        return self.table[self.index.codes[rows]]
+
+    def apply(self, mask, scratch):
+        codes = self.index.codes
+        if len(self.codes) == 1:
+            compare = np.not_equal if self.negate else np.equal
+            compare(codes, self.codes[0], out=scratch)
+        else:
+            np.take(self.table, codes, out=scratch)
+        mask &= scratch
+
+    def match(self, values):
+        return np.isin(values, self.values, invert=self.negate)
+
+
+class PlayerIndex:
+    # Search indexes over one base player store. Each column's index is built
+    # the first time it is queried and kept next to the store's columns.
+    def __init__(self, store):
+        self.store = store
+        self.size = len(store)
+        self.directory = os.path.join(store.directory, "search")
+        self.columns = {}
+        self.lock = threading.Lock()
+        self.check()
+
+    def check(self):
+        manifest = {"version": INDEX_VERSION, "source": self.store.manifest["source"], "rows": self.size}
+        manifest_path = os.path.join(self.directory, "manifest.json")
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r") as f:
+                if json.load(f) == manifest:
+                    return
+            shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f)
+
+    def paths(self, name):
+        stem = os.path.join(self.directory, os.path.splitext(column_filename(name))[0])
+        return [f"{stem}.{part}.npy" for part in ("keys", "codes", "order", "starts")]
+
+    def column(self, name):
+        index = self.columns.get(name)
+        if index is not None:
+            return index
+        with self.lock:
+            index = self.columns.get(name)
+            if index is None:
+                paths = self.paths(name)
+                if all(os.path.exists(path) for path in paths):
+                    index = ColumnIndex(*(np.asarray(np.load(path, mmap_mode="r")) for path in paths))
+                else:
+                    index = ColumnIndex.build(np.asarray(self.store.column(name)))
+                    for path, array in zip(paths, (index.keys, index.codes, index.order, index.starts)):
+                        np.save(path, array)
+                self.columns[name] = index
+        return index
+
+
+class Overlay:
+    # Players a save has changed or added. Their base rows are hidden from the
+    # indexes and the current values are matched separately, one small array
+    # per column, then merged into the page.
+    def __init__(self, players, base):
+        self.players = players
+        self.base = base
+        overrides = getattr(players, "overrides", {})
+        added = getattr(players, "added", {})
+        self.changed = [(player_id, base.player_row(player_id), fields) for player_id, fields in overrides.items()]
+        self.added = list(added.items())
+        ids = [player_id for player_id, _, _ in self.changed] + [player_id for player_id, _ in self.added]
+        self.ids = np.array(ids, dtype=np.int64)
+        self.visible = None
+        rows = [row for _, row, _ in self.changed if row is not None]
+        if rows:
+            self.visible = np.ones(len(base), dtype=bool)
+            self.visible[rows] = False
+        self.columns = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def column(self, name):
+        values = self.columns.get(name)
+        if values is None:
+            base_column = self.base.column(name)
+            kind = base_column.dtype.kind
+            items = []
+            for _, row, fields in self.changed:
+                value = fields[name] if name in fields else None if row is None else to_python(base_column[row])
+                items.append(convert(value, kind))
+            items.extend(convert(fields.get(name), kind) for _, fields in self.added)
+            dtype = {"S": "S", "M": "datetime64[D]", "f": np.float64}.get(kind, np.int64)
+            values = np.array(items, dtype=dtype) if items else np.empty(0, dtype=base_column.dtype)
+            self.columns[name] = values
+        return values
+
+
+class PlayerSearch:
+    def __init__(self, players):
+        self.players = players
+        self.base = getattr(players, "base", players)
+        self.index = player_index(self.base)
+        self.overlay = None
+        self.overlay_version = None
+        self.buffers = None
+
+    def current_overlay(self):
+        version = getattr(self.players, "changes", 0)
+        if self.overlay is None or self.overlay_version != version:
+            self.overlay = Overlay(self.players, self.base)
+            self.overlay_version = version
+        return self.overlay
+
+    def make_filter(self, name, value, today):
+        if name == "age":
+            low, high = value
+            value = (None if high is None else years_before(today, high + 1) + timedelta(days=1),
+                     None if low is None else years_before(today, low))
+            name = "date_of_birth"
+        index = self.index.column(name)
+        if isinstance(value, tuple):
+            low, high = (None if bound is None else convert(bound, index.kind) for bound in value)
+            return RangeFilter(name, index, low, high)
+        values = value if isinstance(value, (list, set, frozenset)) else [value]
+        return ValueFilter(name, index, np.array([convert(item, index.kind) for item in values]))
+
+    def query(self, filters=None, sort="OVR", descending=True, offset=0, limit=PAGE_SIZE, today=None,
+              exclude_club=None):
+        # Filters map a column to a value, a list of values or an inclusive
+        # (low, high) range with None for an open end; "age" is a range of
+        # whole years on the given day.
+        today = today or date.today()
+        conditions = [self.make_filter(name, value, today) for name, value in (filters or {}).items()
+                      if value is not None]
+        if exclude_club is not None:
+            index = self.index.column("current_club_id")
+            conditions.append(ValueFilter("current_club_id", index, np.array([int(exclude_club)]), negate=True))
+        if sort == "age":
+            sort, descending = "date_of_birth", not descending
+        sort_index = self.index.column(sort)
+
+        overlay = self.current_overlay()
+        wanted = offset + limit
+        rows, total = self.base_rows(conditions, sort_index, descending, wanted, overlay.visible)
+        keys = sort_index.codes[rows].astype(np.float64)
+        ids = np.full(len(rows), -1, dtype=np.int64)
+
+        if len(overlay):
+            matched = np.ones(len(overlay), dtype=bool)
+            for condition in conditions:
+                matched &= condition.match(overlay.column(condition.name))
+            total += int(np.count_nonzero(matched))
+            if matched.any():
+                values = overlay.column(sort)[matched]
+                rows = np.concatenate([rows, np.full(len(values), -1, dtype=rows.dtype)])
+                ids = np.concatenate([ids, overlay.ids[matched]])
+                keys = np.concatenate([keys, sort_index.sort_keys(values)])
+                # Changed values outside the base keys can share a fractional
+                # key, so they are ordered among themselves by rank.
+                ranks = np.argsort(np.argsort(values, kind="stable"), kind="stable")
+                ties = np.concatenate([np.zeros(len(rows) - len(values), dtype=np.intp), ranks])
+                if descending:
+                    keys, ties = sort_index.flip(keys), -ties
+                merged = np.lexsort((ties, keys))[:wanted]
+                rows, ids = rows[merged], ids[merged]
+
+        rows, ids = rows[offset:wanted], ids[offset:wanted]
+        fields = RESULT_FIELDS if sort in RESULT_FIELDS else RESULT_FIELDS + [sort]
+        return SearchPage(total, offset, self.page_players(rows, ids, today, fields))
+
+    def base_rows(self, conditions, sort_index, descending, wanted, visible):
+        size = self.index.size
+        drivers = [condition for condition in conditions if not condition.negate]
+        driver = min(drivers, key=lambda condition: condition.count, default=None)
+        if driver is not None and driver.count <= size * SPARSE_FRACTION:
+            candidates = driver.rows()
+            for condition in conditions:
+                if condition is not driver:
+                    candidates = candidates[condition.test(candidates)]
+            if visible is not None:
+                candidates = candidates[visible[candidates]]
+            return self.top(candidates, sort_index, descending, wanted), len(candidates)
+
+        # Full-table bitmaps are built in two reused buffers: fresh arrays
+        # this size cost more in page faults than the comparisons do.
+        mask = None
+        if conditions or visible is not None:
+            if self.buffers is None:
+                self.buffers = (np.empty(size, dtype=bool), np.empty(size, dtype=bool))
+            mask, scratch = self.buffers
+            if visible is not None:
+                np.copyto(mask, visible)
+            else:
+                mask.fill(True)
+            for condition in conditions:
+                condition.apply(mask, scratch)
+        total = size if mask is None else int(np.count_nonzero(mask))
+        # Walking the sort order visits about wanted * size / total rows
+        # before the page is full; sorting the matches costs about total.
+        if total * total < wanted * size:
+            return self.top(np.flatnonzero(mask), sort_index, descending, wanted), total
+
+        found = []
+        count = 0
+        for segment in sort_index.sorted_rows(descending):
+            for start in range(0, len(segment), SCAN_CHUNK):
+                chunk = segment[start:start + SCAN_CHUNK]
+                if mask is not None:
+                    chunk = chunk[mask[chunk]]
+                found.append(chunk)
+                count += len(chunk)
+                if count >= wanted:
+                    return np.concatenate(found)[:wanted], total
+        return np.concatenate(found or [np.empty(0, dtype=np.intp)])[:wanted], total
+
+    def top(self, candidates, sort_index, descending, wanted):
+        keys = sort_index.codes[candidates].astype(np.int64)
+        if descending:
+            keys = sort_index.flip(keys)
+        # Ties are broken by row so every page agrees on the order.
+        keys = keys * self.index.size + candidates
+        if len(keys) > wanted:
+            part = np.argpartition(keys, wanted - 1)[:wanted]
+            candidates, keys = candidates[part], keys[part]
+        return candidates[np.argsort(keys)]
+
+    def page_players(self, rows, ids, today, fields=RESULT_FIELDS):
+        base_rows = rows[rows >= 0]
+        columns = {name: python_values(np.asarray(self.base.column(name))[base_rows]) for name in fields}
+        players = []
+        next_base = 0
+        for row, player_id in zip(rows.tolist(), ids.tolist()):
+            if row >= 0:
+                player = {name: values[next_base] for name, values in columns.items()}
+                next_base += 1
+            else:
+                player = self.players.player(player_id, fields)
+            born = player["date_of_birth"]
+            if born is None:
+                player["age"] = None
+            else:
+                player["age"] = today.year - born.year - ((today.month, today.day) < (born.month, born.day))
+            players.append(player)
+        return players
+
+    def values(self, name):
+        # Distinct values of a column, for filter choices.
+        return [to_python(value) for value in self.index.column(name).keys]
+
+
+def player_index(store):
+    cached = _indexes.get(store.directory)
+    if cached is None or cached.store is not store:
+        cached = PlayerIndex(store)
+        _indexes[store.directory] = cached
+    return cached
+
+
+def open_player_search(save_num=None):
+    players = open_save_players(save_num) if save_num is not None else open_base_store()
+    cached = _searches.get(save_num)
+    if cached is None or cached.players is not players:
+        cached = PlayerSearch(players)
+        _searches[save_num] = cached
+    return cached
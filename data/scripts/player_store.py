@@ -0,0 +1,560 @@
+import csv
+import itertools
+import json
+import os
+import re
+import shutil
+import threading
+from datetime import date
+import numpy as np
+from .save_db import open_save_db
+
+BASE_PLAYERS = "data/assets/players.csv"
+CACHE_DIR = "data/assets/cache"
+FORMAT_VERSION = 2
+MISSING = -1
+DATE_COLUMNS = {"date_of_birth", "contract_expiration_date"}
+SQUAD_FIELDS = ["player_id", "name", "position", "sub_position", "overall", "OVR"]
+INDEXED_FIELDS = ["current_club_id", "position", "sub_position", "OVR"]
+# Rows parsed per block while building a store.
+CHUNK_ROWS = 65536
+
+_open_stores = {}
+_open_saves = {}
+# The prefetch worker opens saves too; a reentrant lock since opening a
+# save opens the base store. Opening a save takes its database locks, so
+# the lock order is this one, then save_db's: never open save players
+# while a save's database lock or transaction is held.
+_open_lock = threading.RLock()
+
+
+def column_filename(name):
+    return re.sub(r"[^A-Za-z0-9_]+", "_", name) + ".npy"
+
+
+class ColumnType:
+    # Parses a column block by block at the narrowest kind every value so
+    # far fits: int, then float, then bytes. Blocks parsed before the column
+    # widened are parsed again from the CSV.
+    def __init__(self, name):
+        self.kind = "M" if name in DATE_COLUMNS else "i"
+        self.smallest = self.largest = MISSING
+        self.width = 1
+
+    def parse(self, values):
+        if self.kind == "M":
+            return np.array([value[:10] if value else "NaT" for value in values], dtype="datetime64[D]")
+        # Character counts are byte counts unless a value isn't ASCII.
+        if all(map(str.isascii, values)):
+            self.width = max(self.width, max(map(len, values), default=1))
+        else:
+            self.width = max(self.width, max(len(value.encode("UTF-8")) for value in values))
+        if self.kind == "i":
+            try:
+                numbers = [int(value) if value else MISSING for value in values]
+                self.smallest = min(self.smallest, min(numbers, default=MISSING))
+                self.largest = max(self.largest, max(numbers, default=MISSING))
+                return np.array(numbers, dtype=np.int64)
+            except ValueError:
+                self.kind = "f"
+        if self.kind == "f":
+            try:
+                return np.array([float(value) if value else np.nan for value in values], dtype=np.float32)
+            except ValueError:
+                self.kind = "S"
+        return np.array([value.encode("UTF-8") for value in values], dtype=f"S{self.width}")
+
+    @property
+    def dtype(self):
+        if self.kind == "M":
+            return np.dtype("datetime64[D]")
+        if self.kind == "i":
+            return np.dtype(np.int64 if self.largest >= 2 ** 31 or self.smallest < -2 ** 31 else np.int32)
+        if self.kind == "f":
+            return np.dtype(np.float32)
+        return np.dtype(f"S{self.width}")
+
+
+def csv_chunks(csv_path, header):
+    # Columns in blocks of CHUNK_ROWS rows, padded to the header's width, so
+    # only one block of the CSV is ever held as strings.
+    with open(csv_path, "r", encoding="UTF-8", newline="") as csvfile:
+        reader = csv.reader(csvfile)
+        next(reader)
+        width = len(header)
+        while True:
+            rows = list(itertools.islice(reader, CHUNK_ROWS))
+            if not rows:
+                return
+            rows = [row if len(row) >= width else row + [""] * (width - len(row)) for row in rows]
+            yield list(zip(*rows))[:width]
+
+
+def to_python(value):
+    if isinstance(value, np.bytes_):
+        return value.decode("UTF-8")
+    if isinstance(value, np.datetime64):
+        if np.isnat(value):
+            return None
+        return value.astype(date)
+    if isinstance(value, np.integer):
+        return None if value == MISSING else int(value)
+    if isinstance(value, np.floating):
+        return None if np.isnan(value) else float(value)
+    return value
+
+
+def source_signature(path):
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def build_store(csv_path, directory):
+    with open(csv_path, "r", encoding="UTF-8", newline="") as csvfile:
+        header = next(csv.reader(csvfile))
+    os.makedirs(directory, exist_ok=True)
+
+    # Each parsed block goes to a spill file per column until the column's
+    # final dtype and the row count are known.
+    types = [ColumnType(name) for name in header]
+    spill_paths = [os.path.join(directory, column_filename(name) + ".part") for name in header]
+    spills = [open(path, "wb") for path in spill_paths]
+    blocks = []
+    try:
+        for chunk in csv_chunks(csv_path, header):
+            parsed = [column_type.parse(values) for column_type, values in zip(types, chunk)]
+            for spill, array in zip(spills, parsed):
+                spill.write(array.tobytes())
+            blocks.append((len(chunk[0]), [array.dtype for array in parsed]))
+    finally:
+        for spill in spills:
+            spill.close()
+    rows = sum(length for length, _ in blocks)
+
+    columns = {}
+    stale = set()
+    for i, (name, column_type) in enumerate(zip(header, types)):
+        path = os.path.join(directory, column_filename(name))
+        if not rows:
+            np.save(path, np.empty(0, dtype=column_type.dtype))
+            columns[name] = np.load(path)
+            continue
+        column = np.lib.format.open_memmap(path, mode="w+", dtype=column_type.dtype, shape=(rows,))
+        start = 0
+        with open(spill_paths[i], "rb") as spill:
+            for block, (length, dtypes) in enumerate(blocks):
+                values = np.fromfile(spill, dtype=dtypes[i], count=length)
+                if dtypes[i].kind == column_type.dtype.kind:
+                    column[start:start + length] = values
+                else:
+                    stale.add((block, i))
+                start += length
+        columns[name] = column
+    for path in spill_paths:
+        os.remove(path)
+
+    if stale:
+        start = 0
+        for block, chunk in enumerate(csv_chunks(csv_path, header)):
+            for i, (name, column_type) in enumerate(zip(header, types)):
+                if (block, i) in stale:
+                    columns[name][start:start + len(chunk[i])] = column_type.parse(chunk[i])
+            start += len(chunk[0])
+    for column in columns.values():
+        if isinstance(column, np.memmap):
+            column.flush()
+
+    club_ids = columns["current_club_id"]
+    club_order = np.argsort(club_ids, kind="stable")
+    club_keys, club_starts = np.unique(club_ids[club_order], return_index=True)
+    id_order = np.argsort(columns["player_id"], kind="stable")
+
+    index = {
+        "club_order": club_order,
+        "club_keys": club_keys,
+        "club_starts": np.append(club_starts, len(club_order)),
+        "id_order": id_order,
+        "id_sorted": columns["player_id"][id_order],
+    }
+    for name, array in index.items():
+        np.save(os.path.join(directory, f"_{name}.npy"), array)
+
+    manifest = {
+        "version": FORMAT_VERSION,
+        "source": source_signature(csv_path),
+        "rows": rows,
+        "columns": header,
+    }
+    with open(os.path.join(directory, "manifest.json"), "w") as f:
+        json.dump(manifest, f)
+
+
+class PlayerStore:
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, "manifest.json"), "r") as f:
+            self.manifest = json.load(f)
+        self.columns = self.manifest["columns"]
+        self._arrays = {}
+
+        self.club_order = self._load("_club_order.npy")
+        self.club_keys = self._load("_club_keys.npy")
+        self.club_starts = self._load("_club_starts.npy")
+        self.id_order = self._load("_id_order.npy")
+        self.id_sorted = self._load("_id_sorted.npy")
+
+    @classmethod
+    def open(cls, csv_path, directory=None):
+        if directory is None:
+            stem = os.path.splitext(os.path.basename(csv_path))[0]
+            directory = os.path.join(CACHE_DIR, stem)
+
+        manifest_path = os.path.join(directory, "manifest.json")
+        manifest = None
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r") as f:
+                manifest = json.load(f)
+        if (manifest is None or manifest.get("version") != FORMAT_VERSION
+                or manifest.get("source") != source_signature(csv_path)):
+            build_store(csv_path, directory)
+        return cls(directory)
+
+    def _load(self, filename):
+        return np.load(os.path.join(self.directory, filename), mmap_mode="r")
+
+    def __len__(self):
+        return self.manifest["rows"]
+
+    def column(self, name):
+        if name not in self._arrays:
+            self._arrays[name] = self._load(column_filename(name))
+        return self._arrays[name]
+
+    def club_rows(self, club_id):
+        club_id = int(club_id)
+        i = np.searchsorted(self.club_keys, club_id)
+        if i == len(self.club_keys) or self.club_keys[i] != club_id:
+            return np.empty(0, dtype=np.intp)
+        return self.club_order[self.club_starts[i]:self.club_starts[i + 1]]
+
+    def player_row(self, player_id):
+        player_id = int(player_id)
+        i = np.searchsorted(self.id_sorted, player_id)
+        if i == len(self.id_sorted) or self.id_sorted[i] != player_id:
+            return None
+        return int(self.id_order[i])
+
+    def row(self, index, fields=None):
+        return {name: to_python(self.column(name)[index]) for name in (fields or self.columns)}
+
+    def player(self, player_id, fields=None):
+        index = self.player_row(player_id)
+        if index is None:
+            return None
+        return self.row(index, fields)
+
+    def squad(self, club_id, fields=SQUAD_FIELDS):
+        return [self.row(index, fields) for index in self.club_rows(club_id)]
+
+    def revision(self, club_id):
+        return 0
+
+    def club_columns(self, club_id, fields):
+        rows = self.club_rows(club_id)
+        return {name: numeric_column(self.column(name)[rows]) for name in fields}
+
+
+class SavePlayers:
+    def __init__(self, base, db):
+        self.base = base
+        self.db = db
+        self.overrides = {}
+        self.added = {}
+        self.club_members = {}
+        self.revisions = {}
+        self.changes = 0
+        self.load()
+
+    def load(self):
+        for player_id, added, fields in self.db.player_rows():
+            self.apply({"op": "add" if added else "set", "player_id": player_id, "fields": json.loads(fields)})
+
+    def apply(self, entry):
+        player_id = int(entry["player_id"])
+        self.changes += 1
+        self.touch(self.club_of(player_id))
+        if entry["op"] == "add":
+            fields = {"player_id": player_id}
+            fields.update(self.parse_fields(entry["fields"]))
+            self.move(player_id, None, fields.get("current_club_id"))
+            self.added[player_id] = fields
+        elif entry["op"] == "set":
+            fields = self.parse_fields(entry["fields"])
+            if "current_club_id" in fields:
+                self.move(player_id, self.club_of(player_id), fields["current_club_id"])
+            target = self.added.get(player_id)
+            if target is None:
+                target = self.overrides.setdefault(player_id, {})
+            target.update(fields)
+        self.touch(self.club_of(player_id))
+
+    def touch(self, club_id):
+        if club_id is not None:
+            self.revisions[club_id] = self.revisions.get(club_id, 0) + 1
+
+    def revision(self, club_id):
+        return self.revisions.get(int(club_id), 0)
+
+    def parse_fields(self, fields):
+        parsed = {}
+        for name, value in fields.items():
+            if name in DATE_COLUMNS and isinstance(value, str):
+                value = date.fromisoformat(value[:10])
+            elif name in ("player_id", "current_club_id") and value is not None:
+                value = int(value)
+            parsed[name] = value
+        return parsed
+
+    def move(self, player_id, old_club, new_club):
+        if old_club is not None:
+            self.club_members.get(old_club, set()).discard(player_id)
+        if new_club is not None:
+            self.club_members.setdefault(new_club, set()).add(player_id)
+
+    def club_of(self, player_id):
+        player = self.player(player_id, ["current_club_id"])
+        return player["current_club_id"] if player else None
+
+    def store(self, op, player_id, fields):
+        # The save keeps one row per touched player holding its merged
+        # changes, plus the effective club/position/OVR for the indexes.
+        # Memory is left alone: apply() the returned entry once the row is
+        # safely in the database.
+        player_id = int(player_id)
+        parsed = self.parse_fields(fields)
+        added = op == "add" or player_id in self.added
+        if op == "add":
+            stored = {"player_id": player_id, **parsed}
+        elif added:
+            stored = {**self.added[player_id], **parsed}
+        else:
+            stored = {**self.overrides.get(player_id, {}), **parsed}
+
+        if added:
+            effective = {name: stored.get(name) for name in INDEXED_FIELDS}
+        else:
+            effective = self.base.player(player_id, INDEXED_FIELDS)
+            effective.update({name: value for name, value in stored.items() if name in INDEXED_FIELDS})
+        self.db.save_player(player_id, added, stored, effective)
+        return {"op": op, "player_id": player_id, "fields": fields}
+
+    def record(self, op, player_id, fields):
+        self.apply(self.store(op, player_id, fields))
+
+    def transfer(self, player_id, club_id):
+        self.record("set", player_id, {"current_club_id": int(club_id)})
+
+    def set_attributes(self, player_id, **attributes):
+        self.record("set", player_id, attributes)
+
+    def set_contract(self, player_id, expiration_date, market_value=None):
+        fields = {"contract_expiration_date": str(expiration_date)[:10]}
+        if market_value is not None:
+            fields["market_value_in_eur"] = market_value
+        self.record("set", player_id, fields)
+
+    def add_player(self, player_id, **fields):
+        self.record("add", player_id, fields)
+
+    def reload(self):
+        # Drops changes applied in memory whose transaction rolled back.
+        self.overrides = {}
+        self.added = {}
+        self.club_members = {}
+        for club_id in list(self.revisions):
+            self.touch(club_id)
+        self.load()
+
+    def reset(self):
+        self.overrides = {}
+        self.added = {}
+        self.club_members = {}
+        self.changes += 1
+        # Revisions only ever grow so cached ratings can't match a later state.
+        for club_id in self.revisions:
+            self.touch(club_id)
+        self.db.clear_players()
+
+    def player(self, player_id, fields=None):
+        player_id = int(player_id)
+        if player_id in self.added:
+            added = self.added[player_id]
+            return {name: added.get(name) for name in (fields or self.base.columns)}
+
+        player = self.base.player(player_id, fields)
+        if player is not None and player_id in self.overrides:
+            player.update({name: value for name, value in self.overrides[player_id].items()
+                           if fields is None or name in fields})
+        return player
+
+    def squad(self, club_id, fields=SQUAD_FIELDS):
+        club_id = int(club_id)
+        squad = []
+        base_ids = self.base.column("player_id")
+        for index in self.base.club_rows(club_id):
+            player_id = int(base_ids[index])
+            if self.overrides.get(player_id, {}).get("current_club_id", club_id) != club_id:
+                continue
+            if player_id in self.club_members.get(club_id, ()):
+                continue
+            squad.append(self.player(player_id, fields))
+        for player_id in sorted(self.club_members.get(club_id, ())):
+            squad.append(self.player(player_id, fields))
+        return squad
+
+    def club_columns(self, club_id, fields):
+        club_id = int(club_id)
+        rows = self.base.club_rows(club_id)
+        base_ids = self.base.column("player_id")[rows]
+        changed = [i for i, player_id in enumerate(base_ids.tolist()) if player_id in self.overrides]
+        if not changed and not self.club_members.get(club_id):
+            return self.base.club_columns(club_id, fields)
+
+        # Untouched players come straight from the base columns; only the
+        # handful with overrides or transfers go through player().
+        keep = np.ones(len(rows), dtype=bool)
+        patched = {}
+        for i in changed:
+            player = self.player(base_ids[i], fields + ["current_club_id"])
+            if player["current_club_id"] != club_id or int(base_ids[i]) in self.club_members.get(club_id, ()):
+                keep[i] = False
+            else:
+                patched[i] = player
+        extra = [self.player(player_id, fields) for player_id in sorted(self.club_members.get(club_id, ()))]
+
+        columns = {}
+        for name in fields:
+            values = numeric_column(self.base.column(name)[rows])
+            for i, player in patched.items():
+                values[i] = MISSING_VALUE.get(values.dtype.kind) if player[name] is None else player[name]
+            added = [player[name] for player in extra]
+            columns[name] = np.concatenate([values[keep], numeric_column(added, values.dtype)])
+        return columns
+
+
+MISSING_VALUE = {"f": np.nan, "O": None}
+
+
+def numeric_column(values, dtype=None):
+    # Ratings code works on float arrays with NaN for missing numbers and on
+    # plain str arrays for text columns.
+    if dtype is not None:
+        values = [MISSING_VALUE.get(dtype.kind) if value is None else value for value in values]
+        return np.array(values, dtype=dtype)
+    values = np.asarray(values)
+    if values.dtype.kind in "iu":
+        return np.where(values == MISSING, np.nan, values).astype(np.float64)
+    if values.dtype.kind == "f":
+        return values.astype(np.float64)
+    if values.dtype.kind == "S":
+        return np.char.decode(values, "UTF-8").astype(object)
+    return values
+
+
+def diff_against_base(base, legacy):
+    base_rows = np.array([MISSING if row is None else row
+                          for row in map(base.player_row, legacy.column("player_id"))], dtype=np.intp)
+    known = base_rows != MISSING
+    changes = {}
+
+    for name in legacy.columns:
+        if name == "player_id" or name not in base.columns:
+            continue
+        values = legacy.column(name)
+        base_values = base.column(name)[np.where(known, base_rows, 0)]
+        if values.dtype.kind != base_values.dtype.kind:
+            differs = np.ones(len(values), dtype=bool)
+        elif values.dtype.kind == "M":
+            differs = (values != base_values) & ~(np.isnat(values) & np.isnat(base_values))
+        elif values.dtype.kind == "f":
+            differs = (values != base_values) & ~(np.isnan(values) & np.isnan(base_values))
+        else:
+            differs = values != base_values
+        for index in np.nonzero(differs & known)[0]:
+            changes.setdefault(int(index), {})[name] = to_python(values[index])
+
+    added = [int(index) for index in np.nonzero(~known)[0]]
+    return changes, added
+
+
+def migrate_legacy_players(save_num, players):
+    legacy_path = legacy_csv_path(save_num)
+    legacy = PlayerStore.open(legacy_path)
+
+    changes, added = diff_against_base(players.base, legacy)
+    player_ids = legacy.column("player_id")
+    with players.db.transaction():
+        players.reset()
+        for index in added:
+            players.add_player(player_ids[index], **{name: value for name, value in legacy.row(index).items()
+                                                     if name != "player_id"})
+        for index, fields in changes.items():
+            players.set_attributes(player_ids[index], **fields)
+
+    os.remove(legacy_path)
+    shutil.rmtree(legacy.directory, ignore_errors=True)
+
+
+def migrate_legacy_delta(save_num, players):
+    legacy_path = legacy_delta_path(save_num)
+    with players.db.transaction():
+        with open(legacy_path, "r", encoding="UTF-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    players.record(entry["op"], entry["player_id"], entry["fields"])
+    os.remove(legacy_path)
+
+
+def legacy_csv_path(save_num):
+    return f"data/assets/save{save_num}_players.csv"
+
+
+def legacy_delta_path(save_num):
+    return f"data/assets/save{save_num}_players.jsonl"
+
+
+def open_base_store():
+    signature = source_signature(BASE_PLAYERS)
+    with _open_lock:
+        cached = _open_stores.get(BASE_PLAYERS)
+        if cached is None or cached[0] != signature:
+            cached = (signature, PlayerStore.open(BASE_PLAYERS))
+            _open_stores[BASE_PLAYERS] = cached
+    return cached[1]
+
+
+def open_save_players(save_num):
+    with _open_lock:
+        base = open_base_store()
+        cached = _open_saves.get(save_num)
+        if cached is not None and cached.base is base:
+            return cached
+
+        players = SavePlayers(base, open_save_db(save_num))
+        if os.path.exists(legacy_csv_path(save_num)):
+            migrate_legacy_players(save_num, players)
+        if os.path.exists(legacy_delta_path(save_num)):
+            migrate_legacy_delta(save_num, players)
+        _open_saves[save_num] = players
+    return players
+
+
+def new_save_players(save_num):
+    # Replaces whatever instance a worker may have opened from the old
+    # career's rows, after it has finished storing it.
+    with _open_lock:
+        players = SavePlayers(open_base_store(), open_save_db(save_num))
+        players.reset()
+        _open_saves[save_num] = players
+    return players
@@ -0,0 +1,50 @@
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Prefetcher:
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+        self.jobs = {}
+
+    def run(self, task):
+        # A failed prefetch only means the scene loads that piece itself.
+        try:
+            task()
+        except Exception:
+            traceback.print_exc()
+
+    def schedule(self, name, tasks):
+        if name in self.jobs:
+            return
+        self.jobs[name] = [self.executor.submit(self.run, task) for task in tasks]
+
+    def cancel_others(self, name):
+        for other, futures in list(self.jobs.items()):
+            if other == name:
+                continue
+            for future in futures:
+                future.cancel()
+            del self.jobs[other]
+
+    def progress(self, name):
+        futures = self.jobs.get(name, [])
+        if not futures:
+            return 1.0
+        return sum(future.done() for future in futures) / len(futures)
+
+    def is_ready(self, name):
+        return all(future.done() for future in self.jobs.get(name, []))
+
+    def wait(self, name, on_progress=None):
+        while not self.is_ready(name):
+            if on_progress:
+                on_progress(self.progress(name))
+            time.sleep(1 / 60)
+
+    def forget(self, name):
+        self.jobs.pop(name, None)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,186 @@
+import json
+import os
+import time
+from collections import deque
+import numpy as np
+import pygame
+from .assets import text
+
+OVERLAY_KEY = pygame.K_F3
+TRACE_KEY = pygame.K_F4
+TRACE_DIR = "data/assets/cache/traces"
+HISTORY_FRAMES = 3000
+GRAPH_FRAMES = 240
+REFRESH_SECONDS = 0.25
+PANEL_SMOOTHING = 0.1
+TARGET_FRAME_MS = 1000 / 60
+
+OVERLAY_SIZE = (360, 300)
+GRAPH_HEIGHT = 60
+GRAPH_SCALE_MS = 50
+
+
+class FrameProfiler:
+    def __init__(self, timer=time.perf_counter):
+        self.timer = timer
+        self.visible = False
+        self.tracing = False
+        self.frame_times = deque(maxlen=HISTORY_FRAMES)
+        self.phase_times = {}
+        self.panel_times = {}
+        self.trace = []
+        self.scene = None
+        self.frame_start = None
+        self.last_mark = None
+        self.phases = []
+        self.panels = []
+        self.surface = None
+        self.refreshed = 0.0
+
+    def begin_frame(self, scene):
+        now = self.timer()
+        self.scene = scene
+        self.frame_start = now
+        self.last_mark = now
+        self.phases = []
+        self.panels = []
+
+    def mark(self, phase):
+        # Phases are back to back, so each mark closes the one before it.
+        now = self.timer()
+        self.phases.append((phase, self.last_mark, now - self.last_mark))
+        self.last_mark = now
+
+    def panel(self, name, start, seconds):
+        if self.visible or self.tracing:
+            self.panels.append((name, start, seconds))
+
+    def end_frame(self):
+        self.mark("idle")
+        frame = self.last_mark - self.frame_start
+        self.frame_times.append(frame * 1000)
+        for phase, _, seconds in self.phases:
+            times = self.phase_times.setdefault(phase, deque(maxlen=GRAPH_FRAMES))
+            times.append(seconds * 1000)
+        for name, _, seconds in self.panels:
+            previous = self.panel_times.get(name, seconds * 1000)
+            self.panel_times[name] = previous + (seconds * 1000 - previous) * PANEL_SMOOTHING
+        if self.tracing:
+            self.trace.append((self.scene, self.frame_start, frame, self.phases, self.panels))
+
+    def handle_events(self, events, page):
+        # The profiler's hotkeys never reach the scene, so they can't trigger
+        # anything on pages that react to any key press.
+        remaining = []
+        for event in events:
+            if event.type == pygame.KEYDOWN and event.key == OVERLAY_KEY:
+                self.visible = not self.visible
+                self.surface = None
+                if not self.visible:
+                    page.full_redraw = True
+            elif event.type == pygame.KEYDOWN and event.key == TRACE_KEY:
+                self.toggle_trace()
+            else:
+                remaining.append(event)
+        return remaining
+
+    def lows(self):
+        # The 1% and 0.1% lows are the frame rates of the slowest 1% and
+        # 0.1% of recent frames.
+        if not self.frame_times:
+            return 0.0, 0.0, 0.0
+        times = np.fromiter(self.frame_times, dtype=np.float64)
+        average = 1000 / times.mean()
+        low, lowest = np.percentile(times, [99, 99.9])
+        return float(average), float(1000 / low), float(1000 / lowest)
+
+    def stats(self):
+        fps, low, lowest = self.lows()
+        return {
+            "fps": fps,
+            "low_1": low,
+            "low_01": lowest,
+            "phases": {phase: float(np.mean(times)) for phase, times in self.phase_times.items()},
+            "panels": dict(self.panel_times),
+        }
+
+    def draw(self, screen, dirty_rects):
+        if not self.visible:
+            return dirty_rects
+        now = self.timer()
+        if self.surface is None or now - self.refreshed >= REFRESH_SECONDS:
+            self.surface = self.compose()
+            self.refreshed = now
+        rect = screen.blit(self.surface, (10, 10))
+        if dirty_rects is not None:
+            dirty_rects = dirty_rects + [rect]
+        return dirty_rects
+
+    def compose(self):
+        surface = pygame.Surface(OVERLAY_SIZE)
+        surface.fill((20, 20, 20))
+        font = text.font(16)
+        stats = self.stats()
+
+        # Rendered straight from the font so the constantly changing numbers
+        # don't churn the shared text cache.
+        lines = [f"{self.scene}  {stats['fps']:.0f} fps  1% {stats['low_1']:.0f}  0.1% {stats['low_01']:.0f}"]
+        lines.append("  ".join(f"{phase} {ms:.1f}" for phase, ms in stats["phases"].items()))
+        if self.tracing:
+            lines.append(f"tracing ({len(self.trace)} frames)")
+        panels = sorted(stats["panels"].items(), key=lambda item: item[1], reverse=True)
+        rows = [(line, "") for line in lines] + [(name, f"{ms:.2f} ms") for name, ms in panels[:8]]
+        for i, (label, value) in enumerate(rows):
+            surface.blit(font.render(label, True, (230, 230, 230)), (8, 8 + i * 18))
+            if value:
+                value_text = font.render(value, True, (230, 230, 230))
+                surface.blit(value_text, (OVERLAY_SIZE[0] - 8 - value_text.get_width(), 8 + i * 18))
+
+        graph_top = OVERLAY_SIZE[1] - GRAPH_HEIGHT - 8
+        target = graph_top + GRAPH_HEIGHT - GRAPH_HEIGHT * TARGET_FRAME_MS / GRAPH_SCALE_MS
+        pygame.draw.line(surface, (90, 90, 90), (8, target), (OVERLAY_SIZE[0] - 8, target))
+        width = (OVERLAY_SIZE[0] - 16) / GRAPH_FRAMES
+        recent = list(self.frame_times)[-GRAPH_FRAMES:]
+        for i, ms in enumerate(recent):
+            height = min(ms / GRAPH_SCALE_MS, 1) * GRAPH_HEIGHT
+            color = (90, 200, 90) if ms <= TARGET_FRAME_MS * 1.5 else (220, 80, 60)
+            x = 8 + i * width
+            pygame.draw.line(surface, color, (x, graph_top + GRAPH_HEIGHT), (x, graph_top + GRAPH_HEIGHT - height))
+        return surface
+
+    def toggle_trace(self):
+        if self.tracing:
+            return self.dump_trace()
+        self.trace = []
+        self.tracing = True
+        return None
+
+    def dump_trace(self, path=None):
+        # Chrome trace event format, so a session opens directly in
+        # chrome://tracing or Perfetto.
+        self.tracing = False
+        if not self.trace:
+            return None
+        if path is None:
+            os.makedirs(TRACE_DIR, exist_ok=True)
+            path = os.path.join(TRACE_DIR, time.strftime("trace-%Y%m%d-%H%M%S.json"))
+
+        origin = self.trace[0][1]
+        events = []
+        for scene, start, frame, phases, panels in self.trace:
+            events.append({"name": "frame", "cat": "frame", "ph": "X", "pid": 0, "tid": 0,
+                           "ts": (start - origin) * 1e6, "dur": frame * 1e6, "args": {"scene": scene}})
+            for phase, phase_start, seconds in phases:
+                events.append({"name": phase, "cat": "phase", "ph": "X", "pid": 0, "tid": 0,
+                               "ts": (phase_start - origin) * 1e6, "dur": seconds * 1e6})
+            for name, panel_start, seconds in panels:
+                events.append({"name": name, "cat": "panel", "ph": "X", "pid": 0, "tid": 0,
+                               "ts": (panel_start - origin) * 1e6, "dur": seconds * 1e6, "args": {"scene": scene}})
+
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, separators=(",", ":"))
+        self.trace = []
+        return path
+
+
+profiler = FrameProfiler()
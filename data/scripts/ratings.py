@@ -0,0 +1,99 @@
+import weakref
+import numpy as np
+
+ATTACK, MIDFIELD, DEFENCE, KEEPER = range(4)
+DEFAULT_RATINGS = np.full(4, 70.0)
+
+FORMATION = {"Defender": 4, "Midfield": 4, "Attack": 2}
+OUTFIELD_POSITIONS = list(FORMATION)
+OUTFIELD_ATTRIBUTES = ["PAC", "SHO", "PAS", "DRI", "DEF", "PHY"]
+KEEPER_ATTRIBUTES = ["GK Diving", "GK Handling", "GK Positioning", "GK Reflexes"]
+RATING_FIELDS = ["player_id", "position", "OVR", "overall"] + OUTFIELD_ATTRIBUTES + KEEPER_ATTRIBUTES
+
+# How much each face attribute feeds the attack, midfield and defence
+# composites (columns follow OUTFIELD_ATTRIBUTES).
+COMPOSITES = np.array([
+    [0.20, 0.45, 0.00, 0.35, 0.00, 0.00],
+    [0.00, 0.00, 0.50, 0.25, 0.00, 0.25],
+    [0.15, 0.00, 0.00, 0.00, 0.60, 0.25],
+])
+
+# How much each line of the lineup counts towards each composite (rows follow
+# OUTFIELD_POSITIONS).
+LINE_WEIGHTS = np.array([
+    [0.0, 0.3, 1.0],
+    [0.5, 1.0, 0.4],
+    [1.0, 0.3, 0.0],
+])
+
+_cache = weakref.WeakKeyDictionary()
+
+
+def select_lineup(columns):
+    # Best keeper plus the strongest players per line, topped up from the
+    # remaining outfielders when a line is short.
+    strength = np.where(np.isnan(columns["OVR"]), columns["overall"], columns["OVR"])
+    strength = np.nan_to_num(strength, nan=0.0)
+    positions = columns["position"]
+    order = np.argsort(-strength, kind="stable")
+
+    keepers = order[positions[order] == "Goalkeeper"]
+    keeper = keepers[:1]
+    lines = {}
+    used = set(keeper.tolist())
+    for position, count in FORMATION.items():
+        lines[position] = order[positions[order] == position][:count]
+        used.update(lines[position].tolist())
+
+    spare = [i for i in order.tolist() if i not in used and positions[i] != "Goalkeeper"]
+    for position, count in FORMATION.items():
+        missing = count - len(lines[position])
+        if missing > 0:
+            lines[position] = np.concatenate([lines[position], np.array(spare[:missing], dtype=np.intp)])
+            spare = spare[missing:]
+    return keeper, lines, strength
+
+
+def compute_ratings(columns, lineup=None):
+    if lineup is not None:
+        chosen = np.isin(columns["player_id"], np.asarray(lineup, dtype=np.float64))
+        columns = {name: values[chosen] for name, values in columns.items()}
+    if len(columns["player_id"]) == 0:
+        return DEFAULT_RATINGS.copy()
+
+    keeper, lines, strength = select_lineup(columns)
+
+    # Missing face stats fall back to the player's overall rating.
+    attributes = np.column_stack([columns[name] for name in OUTFIELD_ATTRIBUTES])
+    attributes = np.where(np.isnan(attributes), strength[:, None], attributes)
+    composites = attributes @ COMPOSITES.T
+
+    weights = np.zeros((len(strength), len(OUTFIELD_POSITIONS)))
+    for i, position in enumerate(OUTFIELD_POSITIONS):
+        weights[lines[position], i] = 1
+    line_weights = weights @ LINE_WEIGHTS
+    totals = line_weights.sum(axis=0)
+    outfield = np.where(totals > 0, (line_weights * composites).sum(axis=0) / np.maximum(totals, 1e-9),
+                        DEFAULT_RATINGS[:3])
+
+    if len(keeper):
+        keeper_stats = np.array([columns[name][keeper[0]] for name in KEEPER_ATTRIBUTES])
+        keeper_rating = np.nanmean(keeper_stats) if not np.isnan(keeper_stats).all() else strength[keeper[0]]
+    else:
+        keeper_rating = DEFAULT_RATINGS[KEEPER] - 20
+    return np.append(outfield, keeper_rating)
+
+
+def team_ratings(players, club_id, lineup=None):
+    # players is a PlayerStore or SavePlayers; its per-club revision changes
+    # whenever a player at the club is edited or transferred.
+    fingerprint = (str(club_id), players.revision(club_id), tuple(lineup) if lineup is not None else None)
+    cached = _cache.setdefault(players, {})
+    if fingerprint not in cached:
+        columns = players.club_columns(club_id, RATING_FIELDS)
+        cached[fingerprint] = compute_ratings(columns, lineup)
+    return cached[fingerprint]
+
+
+def league_ratings(players, club_ids):
+    return np.array([team_ratings(players, club_id) for club_id in club_ids])
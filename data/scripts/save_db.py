@@ -0,0 +1,382 @@
+import json
+import os
+import random
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from .gen_schedule import FixtureCalendar, SEASON_START, generate_league_schedules
+from .clubs import club_registry
+
+SCHEMA_VERSION = 2
+DEFAULT_META = {"club_id": "", "season": "", "staff": [], "date": ""}
+INTERNAL_KEYS = {"schema_version", "seed", "transfer_date"}
+FIXTURE_COLUMNS = "f.id, f.home, f.away, f.date, f.league_code, r.home_score, r.away_score"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fixtures (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    home TEXT NOT NULL,
+    away TEXT NOT NULL,
+    league_code TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS fixtures_date ON fixtures (date);
+CREATE INDEX IF NOT EXISTS fixtures_home ON fixtures (home, date);
+CREATE INDEX IF NOT EXISTS fixtures_away ON fixtures (away, date);
+CREATE TABLE IF NOT EXISTS results (
+    fixture_id INTEGER PRIMARY KEY REFERENCES fixtures (id) ON DELETE CASCADE,
+    home_score INTEGER NOT NULL,
+    away_score INTEGER NOT NULL,
+    stats TEXT NOT NULL DEFAULT '{}',
+    log BLOB
+);
+CREATE TABLE IF NOT EXISTS finances (
+    club_id TEXT PRIMARY KEY,
+    balance INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ledger (
+    id INTEGER PRIMARY KEY,
+    club_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    reason TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS ledger_club ON ledger (club_id, date);
+CREATE TABLE IF NOT EXISTS players (
+    player_id INTEGER PRIMARY KEY,
+    added INTEGER NOT NULL DEFAULT 0,
+    current_club_id INTEGER,
+    position TEXT,
+    sub_position TEXT,
+    OVR INTEGER,
+    fields TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS players_club ON players (current_club_id);
+CREATE INDEX IF NOT EXISTS players_position ON players (position, OVR);
+CREATE INDEX IF NOT EXISTS players_ovr ON players (OVR);
+"""
+
+_open_dbs = {}
+_open_lock = threading.Lock()
+
+
+def db_path(save_num):
+    return f"data/assets/save{save_num}.db"
+
+
+def legacy_paths(path):
+    stem = os.path.splitext(path)[0]
+    return f"{stem}.json", f"{stem}_schedule.json"
+
+
+def fixture_row(row):
+    fixture_id, home, away, date, league_code, home_score, away_score = row
+    return {
+        "fixture_id": fixture_id,
+        "home": home,
+        "away": away,
+        "home_score": "" if home_score is None else home_score,
+        "away_score": "" if away_score is None else away_score,
+        "date": date,
+        "league_code": league_code,
+    }
+
+
+class SaveDatabase:
+    def __init__(self, path):
+        self.path = path
+        # The connection is shared with the save writer and prefetch threads;
+        # the lock serialises every statement and transaction. It is the
+        # last lock taken: player_store's open lock comes before it.
+        self.lock = threading.RLock()
+        self.depth = 0
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        with self.transaction():
+            for statement in SCHEMA.split(";"):
+                if statement.strip():
+                    self.connection.execute(statement)
+            version = self.get("schema_version")
+            if version is None:
+                self.set("schema_version", SCHEMA_VERSION)
+                self.seed_finances()
+            elif version < 2:
+                self.connection.execute("ALTER TABLE results ADD COLUMN log BLOB")
+                self.set("schema_version", SCHEMA_VERSION)
+
+    @contextmanager
+    def transaction(self):
+        with self.lock:
+            if self.depth == 0:
+                self.connection.execute("BEGIN IMMEDIATE")
+            self.depth += 1
+            try:
+                yield self.connection
+            except BaseException:
+                self.depth -= 1
+                if self.depth == 0:
+                    self.connection.execute("ROLLBACK")
+                raise
+            self.depth -= 1
+            if self.depth == 0:
+                self.connection.execute("COMMIT")
+
+    def query(self, sql, params=()):
+        with self.lock:
+            return self.connection.execute(sql, params).fetchall()
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+    def get(self, key, default=None):
+        rows = self.query("SELECT value FROM meta WHERE key = ?", (key,))
+        return json.loads(rows[0][0]) if rows else default
+
+    def set(self, key, value):
+        with self.transaction() as connection:
+            connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def read_meta(self):
+        meta = dict(DEFAULT_META)
+        meta.update({key: json.loads(value) for key, value in self.query("SELECT key, value FROM meta")
+                     if key not in INTERNAL_KEYS})
+        return meta
+
+    def write_meta(self, meta):
+        with self.transaction():
+            for key, value in meta.items():
+                self.set(key, value)
+
+
+    def seed_finances(self):
+        with self.transaction() as connection:
+            connection.execute("DELETE FROM finances")
+            connection.execute("DELETE FROM ledger")
+            connection.executemany("INSERT INTO finances (club_id, balance) VALUES (?, ?)", club_registry().budgets().items())
+
+    def balance(self, club_id):
+        rows = self.query("SELECT balance FROM finances WHERE club_id = ?", (str(club_id),))
+        return rows[0][0] if rows else 0
+
+    def balances(self):
+        return dict(self.query("SELECT club_id, balance FROM finances"))
+
+    def set_balance(self, club_id, balance):
+        with self.transaction() as connection:
+            connection.execute("INSERT OR REPLACE INTO finances (club_id, balance) VALUES (?, ?)",
+                               (str(club_id), int(balance)))
+
+    def adjust_balance(self, club_id, amount, date, reason=""):
+        with self.transaction() as connection:
+            connection.execute("UPDATE finances SET balance = balance + ? WHERE club_id = ?", (int(amount), str(club_id)))
+            connection.execute("INSERT INTO ledger (club_id, date, amount, reason) VALUES (?, ?, ?, ?)",
+                               (str(club_id), str(date)[:10], int(amount), reason))
+
+    def ledger(self, club_id):
+        return self.query("SELECT date, amount, reason FROM ledger WHERE club_id = ? ORDER BY date, id", (str(club_id),))
+
+
+    def replace_fixtures(self, fixtures):
+        with self.transaction() as connection:
+            connection.execute("DELETE FROM results")
+            connection.execute("DELETE FROM fixtures")
+            for fixture in sorted(fixtures, key=lambda x: x["date"]):
+                cursor = connection.execute(
+                    "INSERT INTO fixtures (date, home, away, league_code) VALUES (?, ?, ?, ?)",
+                    (fixture["date"], fixture["home"], fixture["away"], fixture.get("league_code", "")))
+                if fixture.get("home_score", "") != "" and fixture.get("away_score", "") != "":
+                    connection.execute("INSERT INTO results (fixture_id, home_score, away_score) VALUES (?, ?, ?)",
+                                       (cursor.lastrowid, int(fixture["home_score"]), int(fixture["away_score"])))
+
+    def fixture_count(self):
+        return self.query("SELECT COUNT(*) FROM fixtures")[0][0]
+
+    def fixtures(self, where="", params=(), limit=None):
+        sql = f"SELECT {FIXTURE_COLUMNS} FROM fixtures f LEFT JOIN results r ON r.fixture_id = f.id {where} ORDER BY f.date, f.id"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return [fixture_row(row) for row in self.query(sql, params)]
+
+    def fixtures_on(self, date):
+        return self.fixtures("WHERE f.date = ?", (str(date)[:10],))
+
+    def unplayed_fixtures(self, until_date):
+        return self.fixtures("WHERE r.fixture_id IS NULL AND f.date <= ?", (str(until_date)[:10],))
+
+    def club_fixtures(self, club_id, after_date="", limit=None):
+        club_id = str(club_id)
+        return self.fixtures("WHERE f.id IN (SELECT id FROM fixtures WHERE home = ? AND date > ? "
+                             "UNION ALL SELECT id FROM fixtures WHERE away = ? AND date > ?)",
+                             (club_id, str(after_date)[:10], club_id, str(after_date)[:10]), limit)
+
+    def next_date(self, after_date=""):
+        rows = self.query("SELECT MIN(date) FROM fixtures WHERE date > ?", (str(after_date)[:10],))
+        return rows[0][0]
+
+    def fixture_dates(self, after_date, until_date):
+        rows = self.query("SELECT DISTINCT date FROM fixtures WHERE date > ? AND date <= ? ORDER BY date",
+                          (str(after_date)[:10], str(until_date)[:10]))
+        return [row[0] for row in rows]
+
+    def derived_seed(self, key):
+        # Seeds derive from one seed per career, so a save replays
+        # identically while a new career in the same slot plays out afresh.
+        with self.transaction():
+            seed = self.get("seed")
+            if seed is None:
+                seed = random.getrandbits(63)
+                self.set("seed", seed)
+        return random.Random(f"{seed}:{key}").getrandbits(63)
+
+    def match_seed(self, fixture_id):
+        return self.derived_seed(fixture_id)
+
+    def record_results(self, results):
+        # One matchday is one transaction: either every result lands or none.
+        # Each result is (fixture_id, result, log) with log the encoded event
+        # stream from match_log.
+        with self.transaction() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO results (fixture_id, home_score, away_score, stats, log) VALUES (?, ?, ?, ?, ?)",
+                [(fixture_id, result["home_score"], result["away_score"], json.dumps(result), log)
+                 for fixture_id, result, log in results])
+
+    def result(self, fixture_id):
+        rows = self.query("SELECT home_score, away_score, stats FROM results WHERE fixture_id = ?", (fixture_id,))
+        if not rows:
+            return None
+        result = json.loads(rows[0][2])
+        result.update(home_score=rows[0][0], away_score=rows[0][1])
+        return result
+
+    def match_log(self, fixture_id):
+        rows = self.query("SELECT log FROM results WHERE fixture_id = ?", (fixture_id,))
+        return rows[0][0] if rows else None
+
+    def log_size(self):
+        return self.query("SELECT COALESCE(SUM(LENGTH(log)), 0) FROM results")[0][0]
+
+
+    def player_rows(self):
+        return self.query("SELECT player_id, added, fields FROM players ORDER BY player_id")
+
+    def save_player(self, player_id, added, fields, effective):
+        with self.transaction() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO players (player_id, added, current_club_id, position, sub_position, OVR, fields) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (int(player_id), int(added), effective.get("current_club_id"), effective.get("position"),
+                 effective.get("sub_position"), effective.get("OVR"), json.dumps(fields, default=str)))
+
+    def clear_players(self):
+        with self.transaction() as connection:
+            connection.execute("DELETE FROM players")
+
+    def reset(self):
+        with self.transaction() as connection:
+            connection.execute("DELETE FROM results")
+            connection.execute("DELETE FROM fixtures")
+            connection.execute("DELETE FROM players")
+            connection.execute("DELETE FROM meta WHERE key IN ('seed', 'transfer_date')")
+            self.seed_finances()
+
+
+class SaveCalendar:
+    def __init__(self, db):
+        self.db = db
+
+    def __len__(self):
+        return self.db.fixture_count()
+
+    def fixtures_on(self, date):
+        return self.db.fixtures_on(date)
+
+    def club_fixtures(self, club_id):
+        return self.db.club_fixtures(club_id)
+
+    def upcoming(self, club_id, after_date="", limit=None):
+        return self.db.club_fixtures(club_id, after_date, limit)
+
+    def next_fixture(self, club_id, after_date=""):
+        fixtures = self.db.club_fixtures(club_id, after_date, limit=1)
+        return fixtures[0] if fixtures else None
+
+    def next_date(self, after_date=""):
+        return self.db.next_date(after_date)
+
+
+def migrate_legacy_save(db):
+    meta_path, schedule_path = legacy_paths(db.path)
+    with db.transaction():
+        if os.path.exists(meta_path):
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            money = meta.pop("money", None)
+            db.write_meta(meta)
+            if money is not None and meta.get("club_id"):
+                db.set_balance(meta["club_id"], money)
+        if os.path.exists(schedule_path):
+            db.replace_fixtures(FixtureCalendar.load(schedule_path).fixtures)
+    for path in (meta_path, schedule_path):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def open_database(path):
+    with _open_lock:
+        db = _open_dbs.get(path)
+        if db is None:
+            db = SaveDatabase(path)
+            migrate_legacy_save(db)
+            _open_dbs[path] = db
+    return db
+
+
+def open_save_db(save_num):
+    return open_database(db_path(save_num))
+
+
+def read_meta(path):
+    return open_database(path).read_meta()
+
+
+def write_meta(path, meta):
+    open_database(path).write_meta(meta)
+
+
+def read_money(path, meta):
+    # The club's balance comes from finances, which matches and transfers
+    # change directly.
+    return open_database(path).balance(meta["club_id"]) if meta.get("club_id") else 0
+
+
+def load_calendar(save_num):
+    return SaveCalendar(open_save_db(save_num))
+
+
+def schedule(save_num, start_date=SEASON_START):
+    db = open_save_db(save_num)
+    db.replace_fixtures(generate_league_schedules(start_date).fixtures)
+    return SaveCalendar(db)
+
+
+def reset_save(save_num):
+    open_save_db(save_num).reset()
+
+
+if __name__ == "__main__":
+    from .player_store import open_save_players
+
+    for save_num in sys.argv[1:] or ["1", "2", "3"]:
+        db = open_save_db(save_num)
+        open_save_players(save_num)
+        print(f"save {save_num}: {db.fixture_count()} fixtures -> {db.path}")
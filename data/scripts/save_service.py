@@ -0,0 +1,136 @@
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+from .save_db import db_path, read_meta, write_meta, read_money
+
+CONFIG_PATH = "data/assets/config.json"
+COALESCE_SECONDS = 0.25
+
+
+def save_path(save_num):
+    return db_path(save_num)
+
+
+def read_json(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def write_atomic(path, data):
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+# Plain JSON documents are replaced atomically on disk; a save slot's
+# metadata lives in its SQLite database and is written in one transaction.
+# Live fields are owned by other tables: they are read fresh on every read
+# and never cached or written back, so a coalesced write can't undo them.
+FORMATS = {
+    ".json": (read_json, write_atomic, {}),
+    ".db": (read_meta, write_meta, {"money": read_money}),
+}
+
+
+def document_format(path):
+    return FORMATS[os.path.splitext(path)[1]]
+
+
+class SaveService:
+    def __init__(self, delay=COALESCE_SECONDS):
+        self.delay = delay
+        self.documents = {}
+        self.pending = {}
+        self.writing = False
+        self.flushing = 0
+        self.condition = threading.Condition()
+        self.thread = None
+        self.writes = 0
+        self.coalesced = 0
+
+    def read(self, path):
+        read, _, live = document_format(path)
+        with self.condition:
+            data = self.documents.get(path)
+        if data is None:
+            data = read(path)
+            with self.condition:
+                data = self.documents.setdefault(path, data)
+        data = copy.deepcopy(data)
+        for key, read_field in live.items():
+            data[key] = read_field(path, data)
+        return data
+
+    def write(self, path, data):
+        # Callers only ever touch the in-memory copy; the disk write happens
+        # later on the writer thread, and only the newest version per file.
+        live = document_format(path)[2]
+        data = {key: copy.deepcopy(value) for key, value in data.items() if key not in live}
+        with self.condition:
+            self.documents[path] = data
+            if path in self.pending:
+                self.coalesced += 1
+            self.pending[path] = data
+            self.start()
+            self.condition.notify_all()
+
+    def update(self, path, **fields):
+        data = self.read(path)
+        data.update(fields)
+        self.write(path, data)
+        return data
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="save-writer", daemon=True)
+            self.thread.start()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+                # Give bursts of writes (arrow clicks, chained updates) a
+                # moment to land so they hit the disk once.
+                deadline = time.monotonic() + self.delay
+                while not self.flushing and deadline > time.monotonic():
+                    self.condition.wait(deadline - time.monotonic())
+                batch, self.pending = self.pending, {}
+                self.writing = True
+
+            for path, data in batch.items():
+                try:
+                    document_format(path)[1](path, data)
+                    self.writes += 1
+                except (OSError, sqlite3.Error):
+                    traceback.print_exc()
+
+            with self.condition:
+                self.writing = False
+                self.condition.notify_all()
+
+    def flush(self, timeout=None):
+        with self.condition:
+            self.flushing += 1
+            self.condition.notify_all()
+            done = self.condition.wait_for(lambda: not self.pending and not self.writing, timeout)
+            self.flushing -= 1
+        return done
+
+    def stats(self):
+        return {
+            "documents": len(self.documents),
+            "pending": len(self.pending),
+            "writes": self.writes,
+            "coalesced": self.coalesced,
+        }
+
+
+saves = SaveService()
@@ -0,0 +1,92 @@
+import importlib
+from collections import OrderedDict
+
+DEFAULT_MEMORY_CAP = 64 * 1024 * 1024
+
+
+class SceneManager:
+    def __init__(self, screen, pages, prefetcher, on_loading=None, memory_cap=DEFAULT_MEMORY_CAP, default="menu"):
+        self.screen = screen
+        self.pages = pages
+        self.prefetcher = prefetcher
+        self.on_loading = on_loading
+        self.memory_cap = memory_cap
+        self.default = default
+        self.scenes = OrderedDict()
+        self.current_name = None
+        self.current = None
+        self.created = 0
+        self.evictions = 0
+
+    def page_class(self, name):
+        # Pages may be given as "module:Class" and are imported on first use.
+        page = self.pages[name]
+        if isinstance(page, str):
+            module_name, class_name = page.split(":")
+            page = getattr(importlib.import_module(module_name), class_name)
+            self.pages[name] = page
+        return page
+
+    def preload(self, name):
+        # Runs on the prefetch thread, so a scene's import happens there too.
+        for task in self.page_class(name).preload_tasks(self.screen):
+            self.prefetcher.run(task)
+
+    def create(self, name):
+        page_class = self.page_class(name)
+
+        self.prefetcher.cancel_others(name)
+        self.prefetcher.schedule(name, page_class.preload_tasks(self.screen))
+        if not self.prefetcher.is_ready(name):
+            self.prefetcher.wait(name, self.on_loading)
+        self.prefetcher.forget(name)
+
+        self.created += 1
+        return page_class(self.screen)
+
+    def switch(self, name):
+        if name not in self.pages:
+            name = self.default
+
+        if self.current is not None:
+            self.current.on_exit()
+
+        # Scenes that are still alive skip construction entirely; on_enter
+        # only refreshes whatever may have changed while they were idle.
+        scene = self.scenes.pop(name, None)
+        if scene is None:
+            scene = self.create(name)
+        self.scenes[name] = scene
+        self.current_name = name
+        self.current = scene
+        scene.on_enter()
+
+        self.evict()
+        for next_name in scene.next_pages:
+            if next_name not in self.scenes:
+                self.prefetcher.schedule(next_name, [lambda next_name=next_name: self.preload(next_name)])
+        return scene
+
+    def memory_usage(self):
+        return sum(scene.memory_usage() for scene in self.scenes.values())
+
+    def evict(self):
+        while self.memory_usage() > self.memory_cap:
+            idle = next((name for name in self.scenes if name != self.current_name), None)
+            if idle is None:
+                break
+            del self.scenes[idle]
+            self.evictions += 1
+
+    def set_memory_cap(self, memory_cap):
+        self.memory_cap = memory_cap
+        self.evict()
+
+    def stats(self):
+        return {
+            "scenes": list(self.scenes),
+            "bytes": self.memory_usage(),
+            "memory_cap": self.memory_cap,
+            "created": self.created,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,98 @@
+import numpy as np
+from .engine import EVENT_TYPES, EVENTS_PER_MATCH, home_share, event_weights
+from .player_store import open_base_store
+from .ratings import league_ratings
+from .clubs import club_registry
+
+TOP_SPOTS = 4
+
+
+def goal_probabilities(ratings, home, away):
+    # Per-fixture chance that an event is a home goal / an away goal, from
+    # the same model MatchEngine samples its timeline from.
+    goal = EVENT_TYPES.index("goal")
+    share = home_share(ratings[home], ratings[away])
+    home_goal = share * event_weights(ratings[home], ratings[away])[:, goal]
+    away_goal = (1 - share) * event_weights(ratings[away], ratings[home])[:, goal]
+    return home_goal, away_goal
+
+
+def double_round_robin(club_count):
+    home, away = np.nonzero(~np.eye(club_count, dtype=bool))
+    return home, away
+
+
+def simulate_scores(rng, simulations, home_goal, away_goal):
+    low, high = EVENTS_PER_MATCH
+    events = rng.integers(low, high + 1, size=(simulations, len(home_goal)))
+    home_goals = rng.binomial(events, home_goal)
+    away_goals = rng.binomial(events - home_goals, away_goal / (1 - home_goal))
+    return home_goals, away_goals
+
+
+def simulate_tables(rng, simulations, club_count, home, away, goal_chances):
+    home_goals, away_goals = simulate_scores(rng, simulations, *goal_chances)
+
+    home_matrix = np.zeros((len(home), club_count))
+    home_matrix[np.arange(len(home)), home] = 1
+    away_matrix = np.zeros((len(away), club_count))
+    away_matrix[np.arange(len(away)), away] = 1
+
+    home_points = np.where(home_goals > away_goals, 3, np.where(home_goals == away_goals, 1, 0))
+    away_points = np.where(away_goals > home_goals, 3, np.where(home_goals == away_goals, 1, 0))
+
+    points = home_points @ home_matrix + away_points @ away_matrix
+    goals_for = home_goals @ home_matrix + away_goals @ away_matrix
+    goals_against = away_goals @ home_matrix + home_goals @ away_matrix
+    return points, goals_for, goals_against
+
+
+def rank_tables(rng, points, goals_for, goals_against):
+    goal_difference = goals_for - goals_against
+    tiebreak = rng.random(points.shape)
+    key = points * 1e6 + (goal_difference + 1000) * 1e3 + goals_for + tiebreak
+    order = np.argsort(-key, axis=1)
+    positions = np.empty_like(order)
+    np.put_along_axis(positions, order, np.arange(points.shape[1])[None, :], axis=1)
+    return positions
+
+
+def simulate_season(league_code, simulations=10000, seed=None, relegation_spots=3, batch_size=2000, players=None):
+    clubs = club_registry().league_clubs(league_code)
+    if not clubs:
+        raise ValueError(f"Unknown league code: {league_code}")
+
+    rng = np.random.default_rng(seed)
+    club_count = len(clubs)
+    home, away = double_round_robin(club_count)
+    ratings = league_ratings(players or open_base_store(), [club.club_id for club in clubs])
+    goal_chances = goal_probabilities(ratings, home, away)
+
+    titles = np.zeros(club_count)
+    top = np.zeros(club_count)
+    relegations = np.zeros(club_count)
+    total_points = np.zeros(club_count)
+
+    done = 0
+    while done < simulations:
+        batch = min(batch_size, simulations - done)
+        points, goals_for, goals_against = simulate_tables(rng, batch, club_count, home, away, goal_chances)
+        positions = rank_tables(rng, points, goals_for, goals_against)
+
+        titles += (positions == 0).sum(axis=0)
+        top += (positions < TOP_SPOTS).sum(axis=0)
+        relegations += (positions >= club_count - relegation_spots).sum(axis=0)
+        total_points += points.sum(axis=0)
+        done += batch
+
+    outcomes = []
+    for i, club in enumerate(clubs):
+        outcomes.append({
+            "club_id": club.club_id,
+            "club_name": club.club_name,
+            "title": titles[i] / simulations,
+            "top4": top[i] / simulations,
+            "relegation": relegations[i] / simulations,
+            "mean_points": total_points[i] / simulations,
+        })
+    return sorted(outcomes, key=lambda x: x["mean_points"], reverse=True)
@@ -0,0 +1,60 @@
+import time
+
+SECONDS_PER_TICK = 2.0
+MAX_FRAME_SECONDS = 0.25
+
+
+class SimulationClock:
+    def __init__(self, seconds_per_tick=SECONDS_PER_TICK, speed=1.0, max_frame=MAX_FRAME_SECONDS, timer=time.perf_counter):
+        self.seconds_per_tick = seconds_per_tick
+        self.speed = speed
+        self.max_frame = max_frame
+        self.timer = timer
+        self.paused = False
+        self.accumulator = 0.0
+        self.ticks = 0
+        self.last = None
+
+    def start(self):
+        self.accumulator = 0.0
+        self.ticks = 0
+        self.last = self.timer()
+
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        # Restarting the frame timer means the time spent paused is never
+        # fed into the accumulator.
+        self.paused = False
+        self.last = self.timer()
+
+    def toggle_pause(self):
+        if self.paused:
+            self.resume()
+        else:
+            self.pause()
+
+    def set_speed(self, speed):
+        self.speed = speed
+
+    def update(self):
+        now = self.timer()
+        if self.last is None:
+            self.last = now
+        # A hitch only ever costs a quarter second of game time, so a slow
+        # frame can't dump minutes of events at once.
+        frame = min(now - self.last, self.max_frame)
+        self.last = now
+        if self.paused:
+            return 0
+
+        self.accumulator += frame * self.speed
+        ticks = int(self.accumulator // self.seconds_per_tick)
+        self.accumulator -= ticks * self.seconds_per_tick
+        self.ticks += ticks
+        return ticks
+
+    @property
+    def alpha(self):
+        return self.accumulator / self.seconds_per_tick
@@ -0,0 +1,128 @@
+import importlib.abc
+import json
+import os
+import sys
+import threading
+import time
+
+STARTUP_BUDGET_MS = 1500
+TRACE_PATH = "data/assets/cache/startup.json"
+TRACED_PACKAGE = "data."
+REPORT_MODULES = 15
+
+
+class TimedLoader(importlib.abc.Loader):
+    def __init__(self, loader, trace, name):
+        self.loader = loader
+        self.trace = trace
+        self.name = name
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        if threading.current_thread() is not threading.main_thread():
+            return self.loader.exec_module(module)
+        # Same idea as -X importtime: cumulative time includes whatever the
+        # module imports, self time subtracts the traced children.
+        parent_children = self.trace.children
+        self.trace.children = 0.0
+        start = time.perf_counter()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            cumulative = time.perf_counter() - start
+            self.trace.imports.append((self.name, cumulative - self.trace.children, cumulative))
+            self.trace.children = parent_children + cumulative
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+
+class ImportTimer(importlib.abc.MetaPathFinder):
+    # Only the game's own modules are wrapped; third-party loaders are left
+    # alone since some of them inspect their loader's type.
+    def __init__(self, trace):
+        self.trace = trace
+
+    def find_spec(self, name, path, target=None):
+        if not name.startswith(TRACED_PACKAGE):
+            return None
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = TimedLoader(spec.loader, self.trace, name)
+                return spec
+        return None
+
+
+class StartupTrace:
+    def __init__(self, timer=time.perf_counter):
+        self.timer = timer
+        self.start = timer()
+        self.last = self.start
+        self.enabled = False
+        self.finished = False
+        self.phases = []
+        self.imports = []
+        self.children = 0.0
+        self.finder = None
+
+    def begin(self, enabled):
+        self.enabled = enabled
+        if enabled and self.finder is None:
+            self.finder = ImportTimer(self)
+            sys.meta_path.insert(0, self.finder)
+
+    def mark(self, phase):
+        now = self.timer()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def first_frame(self):
+        if self.finished:
+            return None
+        self.mark("first frame")
+        self.finished = True
+        if self.finder is not None:
+            sys.meta_path.remove(self.finder)
+            self.finder = None
+        if self.enabled:
+            report = self.report()
+            self.write(report)
+            self.print_report(report)
+            return report
+        return None
+
+    def report(self):
+        return {
+            "time_to_first_frame_ms": (self.last - self.start) * 1000,
+            "budget_ms": STARTUP_BUDGET_MS,
+            "phases": [{"phase": phase, "ms": seconds * 1000} for phase, seconds in self.phases],
+            "imports": [{"module": name, "self_ms": own * 1000, "cumulative_ms": cumulative * 1000}
+                        for name, own, cumulative in self.imports],
+        }
+
+    def write(self, report, path=TRACE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    def print_report(self, report):
+        print(f"{'phase':<30} {'ms':>9}")
+        for phase in report["phases"]:
+            print(f"{phase['phase']:<30} {phase['ms']:>9.1f}")
+        print(f"\n{'module':<40} {'self ms':>9} {'cumul. ms':>10}")
+        slowest = sorted(report["imports"], key=lambda item: item["cumulative_ms"], reverse=True)
+        for item in slowest[:REPORT_MODULES]:
+            print(f"{item['module']:<40} {item['self_ms']:>9.1f} {item['cumulative_ms']:>10.1f}")
+
+        total = report["time_to_first_frame_ms"]
+        status = "within" if total <= report["budget_ms"] else "OVER"
+        print(f"\nTime to first frame: {total:.0f} ms ({status} the {report['budget_ms']} ms budget)")
+
+
+startup = StartupTrace()
@@ -0,0 +1,310 @@
+import sys
+from datetime import date
+from typing import NamedTuple, Optional
+import numpy as np
+from .player_search import Overlay, player_index
+from .player_store import MISSING, open_save_players
+from .save_db import open_save_db
+
+# Each slot is a sub_position with the number of players a club wants there
+# and how many of them start.
+SLOTS = [
+    ("Goalkeeper", 3, 1), ("Centre-Back", 4, 2), ("Left-Back", 2, 1), ("Right-Back", 2, 1),
+    ("Defensive Midfield", 2, 1), ("Central Midfield", 3, 1), ("Attacking Midfield", 2, 1),
+    ("Left Winger", 2, 1), ("Right Winger", 2, 1), ("Centre-Forward", 3, 1),
+]
+SLOT_ALIASES = {"Left Midfield": "Left Winger", "Right Midfield": "Right Winger", "Second Striker": "Centre-Forward"}
+# Players without a sub_position are slotted by their position.
+POSITION_SLOTS = {"Goalkeeper": "Goalkeeper", "Defender": "Centre-Back", "Midfield": "Central Midfield",
+                  "Attack": "Centre-Forward"}
+TABLE_FIELDS = ["player_id", "current_club_id", "position", "sub_position", "OVR", "overall",
+                "market_value_in_eur", "date_of_birth", "contract_expiration_date"]
+
+# (first day, last day) of each window as (month, day). The season only
+# kicks off in mid-September, so the summer window runs to the end of it.
+TRANSFER_WINDOWS = [((7, 1), (9, 30)), ((1, 1), (1, 31))]
+LINEUP_SIZE = 11
+MIN_SQUAD = 18
+MAX_SQUAD = 30
+# Share of a club's balance it will spend on one player.
+SPEND_SHARE = 0.4
+# Chance that a club is in the market on a given window day.
+ACTIVITY = 0.3
+# A new starter has to beat the current one by this much; a squad player
+# only has to be within DEPTH_MARGIN of the club's lineup average.
+MIN_UPGRADE = 2
+DEPTH_MARGIN = 8
+SHORTAGE_WEIGHT = 5
+PEAK_AGE = 27
+YOUTH_BONUS = 0.5
+AGE_PENALTY = 1.0
+CONTRACT_YEARS = 4
+# Rounds of bids per day; clubs outbid for a player try again with what's left.
+PASSES = 3
+
+
+class Transfer(NamedTuple):
+    player_id: int
+    # None for a free agent.
+    seller: Optional[int]
+    buyer: int
+    fee: int
+
+
+def in_window(day):
+    return any(start <= (day.month, day.day) <= end for start, end in TRANSFER_WINDOWS)
+
+
+def player_table(base, overlay):
+    # Every player's current values: the base rows the save hasn't touched
+    # followed by the players it changed or added.
+    table = {}
+    for name in TABLE_FIELDS:
+        column = np.asarray(base.column(name))
+        if overlay.visible is not None:
+            column = column[overlay.visible]
+        table[name] = np.concatenate([column, overlay.column(name)])
+    return table
+
+
+def mapped_column(base, overlay, name, lookup, default):
+    # A column mapped through a dict, in player_table() order. Base rows go
+    # through the search index's codes, so only the distinct values and the
+    # save's own players are looked up.
+    index = player_index(base).column(name)
+    mapped = np.array([lookup.get(key, default) for key in index.keys.tolist()] + [default])
+    values = mapped[index.codes]
+    if overlay.visible is not None:
+        values = values[overlay.visible]
+    extra = np.array([lookup.get(value, default) for value in overlay.column(name).tolist()], dtype=mapped.dtype)
+    return np.concatenate([values, extra])
+
+
+def player_slots(base, overlay):
+    names = [name for name, _, _ in SLOTS]
+    lookup = {name.encode("UTF-8"): names.index(name) for name in names}
+    lookup.update({alias.encode("UTF-8"): names.index(name) for alias, name in SLOT_ALIASES.items()})
+    position_lookup = {position.encode("UTF-8"): names.index(name) for position, name in POSITION_SLOTS.items()}
+    slots = mapped_column(base, overlay, "sub_position", lookup, -1)
+    fallback = mapped_column(base, overlay, "position", position_lookup, -1)
+    return np.where(slots >= 0, slots, fallback)
+
+
+def small_ints(values):
+    # Stable sorts on 16-bit keys are radix sorts.
+    return values.astype(np.min_scalar_type(max(int(values.max(initial=0)), 0)))
+
+
+def group_ranks(groups, by_strength):
+    # Rank of each player within its group, strongest first. by_strength
+    # orders every player strongest first; a stable sort on the group keeps
+    # that order within each group.
+    order = by_strength[np.argsort(small_ints(groups[by_strength]), kind="stable")]
+    sorted_groups = groups[order]
+    starts = np.r_[True, sorted_groups[1:] != sorted_groups[:-1]]
+    positions = np.arange(len(order))
+    ranks = np.empty(len(order), dtype=np.intp)
+    ranks[order] = positions - np.maximum.accumulate(np.where(starts, positions, 0))
+    return ranks
+
+
+def years_from(today, dates):
+    return (dates - np.datetime64(today, "D")).astype(np.float64) / 365.25
+
+
+def plan_transfers(players, balances, today, exclude_club=None, rng=None):
+    # One batch for every club: needs and candidate values are whole-table
+    # array operations, and bids are resolved per slot and pass rather
+    # than per club.
+    rng = np.random.default_rng() if rng is None else rng
+    base = getattr(players, "base", players)
+    overlay = Overlay(players, base)
+    table = player_table(base, overlay)
+
+    club_ids = np.array(sorted(int(club_id) for club_id in balances), dtype=np.int64)
+    money = np.array([balances[str(club_id)] for club_id in club_ids], dtype=np.float64)
+    count = len(club_ids)
+    if count == 0:
+        return []
+    # Players at clubs without finances share the extra index `count`.
+    club = mapped_column(base, overlay, "current_club_id", {club_id: i for i, club_id in
+                                                            enumerate(club_ids.tolist())}, count)
+
+    strength = table["OVR"].astype(np.float64)
+    strength = np.where(strength == MISSING, table["overall"], strength)
+    slot = player_slots(base, overlay)
+    valid = (slot >= 0) & (strength > 0)
+    player_ids = table["player_id"][valid].astype(np.int64)
+    club, slot, strength = club[valid], slot[valid], strength[valid]
+    by_strength = np.argsort(small_ints(-np.minimum(np.round(strength), 127) + 127), kind="stable")
+
+    age = -years_from(today, table["date_of_birth"][valid])
+    age = np.where(np.isnan(age), PEAK_AGE, age)
+    contract = np.nan_to_num(years_from(today, table["contract_expiration_date"][valid]), nan=0.0)
+    quality = (strength + YOUTH_BONUS * np.clip(PEAK_AGE - age, 0, 6)
+               - AGE_PENALTY * np.clip(age - PEAK_AGE - 4, 0, None))
+    # Clubs ask less for players whose contracts are running down.
+    values = np.maximum(table["market_value_in_eur"][valid], 0)
+    fees = np.round(values * (0.6 + 0.2 * np.clip(contract, 0, 3)), -4)
+
+    # Club needs: depth and starter quality per slot against the club's
+    # own lineup average.
+    slot_count = len(SLOTS)
+    targets = np.array([target for _, target, _ in SLOTS])
+    starters = np.array([starting for _, _, starting in SLOTS])
+    groups = club * slot_count + slot
+    ranks = group_ranks(groups, by_strength)
+    counts = np.bincount(groups, minlength=(count + 1) * slot_count).reshape(count + 1, slot_count)[:count]
+    floors = np.zeros((count + 1) * slot_count)
+    starting = ranks == starters[slot] - 1
+    floors[groups[starting]] = strength[starting]
+    floors = floors.reshape(count + 1, slot_count)[:count]
+
+    lineup = group_ranks(club, by_strength) < LINEUP_SIZE
+    level = (np.bincount(club[lineup], strength[lineup], minlength=count + 1)[:count]
+             / np.maximum(np.bincount(club[lineup], minlength=count + 1)[:count], 1))
+    squad = np.bincount(club, minlength=count + 1)
+    # Players without a known club can always leave.
+    squad[count] = MAX_SQUAD
+
+    shortage = np.clip(targets - counts, 0, None)
+    needs = SHORTAGE_WEIGHT * shortage + np.clip(level[:, None] - floors, 0, None)
+    bars = np.where(shortage > 0, level[:, None] - DEPTH_MARGIN, floors + MIN_UPGRADE)
+    wanted = np.argmax(needs, axis=1)
+    need = needs[np.arange(count), wanted]
+    bar = bars[np.arange(count), wanted]
+
+    excluded = count
+    if exclude_club is not None:
+        i = np.searchsorted(club_ids, int(exclude_club))
+        if i < count and club_ids[i] == int(exclude_club):
+            excluded = i
+    buying = (need > 0) & (squad[:count] < MAX_SQUAD) & (money > 0) & (rng.random(count) < ACTIVITY)
+    # Clubs only let go of squad players, or starters about to leave anyway.
+    for_sale = (ranks >= starters[slot]) | (contract < 1)
+    if excluded < count:
+        buying[excluded] = False
+        for_sale &= club != excluded
+
+    # Each slot's players, cheapest first.
+    by_fee = np.argsort(fees)
+    by_fee = by_fee[np.argsort(small_ints(slot[by_fee]), kind="stable")]
+    slot_pools = np.split(by_fee, np.cumsum(np.bincount(slot, minlength=slot_count))[:-1])
+    taken = np.zeros(len(player_ids), dtype=bool)
+    transfers = []
+    for _ in range(PASSES):
+        available = for_sale & ~taken & (squad[club] > MIN_SQUAD)
+        choice = np.full(count, -1, dtype=np.intp)
+        for s, pool in enumerate(slot_pools):
+            bidders = np.flatnonzero(buying & (wanted == s))
+            if len(bidders) == 0 or len(pool) == 0:
+                continue
+            # Best player each bidder can afford: the running best of the
+            # pool sorted by fee, looked up at the bidder's spending limit.
+            scores = np.where(available[pool], quality[pool], -np.inf)
+            best = np.maximum.accumulate(scores)
+            positions = np.arange(len(pool))
+            best_at = np.maximum.accumulate(np.where(scores == best, positions, 0))
+            limit = np.searchsorted(fees[pool], money[bidders] * SPEND_SHARE, side="right") - 1
+            bidders, limit = bidders[limit >= 0], limit[limit >= 0]
+            picks = pool[best_at[limit]]
+            fits = available[picks] & (strength[picks] >= bar[bidders]) & (club[picks] != bidders)
+            choice[bidders[fits]] = picks[fits]
+
+        bidders = np.flatnonzero(choice >= 0)
+        if len(bidders) == 0:
+            break
+        # The neediest club wins a contested player, with a little luck.
+        bidders = bidders[np.argsort(-(need[bidders] + rng.random(len(bidders))), kind="stable")]
+        _, first = np.unique(choice[bidders], return_index=True)
+        winners = bidders[first]
+        picks = choice[winners]
+
+        taken[picks] = True
+        buying[winners] = False
+        np.subtract.at(money, winners, fees[picks])
+        sellers = club[picks]
+        sold = sellers < count
+        np.add.at(money, sellers[sold], fees[picks][sold])
+        np.subtract.at(squad, sellers[sold], 1)
+        np.add.at(squad, winners, 1)
+        transfers += [Transfer(player_id, None if seller == count else int(club_ids[seller]), int(club_ids[buyer]),
+                               int(fee))
+                      for player_id, seller, buyer, fee in zip(player_ids[picks].tolist(), sellers.tolist(),
+                                                               winners.tolist(), fees[picks].tolist())]
+    return transfers
+
+
+def apply_transfers(players, transfers, today):
+    db = players.db
+    expires = f"{today.year + CONTRACT_YEARS}-06-30"
+    entries = []
+    with db.transaction():
+        for transfer in transfers:
+            name = players.player(transfer.player_id, ["name"])["name"]
+            entries.append(players.store("set", transfer.player_id, {"current_club_id": transfer.buyer,
+                                                                     "contract_expiration_date": expires}))
+            db.adjust_balance(transfer.buyer, -transfer.fee, today, f"Signed {name}")
+            if transfer.seller is not None:
+                db.adjust_balance(transfer.seller, transfer.fee, today, f"Sold {name}")
+    # The squads in memory only change once the moves and fees are stored.
+    for entry in entries:
+        players.apply(entry)
+
+
+def transfer_round(players, day, exclude_club=None):
+    # One day of trading for every club but the manager's. Takes the open
+    # save players rather than opening them, since that can't happen while
+    # the save's database lock is held.
+    db = players.db
+    rng = np.random.default_rng(db.derived_seed(f"transfers:{day}"))
+    with db.transaction():
+        transfers = plan_transfers(players, db.balances(), day, exclude_club, rng)
+        apply_transfers(players, transfers, day)
+    return transfers
+
+
+def advance_transfers(save_num, today, exclude_club=None):
+    # Trades on every matchday of any league in a window since the last
+    # call, so days the manager's club doesn't play aren't skipped, and
+    # never twice for the same day.
+    today = str(today)[:10]
+    players = open_save_players(save_num)
+    db = players.db
+    transfers = []
+    try:
+        with db.transaction():
+            last = db.get("transfer_date", "")
+            if last >= today:
+                return transfers
+            days = set(db.fixture_dates(last, today)) | {today}
+            for day in sorted(date.fromisoformat(day) for day in days):
+                if in_window(day):
+                    transfers += transfer_round(players, day, exclude_club)
+            db.set("transfer_date", today)
+    except BaseException:
+        # Each day's moves are applied in memory so the next day plans
+        # against them; none of them happened if the whole catch-up failed.
+        players.reload()
+        raise
+    return transfers
+
+
+if __name__ == "__main__":
+    from .clubs import club_registry
+    from .gen_schedule import SEASON_START
+
+    # Lists the moves one window day would make in a save, without making them.
+    save_num = sys.argv[1] if len(sys.argv) > 1 else "1"
+    day = date.fromisoformat(sys.argv[2] if len(sys.argv) > 2 else SEASON_START)
+    players = open_save_players(save_num)
+    registry = club_registry()
+    db = open_save_db(save_num)
+    # Same club and seed as advance_transfers, so these are the moves the
+    # save will actually see.
+    club_id = db.read_meta()["club_id"] or None
+    rng = np.random.default_rng(db.derived_seed(f"transfers:{day}"))
+    for transfer in plan_transfers(players, db.balances(), day, club_id, rng):
+        name = players.player(transfer.player_id, ["name"])["name"]
+        print(f"{name}: {registry.name(transfer.seller, '-')} -> {registry.name(transfer.buyer)} "
+              f"for {transfer.fee:,}")
@@ -1,46 +1,86 @@
+import sys
+from data.scripts.startup import startup
+
+startup.begin("--startup-trace" in sys.argv[1:])
+
 import pygame
-from data.scenes.Menu import MenuPage
-from data.scenes.SaveSelector import SaveSelectorPage
-from data.scenes.Dashboard import DashboardPage
-from data.scenes.ClubSelectionPage import ClubSelectionPage
-from data.scripts.match import MatchSimulationPage
+from data.scripts.assets import images
+from data.scripts.prefetch import Prefetcher
+from data.scripts.scene_manager import SceneManager
+from data.scripts.save_service import saves, CONFIG_PATH
+from data.scripts.profiler import profiler
+startup.mark("imports")
 
 pygame.init()
+startup.mark("pygame.init")
 screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
 pygame.display.set_caption("Football Manager")
+startup.mark("display")
+
+config = saves.read(CONFIG_PATH)
+images.set_budget(config.get("image_cache_mb", 128) * 1024 * 1024)
+startup.mark("config")
+
+# Scene modules are imported the first time the scene is needed (or
+# prefetched), so only the menu's imports sit on the cold-start path.
+PAGES = {
+    "menu": "data.scenes.Menu:MenuPage",
+    "save_selector": "data.scenes.SaveSelector:SaveSelectorPage",
+    "dashboard": "data.scenes.Dashboard:DashboardPage",
+    "club_selection": "data.scenes.ClubSelectionPage:ClubSelectionPage",
+    "match_simulation": "data.scripts.match:MatchSimulationPage",
+    "transfer": "data.scenes.Market:MarketPage",
+}
+
+prefetcher = Prefetcher()
+
+def draw_loading(progress):
+    pygame.event.pump()
+    screen.fill((0, 0, 0))
+    bar = pygame.Rect(0, 0, 400, 12)
+    bar.center = (screen.get_width() // 2, screen.get_height() // 2)
+    pygame.draw.rect(screen, (60, 60, 60), bar, border_radius=6)
+    pygame.draw.rect(screen, (255, 255, 255), (bar.x, bar.y, int(bar.width * progress), bar.height), border_radius=6)
+    pygame.display.flip()
+
+scenes = SceneManager(screen, PAGES, prefetcher, draw_loading, config.get("scene_cache_mb", 64) * 1024 * 1024)
 
 def get_page(page_name):
-    match page_name:
-        case "menu":
-            return MenuPage(screen)
-        case "save_selector":
-            return SaveSelectorPage(screen)
-        case "dashboard":
-            return DashboardPage(screen)
-        case "club_selection":
-            return ClubSelectionPage(screen)
-        case "match_simulation":
-            return MatchSimulationPage(screen)
-        case _:
-            return MenuPage(screen)
+    return scenes.switch(page_name)
 
 def main():
     clock = pygame.time.Clock()
     current_page_name = "menu"
     current_page = get_page(current_page_name)
+    startup.mark("menu scene")
 
     while True:
-        events = pygame.event.get()
+        profiler.begin_frame(scenes.current_name)
+        events = profiler.handle_events(pygame.event.get(), current_page)
         next_page_name = current_page.handle_events(events)
 
         if next_page_name:
             current_page = get_page(next_page_name)
-        
+        profiler.mark("events")
+
         current_page.update()
-        current_page.render()
+        profiler.mark("update")
+        dirty_rects = current_page.render()
+        profiler.mark("render")
+        dirty_rects = profiler.draw(screen, dirty_rects)
+        profiler.mark("overlay")
 
-        pygame.display.flip()
+        if dirty_rects is None:
+            pygame.display.flip()
+        elif dirty_rects:
+            pygame.display.update(dirty_rects)
+        profiler.mark("flip")
+        if not startup.finished:
+            startup.first_frame()
+            if "--exit-after-first-frame" in sys.argv[1:]:
+                current_page.quit()
         clock.tick(60)
+        profiler.end_frame()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,141 @@
+import argparse
+import csv
+import json
+import random
+import time
+from data.scripts.engine import MatchEngine
+from data.scripts.gen_schedule import FixtureCalendar, generate_league_schedules
+from data.scripts.season_sim import simulate_season
+from data.scripts.save_db import open_save_db
+from data.scripts.player_store import open_base_store, open_save_players
+from data.scripts.ratings import team_ratings
+from data.scripts.clubs import club_registry
+
+RESULT_FIELDS = [
+    "seed", "home", "away", "home_team", "away_team", "date",
+    "home_score", "away_score", "home_possession",
+    "home_shots", "away_shots", "home_shots_on_target", "away_shots_on_target",
+    "home_xg", "away_xg",
+]
+
+
+def load_club_names():
+    registry = club_registry()
+    names = {club_id: club.club_name for club_id, club in registry.clubs.items()}
+    league_clubs = {code: [club.club_id for club in clubs] for code, clubs in registry.league_index.items() if clubs}
+    return names, league_clubs
+
+
+def load_fixtures(args, league_clubs):
+    if args.save:
+        return open_save_db(args.save).fixtures()
+    if args.schedule:
+        return FixtureCalendar.load(args.schedule).fixtures
+    if args.home and args.away:
+        return [{"home": args.home, "away": args.away, "date": ""}]
+
+    codes = args.league or sorted(league_clubs)
+    for code in codes:
+        if code not in league_clubs:
+            raise SystemExit(f"Unknown league code: {code}")
+    return generate_league_schedules(league_clubs={code: league_clubs[code] for code in codes}).fixtures
+
+
+def simulate_fixtures(fixtures, names, repeat=1, seed=None, players=None):
+    players = players or open_base_store()
+    rng = random.Random(seed)
+    results = []
+    for _ in range(repeat):
+        for fixture in fixtures:
+            engine = MatchEngine(names.get(fixture["home"], fixture["home"]),
+                                 names.get(fixture["away"], fixture["away"]), seed=rng.getrandbits(63),
+                                 home_ratings=team_ratings(players, fixture["home"]),
+                                 away_ratings=team_ratings(players, fixture["away"]))
+            result = engine.simulate()
+            result["home"] = fixture["home"]
+            result["away"] = fixture["away"]
+            result["date"] = fixture.get("date", "")
+            results.append(result)
+    return results
+
+
+def write_results(results, path):
+    if path.endswith(".csv"):
+        with open(path, "w", newline="", encoding="UTF-8") as f:
+            writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
+    else:
+        with open(path, "w", encoding="UTF-8") as f:
+            json.dump(results, f)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate matches without opening the game window.")
+    parser.add_argument("--league", action="append", help="league code to simulate a full double round-robin for (repeatable, default: all leagues)")
+    parser.add_argument("--save", help="save slot whose fixtures to simulate")
+    parser.add_argument("--schedule", help="path to a schedule JSON file to simulate")
+    parser.add_argument("--home", help="home club_id for a single fixture")
+    parser.add_argument("--away", help="away club_id for a single fixture")
+    parser.add_argument("--repeat", type=int, default=1, help="number of times to simulate every fixture")
+    parser.add_argument("--seed", type=int, help="random seed for reproducible runs")
+    parser.add_argument("--output", "-o", help="write results to a .json or .csv file")
+    parser.add_argument("--season", metavar="LEAGUE_CODE", help="Monte Carlo simulate a whole season and report outcome probabilities")
+    parser.add_argument("--simulations", type=int, default=10000, help="number of seasons to simulate with --season")
+    return parser.parse_args(argv)
+
+
+def run_season(args):
+    start = time.perf_counter()
+    try:
+        outcomes = simulate_season(args.season, args.simulations, args.seed)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    elapsed = time.perf_counter() - start
+
+    if args.output:
+        if args.output.endswith(".csv"):
+            with open(args.output, "w", newline="", encoding="UTF-8") as f:
+                writer = csv.DictWriter(f, fieldnames=list(outcomes[0]))
+                writer.writeheader()
+                writer.writerows(outcomes)
+        else:
+            with open(args.output, "w", encoding="UTF-8") as f:
+                json.dump(outcomes, f)
+    else:
+        print(f"{'Club':<30} {'Pts':>6} {'Title':>7} {'Top 4':>7} {'Releg.':>7}")
+        for club in outcomes:
+            print(f"{club['club_name']:<30} {club['mean_points']:>6.1f} {club['title']:>7.1%} "
+                  f"{club['top4']:>7.1%} {club['relegation']:>7.1%}")
+
+    print(f"Simulated {args.simulations} seasons of {args.season} in {elapsed:.2f}s")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.season:
+        run_season(args)
+        return
+
+    names, league_clubs = load_club_names()
+    fixtures = load_fixtures(args, league_clubs)
+
+    start = time.perf_counter()
+    players = open_save_players(args.save) if args.save else open_base_store()
+    results = simulate_fixtures(fixtures, names, args.repeat, args.seed, players)
+    elapsed = time.perf_counter() - start
+
+    if args.output:
+        write_results(results, args.output)
+    else:
+        for result in results[:20]:
+            print(f"{result['home_team']} {result['home_score']} - {result['away_score']} {result['away_team']}")
+        if len(results) > 20:
+            print(f"... {len(results) - 20} more")
+
+    rate = len(results) / elapsed if elapsed else float("inf")
+    print(f"Simulated {len(results)} matches in {elapsed:.2f}s ({rate:.0f} matches/s)")
+
+
+if __name__ == "__main__":
+    main()
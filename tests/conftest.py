@@ -0,0 +1,18 @@
+import os
+import sys
+import pytest
+
+# Asset and data paths are relative to the repository root, as when the
+# game runs.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+
+@pytest.fixture
+def save_slot(tmp_path, monkeypatch):
+    # Save databases go to a temporary directory instead of data/assets.
+    from data.scripts import save_db
+
+    monkeypatch.setattr(save_db, "db_path", lambda save_num: str(tmp_path / f"save{save_num}.db"))
+    return "test"
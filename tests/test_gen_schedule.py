@@ -0,0 +1,41 @@
+import itertools
+import pytest
+from data.scripts.gen_schedule import generate_league_schedules, round_robin
+
+
+@pytest.mark.parametrize("count", [2, 3, 4, 5, 18, 19, 20])
+def test_round_robin(count):
+    clubs = [str(i) for i in range(count)]
+    rounds = round_robin(clubs)
+    slots = count + count % 2
+
+    assert len(rounds) == 2 * (slots - 1)
+    for pairs in rounds:
+        playing = [club for pair in pairs for club in pair]
+        # Nobody plays twice in a round, and only an odd league has a bye.
+        assert len(playing) == len(set(playing))
+        assert len(pairs) == count // 2
+
+    # Every club hosts every other club exactly once.
+    fixtures = [pair for pairs in rounds for pair in pairs]
+    assert sorted(fixtures) == sorted(itertools.permutations(clubs, 2))
+    # The second half mirrors the first.
+    half = len(rounds) // 2
+    assert rounds[half:] == [[(away, home) for home, away in pairs] for pairs in rounds[:half]]
+
+
+def test_no_long_home_runs():
+    rounds = round_robin([str(i) for i in range(20)])
+    for club in map(str, range(20)):
+        venues = [next(pair.index(club) for pair in pairs if club in pair) for pairs in rounds]
+        longest = max(len(list(run)) for _, run in itertools.groupby(venues))
+        assert longest <= 3
+
+
+def test_league_schedule_dates():
+    calendar = generate_league_schedules("2024-09-17", {"A": ["1", "2", "3"], "B": ["4", "5", "6", "7"]})
+    dates = sorted({fixture["date"] for fixture in calendar.fixtures})
+    assert dates[0] == "2024-09-17"
+    assert len(dates) == 6
+    assert sum(fixture["league_code"] == "A" for fixture in calendar.fixtures) == 6
+    assert sum(fixture["league_code"] == "B" for fixture in calendar.fixtures) == 12
@@ -0,0 +1,28 @@
+import pytest
+from data.scripts.engine import MatchEngine
+from data.scripts.match_log import decode_log, encode_log, replay_engine
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2 ** 62 + 12345])
+def test_round_trip(seed):
+    engine = MatchEngine("Home", "Away", seed=seed)
+    result = engine.simulate()
+
+    decoded_seed, events = decode_log(encode_log(engine))
+    assert decoded_seed == seed
+    assert len(events) == len(engine.events_timeline)
+    for decoded, original in zip(events, engine.events_timeline):
+        assert (decoded["minute"], decoded["team"], decoded["type"], decoded["commentary"]) == (
+            original["minute"], original["team"], original["type"], original["commentary"])
+        assert decoded["possession"] == pytest.approx(original["possession"], abs=0.05)
+        assert decoded["xg"] == pytest.approx(original["xg"], abs=0.0005)
+
+    replayed = replay_engine(encode_log(engine), "Home", "Away").simulate()
+    assert (replayed["home_score"], replayed["away_score"]) == (result["home_score"], result["away_score"])
+
+
+def test_rejects_unknown_version():
+    data = bytearray(encode_log(MatchEngine(seed=3)))
+    data[0] += 1
+    with pytest.raises(ValueError):
+        decode_log(bytes(data))
@@ -0,0 +1,92 @@
+import random
+from datetime import date
+import pytest
+from data.scripts.player_search import PlayerSearch, RESULT_FIELDS
+from data.scripts.player_store import SavePlayers, open_base_store
+from data.scripts.save_db import open_database
+
+TODAY = date(2024, 9, 17)
+QUERIES = [
+    ({}, "OVR", True, None),
+    ({"position": "Attack"}, "market_value_in_eur", True, 31),
+    ({"foot": "left", "age": (18, 23)}, "OVR", True, None),
+    ({"country_of_birth": ["Brazil", "Argentina"]}, "PAC", True, None),
+    ({"sub_position": "Centre-Back", "market_value_in_eur": (None, 5_000_000),
+      "contract_expiration_date": (None, "2025-06-30")}, "age", True, 11),
+    ({"OVR": (80, None)}, "OVR", False, None),
+    ({"current_club_id": 31}, "OVR", True, None),
+    ({"age": (30, None)}, "age", False, None),
+    ({"PAC": (85, 90), "position": ["Attack", "Midfield"]}, "market_value_in_eur", False, None),
+]
+
+
+@pytest.fixture(scope="module")
+def changed_save(tmp_path_factory):
+    # A save with transfers, edited ratings and added players, so results
+    # come from both the base index and the save's overlay.
+    db = open_database(str(tmp_path_factory.mktemp("saves") / "save.db"))
+    players = SavePlayers(open_base_store(), db)
+    rng = random.Random(5)
+    ids = [int(player_id) for player_id in players.base.column("player_id")]
+    for player_id in rng.sample(ids, 300):
+        players.transfer(player_id, rng.choice([31, 11, 27, 418]))
+    for player_id in rng.sample(ids, 200):
+        players.set_attributes(player_id, OVR=rng.randint(50, 95), market_value_in_eur=rng.randint(1, 90) * 1_000_000)
+    for i in range(20):
+        ids.append(10_000_000 + i)
+        players.add_player(10_000_000 + i, name=f"Youth {i}", position="Attack", sub_position="Centre-Forward",
+                           OVR=rng.randint(60, 90), current_club_id=31, date_of_birth="2005-01-01", foot="left",
+                           country_of_birth="Brazil", market_value_in_eur=rng.randint(1, 50) * 1_000_000)
+    everyone = {player_id: players.player(player_id, RESULT_FIELDS + ["PAC"]) for player_id in ids}
+    return players, everyone
+
+
+def age(player):
+    born = player["date_of_birth"]
+    return None if born is None else TODAY.year - born.year - ((TODAY.month, TODAY.day) < (born.month, born.day))
+
+
+def matches(player, filters, exclude_club):
+    if exclude_club is not None and player["current_club_id"] == exclude_club:
+        return False
+    for name, wanted in filters.items():
+        value = age(player) if name == "age" else player[name]
+        if isinstance(wanted, tuple):
+            low, high = (date.fromisoformat(bound) if isinstance(bound, str) else bound for bound in wanted)
+            if value is None or (low is not None and value < low) or (high is not None and value > high):
+                return False
+        elif isinstance(wanted, list):
+            if value not in wanted:
+                return False
+        elif value != wanted:
+            return False
+    return True
+
+
+def brute_force(everyone, filters, sort, descending, exclude_club):
+    found = [player for player in everyone.values() if matches(player, filters, exclude_club)]
+    if sort == "age":
+        sort, descending = "date_of_birth", not descending
+    # Players without a value sort last either way.
+    present = sorted((player for player in found if player[sort] is not None), key=lambda player: player[sort],
+                     reverse=descending)
+    return len(found), [player[sort] for player in present] + [None] * (len(found) - len(present))
+
+
+@pytest.mark.parametrize("filters, sort, descending, exclude_club", QUERIES)
+def test_query_matches_brute_force(changed_save, filters, sort, descending, exclude_club):
+    players, everyone = changed_save
+    search = PlayerSearch(players)
+    total, keys = brute_force(everyone, filters, sort, descending, exclude_club)
+    key = "date_of_birth" if sort == "age" else sort
+
+    seen = []
+    for offset in range(0, min(total, 100), 20):
+        page = search.query(filters, sort=sort, descending=descending, offset=offset, limit=20, today=TODAY,
+                            exclude_club=exclude_club)
+        assert page.total == total
+        assert [player[key] for player in page.players] == keys[offset:offset + 20]
+        assert all(matches(everyone[player["player_id"]], filters, exclude_club) for player in page.players)
+        seen += [player["player_id"] for player in page.players]
+    # Pages never repeat a player.
+    assert len(seen) == len(set(seen))
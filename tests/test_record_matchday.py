@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+from data.scripts.clubs import club_registry
+from data.scripts.engine import MatchEngine
+from data.scripts.gen_schedule import generate_league_schedules
+from data.scripts.match import MatchSimulationPage
+from data.scripts.player_store import new_save_players
+from data.scripts.save_db import load_calendar, open_save_db
+
+
+def play(save_num, club_id, fixture):
+    # What the match scene does once the manager's match is over.
+    engine = MatchEngine(seed=open_save_db(save_num).match_seed(fixture["fixture_id"]))
+    engine.simulate()
+    page = SimpleNamespace(save_num=save_num, club_id=club_id, match_data=fixture, engine=engine,
+                           result_recorded=False)
+    MatchSimulationPage.record_matchday(page)
+    assert page.result_recorded
+
+
+def test_bye_rounds_are_recorded(save_slot):
+    # Five clubs: every round one of them sits out.
+    clubs = [club.club_id for club in club_registry().league_clubs("GB1")[:5]]
+    db = open_save_db(save_slot)
+    db.reset()
+    new_save_players(save_slot)
+    db.replace_fixtures(generate_league_schedules("2024-10-01", {"T1": clubs}).fixtures)
+    calendar = load_calendar(save_slot)
+
+    club_id = clubs[0]
+    own = calendar.upcoming(club_id)
+    all_dates = sorted({fixture["date"] for fixture in db.fixtures()})
+    bye_dates = sorted(set(all_dates) - {fixture["date"] for fixture in own})
+    assert bye_dates
+
+    for fixture in own:
+        play(save_slot, club_id, fixture)
+        # Everything up to the club's match has a result, byes included.
+        assert db.unplayed_fixtures(fixture["date"]) == []
+
+    last = own[-1]["date"]
+    played = [fixture for fixture in db.fixtures() if fixture["home_score"] is not None]
+    assert {fixture["date"] for fixture in played} == {day for day in all_dates if day <= last}
+    assert all(db.match_log(fixture["fixture_id"]) for fixture in played)